@@ -1,8 +1,19 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
-from app.core.constants import TableType
+from app.storage.models import ObjectReferenceModel
+from app.core.constants import (
+    BackupTypeEnum,
+    BackupTypeType,
+    ConflictActionEnum,
+    ConflictActionType,
+    FileFormatType,
+    RestoreModeEnum,
+    RestoreModeType,
+    TableType,
+)
 
 
 class DepartmentModel(BaseModel):
@@ -87,6 +98,8 @@ class UploadDataModel(BaseModel):
         departments (List[DepartmentModel]): List of department models.
         jobs (List[JobModel]): List of job models.
         employees (List[EmployeeModel]): List of employee models.
+        on_conflict (ConflictActionType): What to do with rows whose ID already exists:
+            `nothing` skips them and `update` overwrites them.
 
     Properties:
         has_data (bool): Indicates if the model has any data.
@@ -96,6 +109,7 @@ class UploadDataModel(BaseModel):
     departments: List[DepartmentModel] = Field(default_factory=list)
     jobs: List[JobModel] = Field(default_factory=list)
     employees: List[EmployeeModel] = Field(default_factory=list)
+    on_conflict: ConflictActionType = Field(ConflictActionEnum.NOTHING)
 
     @property
     def has_data(self):
@@ -129,23 +143,65 @@ class UploadDataModel(BaseModel):
                         "job_id": 1234,
                     }
                 ],
+                "on_conflict": "nothing",
             }
         }
 
 
-class TableNameModel(BaseModel):
+class FileUploadModel(BaseModel):
     """
-    Represents a table name model.
+    Represents a CSV or Parquet file stored in the object store, to be loaded into a table.
 
     Attributes:
-        table_name (str): The name of the table.
+        table_name (TableType): The name of the table the file is loaded into.
+        file_format (FileFormatType): The format of the file (`csv` or `parquet`).
+        file (ObjectReferenceModel): The reference to the file in the object store.
+        on_conflict (ConflictActionType): What to do with rows whose ID already exists.
     """
 
     table_name: TableType = Field(...)
+    file_format: FileFormatType = Field(...)
+    file: ObjectReferenceModel = Field(...)
+    on_conflict: ConflictActionType = Field(ConflictActionEnum.NOTHING)
+
+
+TABLE_MODELS = {
+    "department": DepartmentModel,
+    "job": JobModel,
+    "employee": EmployeeModel,
+}
+
+
+class TableNameModel(BaseModel):
+    """
+    Represents the tables of a backup or restore.
+
+    Attributes:
+        table_name (TableType | List[TableType] | "all"): A table, a list of tables or
+            `all`. Several tables are processed concurrently by a single task.
+        mode (RestoreModeType): How a restore writes the backup into the table:
+            `append` only inserts missing rows, `merge` also overwrites existing
+            ones and `replace` makes the table match the backup. Ignored by backups.
+        backup_type (BackupTypeType): `full` writes the whole table, `incremental`
+            only the rows changed since the last backup. Ignored by restores.
+        backup_id (Optional[str]): The backup a restore goes back to. Defaults to the latest.
+        as_of (Optional[datetime]): Restore the last backup taken at or before this time.
+        filter (Optional[Dict[str, int | str]]): Only restore the rows matching these
+            partition keys or column values, e.g. `{"year": 2021, "quarter": 3}`.
+            Cannot be combined with the `replace` mode.
+    """
+
+    table_name: TableType | List[TableType] | Literal["all"] = Field(...)
+    mode: RestoreModeType = Field(RestoreModeEnum.APPEND)
+    backup_type: BackupTypeType = Field(BackupTypeEnum.FULL)
+    backup_id: Optional[str] = Field(None)
+    as_of: Optional[datetime] = Field(None)
+    filter: Optional[Dict[str, int | str]] = Field(None)
 
     class Config:
         json_schema_extra = {
             "example": {
                 "table_name": "departments",
+                "mode": "append",
             }
         }
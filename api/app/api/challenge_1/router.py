@@ -1,11 +1,30 @@
-from fastapi import Body, status, APIRouter, HTTPException
+from fastapi import (
+    Body,
+    Depends,
+    File,
+    Form,
+    status,
+    APIRouter,
+    HTTPException,
+    UploadFile,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import constants
 from app.api.models import ErrorModel
-from app.api.utils import manage_new_task
+from app.database.connection import get_session
 from app.api.models import TaskResponseModel
-from app.api.challenge_1.models import UploadDataModel, TableNameModel
-
+from app.api.utils import (
+    get_file_format,
+    manage_new_task,
+    store_upload,
+    validate_file_header,
+)
+from app.api.challenge_1.models import (
+    FileUploadModel,
+    TableNameModel,
+    UploadDataModel,
+)
 
 router = APIRouter(
     prefix=f"/{constants.CHALLENGE_1_PREFIX}", tags=[constants.CHALLENGE_1_PREFIX]
@@ -18,7 +37,9 @@ router = APIRouter(
     summary=constants.CHALLENGE_1_UPLOAD_ENDPOINT_SUMMARY,
     response_model=TaskResponseModel,
 )
-def upload_data(body: UploadDataModel = Body(...)):
+async def upload_data(
+    body: UploadDataModel = Body(...), session: AsyncSession = Depends(get_session)
+):
     """
     # Upload Data
 
@@ -56,7 +77,90 @@ def upload_data(body: UploadDataModel = Body(...)):
             ).model_dump(),
         )
 
-    return manage_new_task(constants.TaskTypeEnum.LOAD.value, data=body)
+    return await manage_new_task(constants.TaskTypeEnum.LOAD.value, session, data=body)
+
+
+@router.post(
+    path=constants.CHALLENGE_1_UPLOAD_FILE_ENDPOINT,
+    status_code=status.HTTP_201_CREATED,
+    summary=constants.CHALLENGE_1_UPLOAD_FILE_ENDPOINT_SUMMARY,
+    response_model=TaskResponseModel,
+)
+async def upload_file(
+    table_name: constants.TableType = Form(...),
+    file: UploadFile = File(...),
+    on_conflict: constants.ConflictActionType = Form(
+        constants.ConflictActionEnum.NOTHING
+    ),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    # Upload File
+
+    This endpoint is used to upload a CSV or Parquet file with the rows of one table.
+    The file is streamed to the object store and a new task of type `LOAD` that
+    references it is created, so the file is not limited in size.
+    CSV files must have a header row with the columns of the table.
+
+    ## Parameters:
+        table_name (TableType): The table the rows are loaded into.
+        file (UploadFile): The `.csv` or `.parquet` file.
+        on_conflict (ConflictActionType): What to do with rows whose ID already exists.
+
+    ## Raises:
+        HTTPException: If the file is not a CSV or Parquet file or its header does not match the table.
+
+    ## Returns:
+        TaskResponseModel: The response containing the newly created task.
+    """
+    file_format = get_file_format(file.filename)
+
+    if not file_format:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ErrorModel(
+                code=status.HTTP_400_BAD_REQUEST,
+                message=constants.ResponseErrorMessage.INVALID_FILE_FORMAT,
+                error_type=constants.ResponseErrorTypeEnum.INVALID_FILE_FORMAT,
+                details=constants.ResponseErrorMessage.INVALID_FILE_FORMAT,
+            ).model_dump(),
+        )
+
+    head = await file.read(constants.STORAGE_CHUNK_SIZE)
+    valid, details = validate_file_header(head, file_format, table_name)
+
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ErrorModel(
+                code=status.HTTP_400_BAD_REQUEST,
+                message=constants.ResponseErrorMessage.INVALID_FILE_HEADER,
+                error_type=constants.ResponseErrorTypeEnum.INVALID_FILE_HEADER,
+                details=details,
+            ).model_dump(),
+        )
+
+    try:
+        reference = await store_upload(file, table_name, file_format)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ErrorModel(
+                code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                message=constants.ResponseErrorMessage.HTTP_500,
+                error_type=constants.ResponseErrorTypeEnum.HTTP_500,
+                details=str(e),
+            ).model_dump(),
+        )
+
+    data = FileUploadModel(
+        table_name=table_name,
+        file_format=file_format,
+        file=reference,
+        on_conflict=on_conflict,
+    )
+
+    return await manage_new_task(constants.TaskTypeEnum.LOAD.value, session, data=data)
 
 
 @router.post(
@@ -65,7 +169,9 @@ def upload_data(body: UploadDataModel = Body(...)):
     summary=constants.CHALLENGE_1_BACKUP_ENDPOINT_SUMMARY,
     response_model=TaskResponseModel,
 )
-def backup_task(body: TableNameModel = Body(...)):
+async def backup_task(
+    body: TableNameModel = Body(...), session: AsyncSession = Depends(get_session)
+):
     """
     # Backup a task.
 
@@ -76,7 +182,9 @@ def backup_task(body: TableNameModel = Body(...)):
         TaskResponseModel: The response model containing the details of the new task.
 
     """
-    return manage_new_task(constants.TaskTypeEnum.BACKUP.value, data=body)
+    return await manage_new_task(
+        constants.TaskTypeEnum.BACKUP.value, session, data=body
+    )
 
 
 @router.post(
@@ -85,7 +193,9 @@ def backup_task(body: TableNameModel = Body(...)):
     summary=constants.CHALLENGE_1_RESTORE_ENDPOINT_SUMMARY,
     response_model=TaskResponseModel,
 )
-def restore_task(body: TableNameModel = Body(...)):
+async def restore_task(
+    body: TableNameModel = Body(...), session: AsyncSession = Depends(get_session)
+):
     """
     # Restore a task.
 
@@ -95,4 +205,6 @@ def restore_task(body: TableNameModel = Body(...)):
     ## Returns:
         TaskResponseModel: The response model containing the restored task.
     """
-    return manage_new_task(constants.TaskTypeEnum.RESTORE.value, data=body)
+    return await manage_new_task(
+        constants.TaskTypeEnum.RESTORE.value, session, data=body
+    )
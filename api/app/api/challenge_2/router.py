@@ -1,8 +1,10 @@
-from fastapi import status, APIRouter, HTTPException, Path
+from fastapi import Depends, status, APIRouter, HTTPException, Path
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from app.core import constants
 from app.api.utils import manage_new_task
+from app.database.connection import get_session
 from app.api.challenge_2.models import ReportTypeModel
 from app.api.models import ErrorModel, TaskResponseModel
 
@@ -18,7 +20,9 @@ router = APIRouter(
     summary=constants.CHALLENGE_2_REPORT_ENDPOINT_SUMMARY,
     response_model=TaskResponseModel,
 )
-def get_report(type: str = Path(...)):
+async def get_report(
+    type: str = Path(...), session: AsyncSession = Depends(get_session)
+):
     """
     # Get Report
 
@@ -48,4 +52,6 @@ def get_report(type: str = Path(...)):
             ).model_dump(),
         )
 
-    return manage_new_task(constants.TaskTypeEnum.REPORT.value, data=report_type)
+    return await manage_new_task(
+        constants.TaskTypeEnum.REPORT.value, session, data=report_type
+    )
@@ -1,9 +1,12 @@
 import json
-from fastapi import Path, status, APIRouter, HTTPException
+from fastapi import Depends, Path, status, APIRouter, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.core import constants
 from app.api.models import ErrorModel
-from app.database.connection import create_session
+from app.database.connection import get_pool_status, get_session
 from app.api.general.models import TaskResultModel
 from app.database.models import Task, TaskStatus, TaskType
 
@@ -14,21 +17,22 @@ router = APIRouter(prefix="", tags=[])
 
 
 @router.get("/health")
-def health():
+async def health():
     """
     # Health
 
     Endpoint for checking the health status of the API.
 
     ## Returns:
-        dict: A dictionary containing the health status of the database, Kafka, and the general status of the API.
+        dict: A dictionary containing the health status of the database (including its connection pool statistics), Kafka, and the general status of the API.
     """
-    database_health, database_message = check_database_health()
-    kafka_health, kafka_message = check_kafka_health()
+    database_health, database_message = await check_database_health()
+    kafka_health, kafka_message = await run_in_threadpool(check_kafka_health)
     return {
         "database": {
             "status": "ok" if database_health else "error",
             "message": database_message,
+            "pool": get_pool_status(),
         },
         "kafka": {
             "status": "ok" if kafka_health else "error",
@@ -44,7 +48,9 @@ def health():
     summary=constants.GENERAL_TASKS_ENDPOINT_SUMMARY,
     response_model=TaskResultModel,
 )
-def get_task(task_id: int = Path(...)):
+async def get_task(
+    task_id: int = Path(...), session: AsyncSession = Depends(get_session)
+):
     """
     # Get Task Information
 
@@ -57,23 +63,22 @@ def get_task(task_id: int = Path(...)):
         dict: The task information.
     """
     try:
-        _, session = create_session()
-
         task = (
-            session.query(
-                Task.id.label("id"),
-                Task.name.label("name"),
-                Task.config.label("config"),
-                Task.start_at.label("start_at"),
-                Task.end_at.label("end_at"),
-                TaskType.name.label("type"),
-                TaskStatus.name.label("status"),
+            await session.execute(
+                select(
+                    Task.id.label("id"),
+                    Task.name.label("name"),
+                    Task.config.label("config"),
+                    Task.start_at.label("start_at"),
+                    Task.end_at.label("end_at"),
+                    TaskType.name.label("type"),
+                    TaskStatus.name.label("status"),
+                )
+                .join(TaskType, Task.type_id == TaskType.id)
+                .join(TaskStatus, Task.status_id == TaskStatus.id)
+                .filter(Task.id == task_id)
             )
-            .join(TaskType, Task.type_id == TaskType.id)
-            .join(TaskStatus, Task.status_id == TaskStatus.id)
-            .filter(Task.id == task_id)
-            .first()
-        )
+        ).first()
 
         if not task:
             raise HTTPException(
@@ -96,8 +101,6 @@ def get_task(task_id: int = Path(...)):
             "status": task.status,
         }
 
-        session.close()
-
         task_info["start_at"] = (
             task_info["start_at"].strftime("%Y-%m-%d %H:%M:%S")
             if task_info["start_at"]
@@ -2,9 +2,14 @@ from typing import Any, Dict, Optional
 
 from pydantic import Field, BaseModel
 
+from app.storage.models import ObjectReferenceModel
 from app.api.challenge_2.models import ReportTypeModel
-from app.core.constants import NEW_TASK_SUCCESS_MESSAGE, TASK_TYPE
-from app.api.challenge_1.models import UploadDataModel, TableNameModel
+from app.core.constants import NEW_TASK_SUCCESS_MESSAGE, TASK_TYPE, TaskPriorityEnum
+from app.api.challenge_1.models import (
+    FileUploadModel,
+    TableNameModel,
+    UploadDataModel,
+)
 
 
 class ErrorModel(BaseModel):
@@ -35,6 +40,21 @@ class ErrorModel(BaseModel):
         }
 
 
+class ClaimCheckModel(BaseModel):
+    """
+    Pointer to a task payload offloaded to the object store.
+
+    Attributes:
+        object (ObjectReferenceModel): The reference to the stored payload.
+        sha256 (str): The hex SHA-256 digest of the stored payload.
+        size (int): The size of the stored payload in bytes.
+    """
+
+    object: ObjectReferenceModel = Field(...)
+    sha256: str = Field(...)
+    size: int = Field(...)
+
+
 class KafkaTaskMessageModel(BaseModel):
     """
     Model representing a Kafka task message.
@@ -42,12 +62,18 @@ class KafkaTaskMessageModel(BaseModel):
     Attributes:
         task_id (int): The ID of the task.
         task (TASK_TYPE): The type of the task.
-        data (Optional[UploadDataModel]): Optional data associated with the task.
+        priority (int): The scheduling priority of the task in the worker, from 0 to 9 (higher runs first).
+        data (Optional[UploadDataModel | FileUploadModel | TableNameModel | ReportTypeModel]): Optional data associated with the task.
+        claim_check (Optional[ClaimCheckModel]): Pointer to the data when it is too large to be sent inline.
     """
 
     task_id: int = Field(...)
     task: TASK_TYPE = Field(...)
-    data: Optional[UploadDataModel | TableNameModel | ReportTypeModel] = Field(None)
+    priority: int = Field(TaskPriorityEnum.NORMAL.value, ge=0, le=9)
+    data: Optional[
+        UploadDataModel | FileUploadModel | TableNameModel | ReportTypeModel
+    ] = Field(None)
+    claim_check: Optional[ClaimCheckModel] = Field(None)
 
 
 class TaskResponseModel(BaseModel):
@@ -1,38 +1,121 @@
+import csv
+import asyncio
+import hashlib
 from uuid import uuid4
+from pathlib import Path
 from typing import Optional
 
-from fastapi import status, HTTPException
+from fastapi import status, HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.models import ErrorModel
 from app.core.settings import APISettings
 from app.kafka.producer import get_kafka_producer
-from app.database.connection import create_session
+from app.kafka.serialization import encode_message
+from app.storage.object_store import get_object_store
 from app.core.constants import (
-    DATABASE_CONNECTION_ERROR,
     NEW_TASK_SUCCESS_MESSAGE,
+    PARQUET_MAGIC_BYTES,
+    STORAGE_CLAIM_CHECKS_PATH,
+    STORAGE_UPLOADS_PATH,
     TASK_TYPE,
+    FileFormatEnum,
+    TaskPriorityEnum,
     TaskStatusEnum,
+    TaskTypeEnum,
     ResponseErrorMessage,
     ResponseErrorTypeEnum,
 )
-from app.database.models import (
-    Task,
-    TaskType,
-    TaskStatus,
+from app.database.models import Task
+from app.database.lookups import task_status_cache, task_type_cache
+from app.api.challenge_1.models import (
+    TABLE_MODELS,
+    FileUploadModel,
+    UploadDataModel,
 )
-from app.api.challenge_1.models import UploadDataModel
 from app.api.models import (
+    ClaimCheckModel,
     KafkaTaskMessageModel,
     TaskResponseModel,
 )
 
 
-def create_task(task_type: TASK_TYPE):
+def get_file_format(filename: Optional[str]):
+    """
+    Get the file format from the extension of the uploaded file name.
+
+    Args:
+        filename (Optional[str]): The name of the uploaded file.
+
+    Returns:
+        Optional[str]: `csv` or `parquet`, or None if the extension is not supported.
+    """
+    extension = Path(filename or "").suffix.lstrip(".").lower()
+    formats = [file_format.value for file_format in FileFormatEnum]
+    return extension if extension in formats else None
+
+
+def validate_file_header(head: bytes, file_format: str, table_name: str):
+    """
+    Validate the beginning of an uploaded file before it is stored.
+
+    CSV files must start with a header row holding exactly the columns of the table.
+    Parquet files keep their schema in the footer, so only the magic bytes are
+    checked here and the schema is validated by the worker.
+
+    Args:
+        head (bytes): The first chunk of the file.
+        file_format (str): The format of the file (`csv` or `parquet`).
+        table_name (str): The name of the table the file is loaded into.
+
+    Returns:
+        tuple: A boolean indicating whether the header is valid and the error details (if any).
+    """
+    if file_format == FileFormatEnum.PARQUET:
+        if head[: len(PARQUET_MAGIC_BYTES)] != PARQUET_MAGIC_BYTES:
+            return False, ResponseErrorMessage.INVALID_FILE_FORMAT.value
+        return True, None
+
+    expected = list(TABLE_MODELS[table_name].model_fields)
+    first_line = head.split(b"\n", 1)[0].decode("utf-8-sig", errors="replace")
+    columns = [column.strip() for column in next(csv.reader([first_line]), [])]
+
+    if sorted(columns) != sorted(expected):
+        return False, {"expected": expected, "received": columns}
+
+    return True, None
+
+
+async def store_upload(file: UploadFile, table_name: str, file_format: str):
+    """
+    Stream an uploaded file into the object store.
+
+    Args:
+        file (UploadFile): The uploaded file.
+        table_name (str): The name of the table the file is loaded into.
+        file_format (str): The format of the file (`csv` or `parquet`).
+
+    Returns:
+        ObjectReferenceModel: The reference to the stored file.
+    """
+    store = get_object_store()
+    key = f"{STORAGE_UPLOADS_PATH}/{table_name}/{uuid4()}.{file_format}"
+
+    await file.seek(0)
+    await run_in_threadpool(store.put_fileobj, file.file, key)
+
+    return store.reference(key)
+
+
+async def create_task(task_type: TASK_TYPE, session: AsyncSession):
     """
     Create a new task with the given task type.
 
     Args:
         task_type (TASK_TYPE): The type of the task.
+        session (AsyncSession): The database session of the request.
 
     Returns:
         tuple: A tuple containing the task information and an error message (if any).
@@ -48,36 +131,97 @@ def create_task(task_type: TASK_TYPE):
 
     """
     try:
-        engine, session = create_session()
-
-        if not engine or not session:
-            return None, DATABASE_CONNECTION_ERROR
-
-        pending_id = (
-            session.query(TaskStatus).filter_by(name=TaskStatusEnum.PENDING).first().id
-        )
-        upload_id = session.query(TaskType).filter_by(name=task_type).first().id
-
-        task = Task(
-            name=f"{task_type}-{uuid4()}", type_id=upload_id, status_id=pending_id
+        pending_id = await task_status_cache.get_id(
+            TaskStatusEnum.PENDING.value, session
         )
-
-        session.add(task)
-        session.commit()
+        type_id = await task_type_cache.get_id(task_type, session)
+        name = f"{task_type}-{uuid4()}"
+
+        task_id = (
+            await session.execute(
+                insert(Task)
+                .values(name=name, type_id=type_id, status_id=pending_id)
+                .returning(Task.id)
+            )
+        ).scalar_one()
+        await session.commit()
 
         task_info = {
-            "id": task.id,
-            "name": task.name,
+            "id": task_id,
+            "name": name,
         }
 
-        session.close()
-
         return task_info, None
     except Exception as e:
+        await session.rollback()
         return None, str(e)
 
 
-def send_message(
+async def store_claim_check(task_id: int, data: UploadDataModel):
+    """
+    Offload the data of a task message to the object store.
+
+    Args:
+        task_id (int): The ID of the task.
+        data (UploadDataModel): The data of the task.
+
+    Returns:
+        ClaimCheckModel: The pointer and checksum the worker uses to read the data back.
+    """
+    payload = data.model_dump_json().encode("utf-8")
+    store = get_object_store()
+    key = f"{STORAGE_CLAIM_CHECKS_PATH}/{task_id}.json"
+
+    await run_in_threadpool(store.put_bytes, payload, key)
+
+    return ClaimCheckModel(
+        object=store.reference(key),
+        sha256=hashlib.sha256(payload).hexdigest(),
+        size=len(payload),
+    )
+
+
+def get_task_priority(task: TASK_TYPE, data=None) -> int:
+    """
+    Get the scheduling priority of a task in the worker.
+
+    Interactive requests (JSON uploads and reports) run ahead of bulk work
+    (file uploads, backups and restores) queued in the same worker.
+
+    Args:
+        task (TASK_TYPE): The type of the task.
+        data (Any, optional): The data of the task. Defaults to None.
+
+    Returns:
+        int: The priority of the task.
+    """
+    if isinstance(data, UploadDataModel) or task == TaskTypeEnum.REPORT:
+        return TaskPriorityEnum.HIGH.value
+
+    if isinstance(data, FileUploadModel):
+        return TaskPriorityEnum.LOW.value
+
+    return TaskPriorityEnum.NORMAL.value
+
+
+def get_message_key(task_id: int) -> str:
+    """
+    Get the Kafka key of a task message.
+
+    Tasks are keyed by their ID, so they spread evenly across the partitions
+    of their topic and every worker replica shares the load, whatever table
+    they touch.
+
+    Args:
+        task_id (int): The ID of the task.
+
+    Returns:
+        str: The message key.
+    """
+    return f"task-{task_id}"
+
+
+async def send_message(
     task_id: int,
     task: TASK_TYPE,
     data: Optional[UploadDataModel] = None,
@@ -85,6 +229,11 @@ def send_message(
     """
     Sends a message to Kafka.
 
+    Messages are sent to the topic of their task type, keyed by
+    `get_message_key` and encoded in the `KAFKA["MESSAGE_FORMAT"]` wire format.
+    Messages larger than `KAFKA["CLAIM_CHECK_THRESHOLD"]` bytes are sent with
+    their data offloaded to the object store and replaced by a claim check.
+
     Args:
         task_id (int): The ID of the task.
         task (TASK_TYPE): The type of the task.
@@ -95,29 +244,50 @@ def send_message(
         and an optional error message if an exception occurred.
     """
     try:
-        message = KafkaTaskMessageModel(task_id=task_id, task=task, data=data)
-
-        producer = get_kafka_producer()
-        producer.init_transactions()
-        producer.begin_transaction()
-
-        producer.produce(APISettings.KAFKA["TOPIC"], value=message.model_dump_json())
+        message_format = APISettings.KAFKA["MESSAGE_FORMAT"]
+        priority = get_task_priority(task, data)
+        value, headers = encode_message(
+            KafkaTaskMessageModel(
+                task_id=task_id, task=task, priority=priority, data=data
+            ),
+            message_format,
+        )
 
-        producer.commit_transaction()
+        if data is not None and len(value) > APISettings.KAFKA["CLAIM_CHECK_THRESHOLD"]:
+            claim_check = await store_claim_check(task_id, data)
+            value, headers = encode_message(
+                KafkaTaskMessageModel(
+                    task_id=task_id,
+                    task=task,
+                    priority=priority,
+                    claim_check=claim_check,
+                ),
+                message_format,
+            )
 
-        del producer
+        producer = get_kafka_producer()
+        await asyncio.wait_for(
+            producer.produce_async(
+                APISettings.KAFKA["TASK_TOPICS"][TaskTypeEnum(task).value],
+                value=value,
+                key=get_message_key(task_id),
+                headers=headers,
+            ),
+            timeout=APISettings.KAFKA["DELIVERY_TIMEOUT"],
+        )
 
         return True, None
     except Exception as e:
         return False, str(e)
 
 
-def manage_new_task(task_type: TASK_TYPE, data=None):
+async def manage_new_task(task_type: TASK_TYPE, session: AsyncSession, data=None):
     """
     Manages a new task by creating a task of the specified type and sending a message.
 
     Args:
         task_type (TASK_TYPE): The type of the task.
+        session (AsyncSession): The database session of the request.
         data (Any, optional): Additional data for the task. Defaults to None.
 
     Returns:
@@ -127,12 +297,12 @@ def manage_new_task(task_type: TASK_TYPE, data=None):
         HTTPException: If an error occurs during task creation or message sending.
     """
     try:
-        task, error = create_task(task_type)
+        task, error = await create_task(task_type, session)
 
         if not task:
             raise Exception(error)
 
-        sended, error = send_message(task["id"], task_type, data=data)
+        sended, error = await send_message(task["id"], task_type, data=data)
 
         if not sended:
             raise Exception(error)
@@ -1,6 +1,6 @@
 import os
 from enum import Enum
-from typing import Callable, Literal
+from typing import Callable, Dict, Literal
 
 
 # Constants
@@ -16,13 +16,43 @@ DB_PORT: str = os.getenv("DB_PORT", "5432")
 DB_USER: str = os.getenv("DB_USER", "postgres")
 DB_PASS: str = os.getenv("DB_PASSWORD", "postgres")
 DB_NAME: str = os.getenv("DB_NAME", "mydb")
+DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+LOOKUP_CACHE_TTL: int = int(os.getenv("LOOKUP_CACHE_TTL", 3600))
 
 KAFKA_HOST: str = os.getenv("KAFKA_HOST", "kafka")
 KAFKA_PORT: str = os.getenv("KAFKA_PORT", "29092")
 KAFKA_TOPIC: str = os.getenv("KAFKA_TOPIC", "globant-challenge")
+KAFKA_LINGER_MS: int = int(os.getenv("KAFKA_LINGER_MS", 5))
+KAFKA_BATCH_SIZE: int = int(os.getenv("KAFKA_BATCH_SIZE", 131072))
+KAFKA_COMPRESSION_TYPE: str = os.getenv("KAFKA_COMPRESSION_TYPE", "lz4")
+KAFKA_DELIVERY_TIMEOUT: float = float(os.getenv("KAFKA_DELIVERY_TIMEOUT", 30))
+KAFKA_TRANSACTIONAL: bool = os.getenv("KAFKA_TRANSACTIONAL", "false").lower() == "true"
+KAFKA_TRANSACTIONAL_ID_PREFIX: str = os.getenv(
+    "KAFKA_TRANSACTIONAL_ID_PREFIX", "globant-challenge-api"
+)
+KAFKA_CLAIM_CHECK_THRESHOLD: int = int(
+    os.getenv("KAFKA_CLAIM_CHECK_THRESHOLD", 256 * 1024)
+)
+KAFKA_MESSAGE_FORMAT: str = os.getenv("KAFKA_MESSAGE_FORMAT", "json")
+KAFKA_SCHEMA_VERSION: int = 7
+KAFKA_CONTENT_TYPE_HEADER: str = "content-type"
+KAFKA_SCHEMA_VERSION_HEADER: str = "schema-version"
+
+STORAGE_BACKEND: str = os.getenv("OBJECT_STORE_BACKEND", "local")
+STORAGE_ROOT: str = os.getenv("OBJECT_STORE_ROOT", "/data/object-store")
+STORAGE_BUCKET: str = os.getenv("S3_BUCKET_NAME", "sgg-globant-challenge")
+STORAGE_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL", "")
+STORAGE_CHUNK_SIZE: int = int(os.getenv("OBJECT_STORE_CHUNK_SIZE", 1024 * 1024))
+STORAGE_UPLOADS_PATH: str = "uploads"
+STORAGE_CLAIM_CHECKS_PATH: str = "claim-checks"
 
 DATABASE_CHECK_HEALTH_QUERY: str = "SELECT 1"
-KAFKA_CHECK_HEALTH_SUCCESS: str = f"Topic '{KAFKA_TOPIC}' exists."
+KAFKA_CHECK_HEALTH_SUCCESS: str = "Task topics exist."
 
 GENERAL_TASKS_ENDPOINT: str = "/task/{task_id}"
 GENERAL_TASKS_ENDPOINT_SUMMARY: str = "Get Task Information"
@@ -34,6 +64,11 @@ CHALLENGE_1_UPLOAD_ENDPOINT_SUMMARY: str = (
     "Upload data for departments, jobs, or employees"
 )
 
+CHALLENGE_1_UPLOAD_FILE_ENDPOINT: str = "/upload-file"
+CHALLENGE_1_UPLOAD_FILE_ENDPOINT_SUMMARY: str = (
+    "Upload a CSV or Parquet file of departments, jobs, or employees"
+)
+
 CHALLENGE_1_BACKUP_ENDPOINT: str = "/backup"
 CHALLENGE_1_BACKUP_ENDPOINT_SUMMARY: str = (
     "Backup data for departments, jobs, or employees"
@@ -67,6 +102,20 @@ TASK_TYPE = Literal[
     TaskTypeEnum.LOAD, TaskTypeEnum.BACKUP, TaskTypeEnum.RESTORE, TaskTypeEnum.REPORT
 ]
 
+# Each task type has its own topic, e.g. `globant-challenge-report`
+KAFKA_TASK_TOPICS: Dict[str, str] = {
+    task_type.value: os.getenv(
+        f"KAFKA_TOPIC_{task_type.value}", f"{KAFKA_TOPIC}-{task_type.value.lower()}"
+    )
+    for task_type in TaskTypeEnum
+}
+
+
+class TaskPriorityEnum(int, Enum):
+    LOW = 2
+    NORMAL = 5
+    HIGH = 8
+
 
 class TaskStatusEnum(str, Enum):
     PENDING = "PENDING"
@@ -92,12 +141,64 @@ class TableEnum(str, Enum):
 TableType = Literal[TableEnum.DEPARTMENT, TableEnum.JOB, TableEnum.EMPLOYEE]
 
 
+class FileFormatEnum(str, Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+FileFormatType = Literal[FileFormatEnum.CSV, FileFormatEnum.PARQUET]
+
+PARQUET_MAGIC_BYTES: bytes = b"PAR1"
+
+
+class ObjectStorageEnum(str, Enum):
+    LOCAL = "local"
+    S3 = "s3"
+
+
+ObjectStorageType = Literal[ObjectStorageEnum.LOCAL, ObjectStorageEnum.S3]
+
+
+class MessageFormatEnum(str, Enum):
+    JSON = "json"
+    AVRO = "avro"
+
+
+class ConflictActionEnum(str, Enum):
+    NOTHING = "nothing"
+    UPDATE = "update"
+
+
+ConflictActionType = Literal[ConflictActionEnum.NOTHING, ConflictActionEnum.UPDATE]
+
+
+class RestoreModeEnum(str, Enum):
+    APPEND = "append"
+    MERGE = "merge"
+    REPLACE = "replace"
+
+
+RestoreModeType = Literal[
+    RestoreModeEnum.APPEND, RestoreModeEnum.MERGE, RestoreModeEnum.REPLACE
+]
+
+
+class BackupTypeEnum(str, Enum):
+    FULL = "full"
+    INCREMENTAL = "incremental"
+
+
+BackupTypeType = Literal[BackupTypeEnum.FULL, BackupTypeEnum.INCREMENTAL]
+
+
 class ResponseErrorTypeEnum(str, Enum):
     HTTP_500: str = "INTERNAL_SERVER_ERROR"
     NO_DATA_PROVIDED: str = "NO_DATA_PROVIDED"
     DATA_SIZE_LIMIT_EXCEEDED: str = "DATA_SIZE_LIMIT_EXCEEDED"
     REPORT_NOT_FOUND: str = "REPORT_NOT_FOUND"
     TASK_NOT_FOUND: str = "TASK_NOT_FOUND"
+    INVALID_FILE_FORMAT: str = "INVALID_FILE_FORMAT"
+    INVALID_FILE_HEADER: str = "INVALID_FILE_HEADER"
 
 
 class ResponseErrorMessage(str, Enum):
@@ -106,13 +207,16 @@ class ResponseErrorMessage(str, Enum):
     DATA_SIZE_LIMIT_EXCEEDED: str = "The data size limit is 1000 records per request"
     REPORT_NOT_FOUND: str = "The specified report does not exist"
     TASK_NOT_FOUND: str = "The specified task does not exist"
+    INVALID_FILE_FORMAT: str = "The file must be a CSV or Parquet file"
+    INVALID_FILE_HEADER: str = "The file header does not match the table columns"
 
 
 # Error messages
 KAFKA_CHECK_HEALTH_ERROR: str = "Error checking Kafka health"
-KAFKA_CHECK_HEALTH_NO_EXISTS_TOPIC_ERROR: str = (
-    f"{KAFKA_CHECK_HEALTH_ERROR}: Topic '{KAFKA_TOPIC}' does not exist."
+KAFKA_CHECK_HEALTH_NO_EXISTS_TOPIC_ERROR: Callable[[list], str] = (
+    lambda topics: f"{KAFKA_CHECK_HEALTH_ERROR}: Topics {topics} do not exist."
 )
 
 DATABASE_CHECK_HEALTH_ERROR: str = "Error checking database health"
 DATABASE_CONNECTION_ERROR: str = "Error connecting to database"
+LOOKUP_CACHE_WARM_ERROR: str = "Error warming task type and status lookup caches"
@@ -14,8 +14,10 @@ class APISettings:
         VERSION (str): The version of the API.
         ORIGINS (List[str]): The allowed origins for the API.
         ENVIRONMENT: The environment of the API.
-        DATABASE (Dict[str, str | int]): The database settings for the API.
-        KAFKA (Dict[str, str | int]): The Kafka settings for the API.
+        DATABASE (Dict[str, str | int | bool]): The database and connection pool settings for the API.
+        LOOKUP_CACHE_TTL (int): Seconds before the task type and status lookup caches are reloaded.
+        KAFKA (Dict[str, str | int | float | bool | Dict[str, str]]): The Kafka, topic and producer settings for the API.
+        STORAGE (Dict[str, str | int]): The object store settings for the API.
     """
 
     PREFIX: str = constants.API_PREFIX
@@ -27,17 +29,41 @@ class APISettings:
     ENVIRONMENT = constants.API_ENVIRONMENT
 
     # Database settings
-    DATABASE: Dict[str, str | int] = {
+    DATABASE: Dict[str, str | int | bool] = {
         "HOST": constants.DB_HOST,
         "PORT": constants.DB_PORT,
         "USER": constants.DB_USER,
         "PASSWORD": constants.DB_PASS,
         "NAME": constants.DB_NAME,
+        "POOL_SIZE": constants.DB_POOL_SIZE,
+        "MAX_OVERFLOW": constants.DB_MAX_OVERFLOW,
+        "POOL_TIMEOUT": constants.DB_POOL_TIMEOUT,
+        "POOL_RECYCLE": constants.DB_POOL_RECYCLE,
+        "POOL_PRE_PING": constants.DB_POOL_PRE_PING,
     }
 
+    LOOKUP_CACHE_TTL: int = constants.LOOKUP_CACHE_TTL
+
     # Kafka settings
-    KAFKA: Dict[str, str | int] = {
+    KAFKA: Dict[str, str | int | float | bool | Dict[str, str]] = {
         "HOST": constants.KAFKA_HOST,
         "PORT": constants.KAFKA_PORT,
-        "TOPIC": constants.KAFKA_TOPIC,
+        "TASK_TOPICS": constants.KAFKA_TASK_TOPICS,
+        "LINGER_MS": constants.KAFKA_LINGER_MS,
+        "BATCH_SIZE": constants.KAFKA_BATCH_SIZE,
+        "COMPRESSION_TYPE": constants.KAFKA_COMPRESSION_TYPE,
+        "DELIVERY_TIMEOUT": constants.KAFKA_DELIVERY_TIMEOUT,
+        "TRANSACTIONAL": constants.KAFKA_TRANSACTIONAL,
+        "TRANSACTIONAL_ID_PREFIX": constants.KAFKA_TRANSACTIONAL_ID_PREFIX,
+        "CLAIM_CHECK_THRESHOLD": constants.KAFKA_CLAIM_CHECK_THRESHOLD,
+        "MESSAGE_FORMAT": constants.KAFKA_MESSAGE_FORMAT,
+    }
+
+    # Object store settings
+    STORAGE: Dict[str, str | int] = {
+        "BACKEND": constants.STORAGE_BACKEND,
+        "ROOT": constants.STORAGE_ROOT,
+        "BUCKET": constants.STORAGE_BUCKET,
+        "ENDPOINT_URL": constants.STORAGE_ENDPOINT_URL,
+        "CHUNK_SIZE": constants.STORAGE_CHUNK_SIZE,
     }
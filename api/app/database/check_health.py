@@ -1,10 +1,10 @@
 from sqlalchemy import text
 
-from app.database.connection import create_session
+from app.database.connection import get_engine
 from app.core.constants import DATABASE_CHECK_HEALTH_ERROR, DATABASE_CHECK_HEALTH_QUERY
 
 
-def check_database_health():
+async def check_database_health():
     """
     Checks the health of the database.
 
@@ -13,12 +13,11 @@ def check_database_health():
     """
 
     try:
-        engine, session = create_session()
+        engine = get_engine()
 
-        with engine.connect() as connection:
-            _ = connection.execute(text(DATABASE_CHECK_HEALTH_QUERY))
+        async with engine.connect() as connection:
+            _ = await connection.execute(text(DATABASE_CHECK_HEALTH_QUERY))
 
-        session.close()
         return True, ""
     except Exception as e:
         message = f"{DATABASE_CHECK_HEALTH_ERROR}: {e}"
@@ -1,28 +1,125 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import os
+from contextlib import asynccontextmanager
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.core.settings import APISettings
-from app.core.constants import DATABASE_CONNECTION_ERROR
 
 
-def create_session():
+_engine = None
+_engine_pid = None
+_Session = async_sessionmaker(expire_on_commit=False)
+
+
+def init_engine():
     """
-    Create a connection to the database and return the engine and session objects.
+    Create the async engine shared by every request of the current API process.
+
+    Called from the application lifespan. An engine inherited through `fork`
+    is discarded without closing the parent's connections.
 
     Returns:
-        - engine: sqlalchemy.engine.base.Connection
-        - session: sqlalchemy.orm.session.Session
+        sqlalchemy.ext.asyncio.AsyncEngine: The engine of the current process.
     """
+    global _engine, _engine_pid
 
     DB_HOST = APISettings.DATABASE["HOST"]
+    DB_PORT = APISettings.DATABASE["PORT"]
     DB_NAME = APISettings.DATABASE["NAME"]
     DB_USER = APISettings.DATABASE["USER"]
     DB_PASS = APISettings.DATABASE["PASSWORD"]
 
-    try:
-        engine = create_engine(f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}")
-        Session = sessionmaker(bind=engine)
-        return engine, Session()
-    except Exception as e:
-        print(f"{DATABASE_CONNECTION_ERROR}: {e}")
-        return None, None
+    if _engine is not None and _engine_pid != os.getpid():
+        _engine.sync_engine.dispose(close=False)
+
+    _engine = create_async_engine(
+        f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+        pool_size=APISettings.DATABASE["POOL_SIZE"],
+        max_overflow=APISettings.DATABASE["MAX_OVERFLOW"],
+        pool_timeout=APISettings.DATABASE["POOL_TIMEOUT"],
+        pool_recycle=APISettings.DATABASE["POOL_RECYCLE"],
+        pool_pre_ping=APISettings.DATABASE["POOL_PRE_PING"],
+    )
+    _engine_pid = os.getpid()
+    _Session.configure(bind=_engine)
+    return _engine
+
+
+async def dispose_engine():
+    """
+    Close every pooled connection of the current process engine.
+    """
+    global _engine, _engine_pid
+
+    if _engine is not None and _engine_pid == os.getpid():
+        await _engine.dispose()
+
+    _engine = None
+    _engine_pid = None
+
+
+def get_engine():
+    """
+    Return the engine of the current process, creating it on first use or after a fork.
+
+    Returns:
+        sqlalchemy.ext.asyncio.AsyncEngine: The engine of the current process.
+    """
+    if _engine is None or _engine_pid != os.getpid():
+        return init_engine()
+    return _engine
+
+
+async def get_session():
+    """
+    FastAPI dependency that yields an async session scoped to the request.
+
+    The session is rolled back if the request fails and always closed,
+    returning its connection to the pool.
+
+    Yields:
+        sqlalchemy.ext.asyncio.AsyncSession: The database session.
+    """
+    get_engine()
+    async with _Session() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+
+
+@asynccontextmanager
+async def session_scope():
+    """
+    Provide an async session outside of a request, e.g. during the application lifespan.
+
+    Yields:
+        sqlalchemy.ext.asyncio.AsyncSession: The database session.
+    """
+    get_engine()
+    async with _Session() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+
+
+def get_pool_status():
+    """
+    Return the connection pool statistics of the current process engine.
+
+    Returns:
+        dict: Pool size, checked-in and checked-out connections and overflow.
+    """
+    if _engine is None:
+        return {}
+
+    pool = _engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
@@ -0,0 +1,95 @@
+import time
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import APISettings
+from app.database.models import TaskStatus, TaskType
+
+
+class LookupCache:
+    """
+    In-memory cache of the `name -> id` mapping of a reference table.
+
+    Reference tables only change through Liquibase changelogs, so the mapping
+    is loaded once and refreshed when the TTL expires, when a name is missing
+    or when `invalidate` is called.
+
+    Args:
+        model: The SQLAlchemy model of the reference table (must have `id` and `name`).
+        ttl (int): Seconds before the cached mapping is reloaded. A value <= 0 never expires.
+    """
+
+    def __init__(self, model, ttl: int):
+        self.model = model
+        self.ttl = ttl
+        self._ids = {}
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def expired(self):
+        if self._loaded_at is None:
+            return True
+        return self.ttl > 0 and time.monotonic() - self._loaded_at > self.ttl
+
+    async def refresh(self, session: AsyncSession):
+        """
+        Reload the mapping from the database.
+
+        Args:
+            session (AsyncSession): The database session used to read the table.
+        """
+        async with self._lock:
+            rows = (await session.execute(select(self.model.name, self.model.id))).all()
+            self._ids = {name: id for name, id in rows}
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """
+        Force the mapping to be reloaded on next use.
+        """
+        self._loaded_at = None
+
+    async def get_id(self, name: str, session: AsyncSession):
+        """
+        Return the ID of the given name, reloading the mapping if needed.
+
+        Args:
+            name (str): The name to look up.
+            session (AsyncSession): The database session used if a reload is needed.
+
+        Returns:
+            int: The ID of the record.
+
+        Raises:
+            KeyError: If the name does not exist in the table.
+        """
+        if self.expired or name not in self._ids:
+            await self.refresh(session)
+
+        return self._ids[name]
+
+
+task_type_cache = LookupCache(TaskType, APISettings.LOOKUP_CACHE_TTL)
+task_status_cache = LookupCache(TaskStatus, APISettings.LOOKUP_CACHE_TTL)
+
+
+async def warm_lookup_caches(session: AsyncSession):
+    """
+    Load the task type and task status mappings.
+
+    Args:
+        session (AsyncSession): The database session used to read the tables.
+    """
+    await task_type_cache.refresh(session)
+    await task_status_cache.refresh(session)
+
+
+def invalidate_lookup_caches():
+    """
+    Force the task type and task status mappings to be reloaded on next use.
+    """
+    task_type_cache.invalidate()
+    task_status_cache.invalidate()
@@ -29,8 +29,8 @@ def check_kafka_health():
 
     Returns:
         tuple: A tuple containing a boolean value indicating the health status and a string message.
-            - If the Kafka topic exists in the cluster, the health status is True and the message is KAFKA_CHECK_HEALTH_SUCCESS.
-            - If the Kafka topic does not exist in the cluster, the health status is False and the message is KAFKA_CHECK_HEALTH_NO_EXISTS_TOPIC_ERROR.
+            - If every task topic exists in the cluster, the health status is True and the message is KAFKA_CHECK_HEALTH_SUCCESS.
+            - If a task topic does not exist in the cluster, the health status is False and the message is KAFKA_CHECK_HEALTH_NO_EXISTS_TOPIC_ERROR.
             - If an exception occurs during the health check, the health status is False and the message is KAFKA_CHECK_HEALTH_ERROR followed by the exception message.
     """
     try:
@@ -38,10 +38,15 @@ def check_kafka_health():
             f"{APISettings.KAFKA['HOST']}:{APISettings.KAFKA['PORT']}"
         )
         cluster_metadata = admin_client.list_topics(timeout=10)
-        if APISettings.KAFKA["TOPIC"] in cluster_metadata.topics:
+        missing_topics = [
+            topic
+            for topic in APISettings.KAFKA["TASK_TOPICS"].values()
+            if topic not in cluster_metadata.topics
+        ]
+        if not missing_topics:
             return True, KAFKA_CHECK_HEALTH_SUCCESS
         else:
-            return False, KAFKA_CHECK_HEALTH_NO_EXISTS_TOPIC_ERROR
+            return False, KAFKA_CHECK_HEALTH_NO_EXISTS_TOPIC_ERROR(missing_topics)
     except KafkaException as e:
         return False, f"{KAFKA_CHECK_HEALTH_ERROR}: {e}"
     finally:
@@ -1,23 +1,234 @@
-from uuid import uuid4
-from confluent_kafka import Producer
+import os
+import socket
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+from confluent_kafka import KafkaException, Producer
 
 from app.core.settings import APISettings
 
 
-def get_kafka_producer():
+class TaskProducer:
     """
-    Returns a Kafka producer with the following configuration:
+    Kafka producer shared by every request of the API process.
+
+    A background thread serves delivery reports, so `produce` returns a future
+    that resolves once the broker acknowledges the message. When transactions
+    are enabled the producer uses a stable transactional id for the process
+    and each message is sent in its own transaction.
+
+    Args:
+        config (dict): The librdkafka configuration of the producer.
+        transactional (bool): Whether messages are sent inside transactions.
+        poll_interval (float): Seconds the poll thread waits for delivery events.
+    """
+
+    def __init__(self, config: dict, transactional: bool = False, poll_interval=0.1):
+        self.config = config
+        self.transactional = transactional
+        self.poll_interval = poll_interval
+        self._producer = None
+        self._poll_thread = None
+        self._stopped = threading.Event()
+        self._transaction_lock = threading.Lock()
+
+    def start(self):
+        """
+        Create the underlying producer and start the poll thread.
+        """
+        self._producer = Producer(self.config)
+
+        if self.transactional:
+            self._producer.init_transactions()
+
+        self._stopped.clear()
+        self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._poll_thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop the poll thread and flush the pending messages.
+
+        Args:
+            timeout (float): Seconds to wait for pending deliveries.
+        """
+        self._stopped.set()
+
+        if self._poll_thread is not None:
+            self._poll_thread.join()
+            self._poll_thread = None
+
+        if self._producer is not None:
+            self._producer.flush(timeout)
+            self._producer = None
+
+    def _poll_loop(self):
+        # a failing delivery callback must not stop the thread, or no later
+        # delivery report would ever be served
+        while not self._stopped.is_set():
+            try:
+                self._producer.poll(self.poll_interval)
+            except Exception as e:
+                logging.error(e)
+
+    def produce(self, topic: str, value, key=None, headers=None) -> Future:
+        """
+        Produce a message and return a future for its delivery report.
+
+        Args:
+            topic (str): The destination topic.
+            value (str | bytes): The message value.
+            key (str | bytes, optional): The message key. Defaults to None.
+            headers (list, optional): The message headers as `(name, value)` pairs. Defaults to None.
+
+        Returns:
+            Future: Resolves with the delivered message or fails with a KafkaException.
+        """
+        future = Future()
+
+        def on_delivery(error, message):
+            # the waiting request may have timed out and cancelled the future
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(KafkaException(error))
+            else:
+                future.set_result(message)
+
+        if not self.transactional:
+            try:
+                self._producer.produce(
+                    topic,
+                    value=value,
+                    key=key,
+                    headers=headers,
+                    on_delivery=on_delivery,
+                )
+            except BufferError:
+                self._producer.poll(self.poll_interval)
+                self._producer.produce(
+                    topic,
+                    value=value,
+                    key=key,
+                    headers=headers,
+                    on_delivery=on_delivery,
+                )
+            return future
+
+        with self._transaction_lock:
+            self._producer.begin_transaction()
+            try:
+                self._producer.produce(
+                    topic,
+                    value=value,
+                    key=key,
+                    headers=headers,
+                    on_delivery=on_delivery,
+                )
+                self._producer.commit_transaction()
+            except Exception:
+                self._producer.abort_transaction()
+                raise
+
+        return future
+
+    async def produce_async(self, topic: str, value, key=None, headers=None):
+        """
+        Produce a message and wait for its delivery report without blocking the event loop.
+
+        Transactional sends block until the transaction commits, so they run in
+        a worker thread.
+
+        The delivery future is shielded, so a caller that stops waiting
+        (e.g. `asyncio.wait_for` timing out) does not cancel it.
+
+        Args:
+            topic (str): The destination topic.
+            value (str | bytes): The message value.
+            key (str | bytes, optional): The message key. Defaults to None.
+            headers (list, optional): The message headers as `(name, value)` pairs. Defaults to None.
+
+        Returns:
+            Message: The delivered message.
+        """
+        if self.transactional:
+            future = await asyncio.to_thread(self.produce, topic, value, key, headers)
+        else:
+            future = self.produce(topic, value, key, headers)
+
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+
+_producer = None
+_producer_pid = None
+
+
+def get_producer_config():
+    """
+    Returns the Kafka producer configuration:
         - bootstrap.servers: The host and port of the Kafka server.
         - enable.idempotence: Enables idempotent producer behavior.
-        - transactional.id: A unique identifier for the transactional producer.
+        - linger.ms, batch.size, compression.type: Batching of concurrent requests.
+        - transactional.id: A stable identifier per process, only when transactions are enabled.
+
+    Returns:
+        dict: The producer configuration.
+    """
+    config = {
+        "bootstrap.servers": f"{APISettings.KAFKA['HOST']}:{APISettings.KAFKA['PORT']}",
+        "enable.idempotence": True,
+        "linger.ms": APISettings.KAFKA["LINGER_MS"],
+        "batch.size": APISettings.KAFKA["BATCH_SIZE"],
+        "compression.type": APISettings.KAFKA["COMPRESSION_TYPE"],
+    }
+
+    if APISettings.KAFKA["TRANSACTIONAL"]:
+        config["transactional.id"] = (
+            f"{APISettings.KAFKA['TRANSACTIONAL_ID_PREFIX']}-{socket.gethostname()}-{os.getpid()}"
+        )
+
+    return config
+
+
+def init_producer():
+    """
+    Create and start the producer shared by the current API process.
 
     Returns:
-        Producer: A Kafka producer object.
-    """
-    return Producer(
-        {
-            "bootstrap.servers": f"{APISettings.KAFKA['HOST']}:{APISettings.KAFKA['PORT']}",
-            "enable.idempotence": True,
-            "transactional.id": str(uuid4()),
-        }
+        TaskProducer: The producer of the current process.
+    """
+    global _producer, _producer_pid
+
+    _producer = TaskProducer(
+        get_producer_config(), transactional=APISettings.KAFKA["TRANSACTIONAL"]
     )
+    _producer.start()
+    _producer_pid = os.getpid()
+    return _producer
+
+
+def close_producer():
+    """
+    Flush and stop the producer of the current process.
+    """
+    global _producer, _producer_pid
+
+    if _producer is not None and _producer_pid == os.getpid():
+        _producer.stop()
+
+    _producer = None
+    _producer_pid = None
+
+
+def get_kafka_producer():
+    """
+    Return the producer of the current process, starting it on first use or after a fork.
+
+    Returns:
+        TaskProducer: The producer of the current process.
+    """
+    if _producer is None or _producer_pid != os.getpid():
+        return init_producer()
+    return _producer
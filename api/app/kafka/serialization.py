@@ -0,0 +1,81 @@
+import io
+import json
+from pathlib import Path
+
+from fastavro import parse_schema, schemaless_writer
+
+from app.api.models import KafkaTaskMessageModel
+from app.api.challenge_2.models import ReportTypeModel
+from app.api.challenge_1.models import (
+    FileUploadModel,
+    TableNameModel,
+    UploadDataModel,
+)
+from app.core.constants import (
+    KAFKA_CONTENT_TYPE_HEADER,
+    KAFKA_SCHEMA_VERSION,
+    KAFKA_SCHEMA_VERSION_HEADER,
+    MessageFormatEnum,
+)
+
+
+SCHEMAS_PATH = Path(__file__).parent / "schemas"
+
+TASK_MESSAGE_SCHEMA = parse_schema(
+    json.loads(
+        (SCHEMAS_PATH / f"task_message.v{KAFKA_SCHEMA_VERSION}.avsc").read_text()
+    )
+)
+
+DATA_RECORD_NAMES = {
+    UploadDataModel: "globant_challenge.UploadData",
+    FileUploadModel: "globant_challenge.FileUpload",
+    TableNameModel: "globant_challenge.TableName",
+    ReportTypeModel: "globant_challenge.ReportType",
+}
+
+
+def encode_avro(message: KafkaTaskMessageModel) -> bytes:
+    """
+    Encode a task message with the Avro schema of the current schema version.
+
+    The union branch of `data` is given explicitly, so similar records
+    (e.g. a file upload and a table name) are never confused.
+
+    Args:
+        message (KafkaTaskMessageModel): The task message.
+
+    Returns:
+        bytes: The Avro encoded message, without the schema.
+    """
+    record = message.model_dump(mode="json")
+
+    if message.data is not None:
+        record["data"] = (DATA_RECORD_NAMES[type(message.data)], record["data"])
+
+    buffer = io.BytesIO()
+    schemaless_writer(buffer, TASK_MESSAGE_SCHEMA, record)
+    return buffer.getvalue()
+
+
+def encode_message(message: KafkaTaskMessageModel, message_format: str):
+    """
+    Encode a task message in the given wire format.
+
+    Args:
+        message (KafkaTaskMessageModel): The task message.
+        message_format (str): `json` or `avro`.
+
+    Returns:
+        tuple: The encoded message and the headers the worker uses to decode it.
+    """
+    if message_format == MessageFormatEnum.AVRO:
+        value = encode_avro(message)
+        headers = [
+            (KAFKA_CONTENT_TYPE_HEADER, MessageFormatEnum.AVRO.value),
+            (KAFKA_SCHEMA_VERSION_HEADER, str(KAFKA_SCHEMA_VERSION)),
+        ]
+        return value, headers
+
+    value = message.model_dump_json().encode("utf-8")
+    return value, [(KAFKA_CONTENT_TYPE_HEADER, MessageFormatEnum.JSON.value)]
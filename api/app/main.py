@@ -1,14 +1,40 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.settings import APISettings
+from app.kafka.producer import close_producer, init_producer
+from app.core.constants import LOOKUP_CACHE_WARM_ERROR
+from app.database.lookups import warm_lookup_caches
+from app.database.connection import dispose_engine, init_engine, session_scope
 
 from app.api.general.router import router as general_router
 from app.api.challenge_1.router import router as challenge_1_router
 from app.api.challenge_2.router import router as challenge_2_router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the process-wide resources on startup and release them on shutdown.
+    """
+    init_engine()
+    init_producer()
+
+    try:
+        async with session_scope() as session:
+            await warm_lookup_caches(session)
+    except Exception as e:
+        print(f"{LOOKUP_CACHE_WARM_ERROR}: {e}")
+
+    yield
+    close_producer()
+    await dispose_engine()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title=APISettings.API_NAME,
     version=APISettings.VERSION,
     redoc_url=f"{APISettings.PREFIX}/redoc",
@@ -0,0 +1,20 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.core.constants import ObjectStorageType
+
+
+class ObjectReferenceModel(BaseModel):
+    """
+    Represents a reference to an object in the object store.
+
+    Attributes:
+        storage (ObjectStorageType): The storage backend holding the object (`local` or `s3`).
+        bucket (Optional[str]): The bucket of the object, for S3.
+        key (str): The key of the object.
+    """
+
+    storage: ObjectStorageType = Field(...)
+    bucket: Optional[str] = Field(None)
+    key: str = Field(...)
@@ -0,0 +1,133 @@
+import shutil
+from pathlib import Path
+
+import boto3
+
+from app.core.settings import APISettings
+from app.core.constants import ObjectStorageEnum
+from app.storage.models import ObjectReferenceModel
+
+
+class LocalObjectStore:
+    """
+    Object store backed by a directory shared with the workers.
+
+    Stand-in for S3 in local deployments.
+
+    Args:
+        root (str): The directory where objects are stored.
+    """
+
+    storage = ObjectStorageEnum.LOCAL.value
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.bucket = None
+
+    def put_fileobj(self, fileobj, key: str):
+        """
+        Stream a file-like object into the store.
+
+        Args:
+            fileobj: The file-like object to read from.
+            key (str): The key of the object.
+        """
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as destination:
+            shutil.copyfileobj(fileobj, destination, APISettings.STORAGE["CHUNK_SIZE"])
+
+    def put_bytes(self, data: bytes, key: str):
+        """
+        Store a bytes payload.
+
+        Args:
+            data (bytes): The content of the object.
+            key (str): The key of the object.
+        """
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    def reference(self, key: str):
+        """
+        Build the reference a worker needs to read an object.
+
+        Args:
+            key (str): The key of the object.
+
+        Returns:
+            ObjectReferenceModel: The reference to the object.
+        """
+        return ObjectReferenceModel(storage=self.storage, bucket=self.bucket, key=key)
+
+
+class S3ObjectStore:
+    """
+    Object store backed by an S3 bucket. Large objects are sent as multipart uploads.
+
+    Args:
+        bucket (str): The name of the S3 bucket.
+        endpoint_url (str, optional): A custom S3 endpoint, e.g. a local S3 stand-in.
+    """
+
+    storage = ObjectStorageEnum.S3.value
+
+    def __init__(self, bucket: str, endpoint_url: str = None):
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def put_fileobj(self, fileobj, key: str):
+        """
+        Stream a file-like object into the bucket.
+
+        Args:
+            fileobj: The file-like object to read from.
+            key (str): The key of the object.
+        """
+        self.client.upload_fileobj(fileobj, self.bucket, key)
+
+    def put_bytes(self, data: bytes, key: str):
+        """
+        Store a bytes payload.
+
+        Args:
+            data (bytes): The content of the object.
+            key (str): The key of the object.
+        """
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def reference(self, key: str):
+        """
+        Build the reference a worker needs to read an object.
+
+        Args:
+            key (str): The key of the object.
+
+        Returns:
+            ObjectReferenceModel: The reference to the object.
+        """
+        return ObjectReferenceModel(storage=self.storage, bucket=self.bucket, key=key)
+
+
+_object_store = None
+
+
+def get_object_store():
+    """
+    Return the object store configured in `APISettings.STORAGE`.
+
+    Returns:
+        LocalObjectStore | S3ObjectStore: The object store.
+    """
+    global _object_store
+
+    if _object_store is None:
+        if APISettings.STORAGE["BACKEND"] == ObjectStorageEnum.S3:
+            _object_store = S3ObjectStore(
+                APISettings.STORAGE["BUCKET"], APISettings.STORAGE["ENDPOINT_URL"]
+            )
+        else:
+            _object_store = LocalObjectStore(APISettings.STORAGE["ROOT"])
+
+    return _object_store
@@ -0,0 +1,100 @@
+--liquibase formatted sql
+
+--changeset sebastian.granda:1 splitStatements:false
+--comment: Create the employee hiring summary used by the reports, maintained by triggers on employee
+
+-- CREATE TABLE employee_hiring_summary
+CREATE TABLE IF NOT EXISTS employee_hiring_summary (
+    year                INT NOT NULL,
+    quarter             INT NOT NULL,
+    department_id       INT NOT NULL,
+    job_id              INT NOT NULL,
+    hire_count          INT NOT NULL,
+    updated_at          TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT          employee_hiring_summary_pk PRIMARY KEY (year, department_id, job_id, quarter)
+);
+COMMENT ON TABLE employee_hiring_summary IS 'Number of employees hired per department, job and quarter, kept up to date by the triggers on employee';
+COMMENT ON COLUMN employee_hiring_summary.year IS 'Year of hiring';
+COMMENT ON COLUMN employee_hiring_summary.quarter IS 'Quarter of hiring, from 1 to 4';
+COMMENT ON COLUMN employee_hiring_summary.department_id IS 'ID of the department the employees belong to';
+COMMENT ON COLUMN employee_hiring_summary.job_id IS 'ID of the job role of the employees';
+COMMENT ON COLUMN employee_hiring_summary.hire_count IS 'Number of employees hired';
+COMMENT ON COLUMN employee_hiring_summary.updated_at IS 'Timestamp when the record was last updated';
+
+-- apply the rows changed by a statement on employee to the summary
+CREATE OR REPLACE FUNCTION apply_employee_hiring_summary() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM employee_hiring_summary;
+        RETURN NULL;
+    END IF;
+
+    CREATE TEMP TABLE IF NOT EXISTS employee_hiring_delta (
+        year            INT,
+        quarter         INT,
+        department_id   INT,
+        job_id          INT,
+        delta           INT
+    ) ON COMMIT DROP;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO employee_hiring_delta
+        SELECT date_part('year', datetime), date_part('quarter', datetime), department_id, job_id, 1
+        FROM new_rows;
+    END IF;
+
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO employee_hiring_delta
+        SELECT date_part('year', datetime), date_part('quarter', datetime), department_id, job_id, -1
+        FROM old_rows;
+    END IF;
+
+    -- rows are locked in key order, so concurrent loads cannot deadlock on the summary
+    INSERT INTO employee_hiring_summary AS summary (year, quarter, department_id, job_id, hire_count)
+    SELECT year, quarter, department_id, job_id, sum(delta)
+    FROM employee_hiring_delta
+    GROUP BY year, department_id, job_id, quarter
+    HAVING sum(delta) <> 0
+    ORDER BY year, department_id, job_id, quarter
+    ON CONFLICT (year, department_id, job_id, quarter) DO UPDATE
+    SET hire_count = summary.hire_count + EXCLUDED.hire_count,
+        updated_at = CURRENT_TIMESTAMP;
+
+    DELETE FROM employee_hiring_summary summary
+    USING employee_hiring_delta delta
+    WHERE summary.year = delta.year
+        AND summary.quarter = delta.quarter
+        AND summary.department_id = delta.department_id
+        AND summary.job_id = delta.job_id
+        AND summary.hire_count = 0;
+
+    TRUNCATE employee_hiring_delta;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- statement-level triggers see every row of a bulk load at once through their transition tables
+CREATE TRIGGER employee_hiring_summary_insert
+    AFTER INSERT ON employee
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_employee_hiring_summary();
+
+CREATE TRIGGER employee_hiring_summary_update
+    AFTER UPDATE ON employee
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_employee_hiring_summary();
+
+CREATE TRIGGER employee_hiring_summary_delete
+    AFTER DELETE ON employee
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_employee_hiring_summary();
+
+CREATE TRIGGER employee_hiring_summary_truncate
+    AFTER TRUNCATE ON employee
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_employee_hiring_summary();
+
+-- summarize the employees loaded before the triggers existed
+INSERT INTO employee_hiring_summary (year, quarter, department_id, job_id, hire_count)
+SELECT date_part('year', datetime), date_part('quarter', datetime), department_id, job_id, count(*)
+FROM employee
+GROUP BY 1, 2, 3, 4;
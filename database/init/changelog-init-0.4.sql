@@ -0,0 +1,8 @@
+--liquibase formatted sql
+
+--changeset sebastian.granda:1
+--comment: Index updated_at, the watermark of incremental backups
+
+CREATE INDEX IF NOT EXISTS department_updated_at_idx ON department (updated_at);
+CREATE INDEX IF NOT EXISTS job_updated_at_idx ON job (updated_at);
+CREATE INDEX IF NOT EXISTS employee_updated_at_idx ON employee (updated_at);
@@ -0,0 +1,11 @@
+--liquibase formatted sql
+
+--changeset rollback:0
+--comment: Drop the employee hiring summary and the triggers that maintain it
+
+DROP TRIGGER IF EXISTS employee_hiring_summary_insert ON employee;
+DROP TRIGGER IF EXISTS employee_hiring_summary_update ON employee;
+DROP TRIGGER IF EXISTS employee_hiring_summary_delete ON employee;
+DROP TRIGGER IF EXISTS employee_hiring_summary_truncate ON employee;
+DROP FUNCTION IF EXISTS apply_employee_hiring_summary();
+DROP TABLE IF EXISTS employee_hiring_summary;
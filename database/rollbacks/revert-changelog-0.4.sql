@@ -0,0 +1,8 @@
+--liquibase formatted sql
+
+--changeset rollback:0
+--comment: Drop the updated_at indexes used by incremental backups
+
+DROP INDEX IF EXISTS department_updated_at_idx;
+DROP INDEX IF EXISTS job_updated_at_idx;
+DROP INDEX IF EXISTS employee_updated_at_idx;
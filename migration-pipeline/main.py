@@ -13,12 +13,11 @@ logging.basicConfig(
 )
 
 
-def get_id_by_name(session, model, name):
+def get_ids_by_name(session, model):
     """
-    Fetch the ID of a record from a model based on its name.
+    Fetch the `name -> id` mapping of a reference model in a single query.
     """
-    record = session.query(model).filter_by(name=name).first()
-    return record.id if record else None
+    return {name: id for name, id in session.query(model.name, model.id).all()}
 
 
 def validate_data(df):
@@ -71,10 +70,13 @@ def main():
     session = Session()
 
     # Obtaining IDs for task type and status
-    migration_type_id = get_id_by_name(session, TaskType, "MIGRATION")
-    in_progress_status_id = get_id_by_name(session, TaskStatus, "IN_PROGRESS")
-    completed_status_id = get_id_by_name(session, TaskStatus, "COMPLETED")
-    failed_status_id = get_id_by_name(session, TaskStatus, "FAILED")
+    task_type_ids = get_ids_by_name(session, TaskType)
+    task_status_ids = get_ids_by_name(session, TaskStatus)
+
+    migration_type_id = task_type_ids.get("MIGRATION")
+    in_progress_status_id = task_status_ids.get("IN_PROGRESS")
+    completed_status_id = task_status_ids.get("COMPLETED")
+    failed_status_id = task_status_ids.get("FAILED")
 
     # Create a new task for migration
     migration_task = Task(
@@ -1,15 +1,24 @@
 #!/bin/bash
 
+KAFKA_PARTITIONS=${KAFKA_PARTITIONS:-6}
+WORKER_REPLICAS=${WORKER_REPLICAS:-1}
+
 ./replace_variables.sh
 
 echo "Starting containers..."
-docker compose up -d --build
+docker compose up -d --build --scale worker-load=${WORKER_REPLICAS}
 echo "Containers started."
 
 sleep 10
 
 echo "Creating topics..."
-docker compose exec kafka kafka-topics --bootstrap-server kafka:9092\
-    --create --topic globant-challenge --partitions 1 --replication-factor 1 --if-not-exists
+for TASK_TYPE in load backup restore report; do
+    docker compose exec kafka kafka-topics --bootstrap-server kafka:9092\
+        --create --topic globant-challenge-${TASK_TYPE} --partitions ${KAFKA_PARTITIONS} --replication-factor 1 --if-not-exists
+
+    # Partitions can only grow; this is a no-op if the topic already has enough of them.
+    docker compose exec kafka kafka-topics --bootstrap-server kafka:9092\
+        --alter --topic globant-challenge-${TASK_TYPE} --partitions ${KAFKA_PARTITIONS} 2>/dev/null || true
+done
 
 echo "Topics created."
\ No newline at end of file
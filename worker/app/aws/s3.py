@@ -1,8 +1,40 @@
+import os
 import logging
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+import constants
+
+
+_client = None
+_client_pid = None
+
+
+def get_client():
+    """
+    Return the S3 client of the current process, creating it on first use or after a fork.
+
+    boto3 clients are thread-safe and expensive to create, so one is shared
+    by every call in the process. Its connection pool is sized for the
+    parallel parts of a transfer.
+
+    Returns:
+        botocore.client.S3: The S3 client.
+    """
+    global _client, _client_pid
+
+    if _client is None or _client_pid != os.getpid():
+        _client = boto3.client(
+            "s3",
+            endpoint_url=constants.S3_ENDPOINT_URL or None,
+            config=Config(max_pool_connections=max(10, constants.S3_MAX_CONCURRENCY)),
+        )
+        _client_pid = os.getpid()
+
+    return _client
+
 
 def upload(data, bucket, object_name):
     """
@@ -16,7 +48,7 @@ def upload(data, bucket, object_name):
     Returns:
         bool: True if the upload is successful, False otherwise.
     """
-    s3_client = boto3.client("s3")
+    s3_client = get_client()
     try:
         response = s3_client.put_object(Bucket=bucket, Key=object_name, Body=data)
     except ClientError as e:
@@ -41,7 +73,7 @@ def create_presigned_url(bucket_name, object_name, expiration=3600):
         ClientError: If there is an error generating the presigned URL.
     """
 
-    s3_client = boto3.client("s3")
+    s3_client = get_client()
     try:
         response = s3_client.generate_presigned_url(
             "get_object",
@@ -55,24 +87,43 @@ def create_presigned_url(bucket_name, object_name, expiration=3600):
     return response
 
 
-def download(bucket_name, object_name):
+def object_exists(bucket_name, object_name):
     """
-    Downloads an object from an S3 bucket.
+    Checks whether an object exists in an S3 bucket.
 
     Args:
         bucket_name (str): The name of the S3 bucket.
-        object_name (str): The name of the object to download.
+        object_name (str): The key of the object.
 
     Returns:
-        bytes: The content of the downloaded object.
+        bool: True if the object exists, False otherwise.
 
     Raises:
-        ClientError: If there is an error while downloading the object.
+        ClientError: If the existence cannot be determined.
+    """
+    try:
+        get_client().head_object(Bucket=bucket_name, Key=object_name)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return False
+        raise
+    return True
+
+
+def delete(bucket_name, object_name):
+    """
+    Deletes an object from an S3 bucket.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        object_name (str): The key of the object.
+
+    Returns:
+        bool: True if the deletion is successful, False otherwise.
     """
-    s3_client = boto3.client("s3")
     try:
-        response = s3_client.get_object(Bucket=bucket_name, Key=object_name)
+        get_client().delete_object(Bucket=bucket_name, Key=object_name)
     except ClientError as e:
         logging.error(e)
-        return None
-    return response["Body"].read()
+        return False
+    return True
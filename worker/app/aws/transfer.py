@@ -0,0 +1,328 @@
+import io
+import hashlib
+import logging
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+import constants
+from aws.s3 import get_client
+
+
+@lru_cache(maxsize=None)
+def get_transfer_config():
+    """
+    Return the transfer configuration used for S3 uploads and downloads.
+
+    Objects above `S3_MULTIPART_THRESHOLD` are uploaded in parts and
+    downloaded with ranged GETs, `S3_MAX_CONCURRENCY` parts at a time.
+
+    Returns:
+        TransferConfig: The transfer configuration.
+    """
+    return TransferConfig(
+        multipart_threshold=constants.S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=constants.S3_MULTIPART_CHUNK_SIZE,
+        max_concurrency=constants.S3_MAX_CONCURRENCY,
+        use_threads=True,
+    )
+
+
+def upload_fileobj(fileobj, bucket_name, object_name):
+    """
+    Streams a file-like object to an S3 bucket, in parallel parts if it is large.
+
+    Args:
+        fileobj: A readable binary file-like object.
+        bucket_name (str): The name of the S3 bucket.
+        object_name (str): The key of the object.
+
+    Returns:
+        bool: True if the upload is successful, False otherwise.
+    """
+    try:
+        get_client().upload_fileobj(
+            fileobj, bucket_name, object_name, Config=get_transfer_config()
+        )
+    except ClientError as e:
+        logging.error(e)
+        return False
+    return True
+
+
+def download_fileobj(bucket_name, object_name, fileobj):
+    """
+    Streams an object from an S3 bucket into a file-like object with parallel ranged GETs.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        object_name (str): The key of the object.
+        fileobj: A writable, seekable binary file-like object.
+
+    Returns:
+        bool: True if the download is successful, False otherwise.
+    """
+    try:
+        get_client().download_fileobj(
+            bucket_name, object_name, fileobj, Config=get_transfer_config()
+        )
+    except ClientError as e:
+        logging.error(e)
+        return False
+    return True
+
+
+def copy_object(bucket_name, source_name, object_name):
+    """
+    Copies an object within an S3 bucket server-side, in parallel parts if it is large.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        source_name (str): The key of the object to copy.
+        object_name (str): The key of the copy.
+
+    Returns:
+        bool: True if the copy is successful, False otherwise.
+    """
+    try:
+        get_client().copy(
+            {"Bucket": bucket_name, "Key": source_name},
+            bucket_name,
+            object_name,
+            Config=get_transfer_config(),
+        )
+    except ClientError as e:
+        logging.error(e)
+        return False
+    return True
+
+
+class S3RangeReader(io.RawIOBase):
+    """
+    Seekable read-only file-like object over an S3 object, fetched with ranged GETs.
+
+    Only the bytes that are read are downloaded, so a Parquet reader fetches
+    the footer and the column chunks of the row groups it reads, nothing else.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        object_name (str): The key of the object.
+
+    Raises:
+        FileNotFoundError: If the object does not exist.
+    """
+
+    def __init__(self, bucket_name: str, object_name: str):
+        super().__init__()
+        self.bucket_name = bucket_name
+        self.object_name = object_name
+        self._client = get_client()
+        self._position = 0
+        try:
+            self.size = self._client.head_object(Bucket=bucket_name, Key=object_name)[
+                "ContentLength"
+            ]
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError(constants.OBJECT_NOT_FOUND(object_name))
+            raise
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self._position = max(offset, 0)
+        return self._position
+
+    def readinto(self, buffer):
+        end = min(self._position + len(buffer), self.size)
+        if end <= self._position:
+            return 0
+
+        data = self._client.get_object(
+            Bucket=self.bucket_name,
+            Key=self.object_name,
+            Range=f"bytes={self._position}-{end - 1}",
+        )["Body"].read()
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def sha256(self):
+        """
+        Compute the hex SHA-256 of the whole object with a single streamed GET.
+        """
+        digest = hashlib.sha256()
+        body = self._client.get_object(Bucket=self.bucket_name, Key=self.object_name)[
+            "Body"
+        ]
+        for chunk in body.iter_chunks(constants.S3_MULTIPART_CHUNK_SIZE):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+class S3MultipartWriter:
+    """
+    Writable file-like object that streams its content to S3 as a multipart upload.
+
+    Writes are buffered into parts of `part_size` bytes, uploaded by a thread
+    pool while the caller keeps writing. At most `max_concurrency` parts are
+    held in memory; `write` blocks when they are all in flight. The upload is
+    completed by `close` and aborted if the writer is left through an exception.
+    The SHA-256 of the content is computed on the way, for content addressing.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        object_name (str): The key of the object.
+        part_size (int): The size of each part. S3 requires at least 5 MB.
+        max_concurrency (int): The number of parts uploaded at the same time.
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        object_name: str,
+        part_size: int = constants.S3_MULTIPART_CHUNK_SIZE,
+        max_concurrency: int = constants.S3_MAX_CONCURRENCY,
+    ):
+        self.bucket_name = bucket_name
+        self.object_name = object_name
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self.closed = False
+        self._client = get_client()
+        self._buffer = bytearray()
+        self._position = 0
+        self._sha256 = hashlib.sha256()
+        self._parts = []
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._upload_id = self._client.create_multipart_upload(
+            Bucket=bucket_name, Key=object_name
+        )["UploadId"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self._position
+
+    @property
+    def sha256(self):
+        """
+        The hex SHA-256 of the content written so far.
+        """
+        return self._sha256.hexdigest()
+
+    def flush(self):
+        pass
+
+    def write(self, data):
+        """
+        Buffer data and upload every full part.
+
+        Args:
+            data (bytes): The data to write.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        self._buffer += data
+        self._position += len(data)
+        self._sha256.update(data)
+
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+
+        return len(data)
+
+    def _upload_part(self, body: bytes):
+        if len(self._pending) >= self.max_concurrency:
+            done, self._pending = wait(self._pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._parts.append(future.result())
+
+        part_number = len(self._parts) + len(self._pending) + 1
+        self._pending.add(self._executor.submit(self._send_part, part_number, body))
+
+    def _send_part(self, part_number: int, body: bytes):
+        response = self._client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.object_name,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def close(self):
+        """
+        Upload the remaining data and complete the multipart upload.
+        """
+        if self.closed:
+            return
+
+        try:
+            if self._buffer or not (self._parts or self._pending):
+                self._upload_part(bytes(self._buffer))
+                self._buffer.clear()
+
+            for future in self._pending:
+                self._parts.append(future.result())
+            self._pending = set()
+
+            self._client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.object_name,
+                UploadId=self._upload_id,
+                MultipartUpload={
+                    "Parts": sorted(self._parts, key=lambda part: part["PartNumber"])
+                },
+            )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._executor.shutdown(wait=True)
+            self.closed = True
+
+    def abort(self):
+        """
+        Abort the multipart upload, discarding the uploaded parts.
+        """
+        if self.closed:
+            return
+
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.closed = True
+        try:
+            self._client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=self.object_name, UploadId=self._upload_id
+            )
+        except ClientError as e:
+            logging.error(e)
@@ -14,15 +14,118 @@ DB_USER: str = os.getenv("DB_USER", "postgres")
 DB_PASS: str = os.getenv("DB_PASSWORD", "postgres")
 DB_NAME: str = os.getenv("DB_NAME", "mydb")
 
+DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 2))
+DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 2))
+DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
 KAFKA_HOST: str = os.getenv("KAFKA_HOST", "kafka")
 KAFKA_PORT: str = os.getenv("KAFKA_PORT", "29092")
 KAFKA_TOPIC: str = os.getenv("KAFKA_TOPIC", "globant-challenge")
 KAFKA_GROUP_ID: str = os.getenv("KAFKA_GROUP_ID", "globant-challenge-group")
 
+# Task types consumed by this worker, e.g. WORKER_TASK_TYPES=BACKUP,RESTORE
+TASK_TYPES: str = "LOAD,BACKUP,RESTORE,REPORT"
+WORKER_TASK_TYPES: list = [
+    task_type.strip().upper()
+    for task_type in os.getenv("WORKER_TASK_TYPES", TASK_TYPES).split(",")
+    if task_type.strip()
+]
+KAFKA_TASK_TOPICS = {
+    task_type: os.getenv(
+        f"KAFKA_TOPIC_{task_type}", f"{KAFKA_TOPIC}-{task_type.lower()}"
+    )
+    for task_type in WORKER_TASK_TYPES
+}
+KAFKA_CONSUME_BATCH_SIZE: int = int(os.getenv("KAFKA_CONSUME_BATCH_SIZE", WORKERS))
+KAFKA_CONSUME_TIMEOUT: float = float(os.getenv("KAFKA_CONSUME_TIMEOUT", 1.0))
+SCHEDULER_QUEUE_SIZE: int = int(os.getenv("SCHEDULER_QUEUE_SIZE", WORKERS * 4))
+TASK_PRIORITY_DEFAULT: int = 5
+TASK_AGING_SECONDS: float = float(os.getenv("TASK_AGING_SECONDS", 30))
+# Weighted fair queuing shares, e.g. TASK_TYPE_WEIGHTS=REPORT:4,LOAD:2,BACKUP:1,RESTORE:1
+TASK_TYPE_WEIGHTS: dict = {
+    task_type.strip().upper(): float(weight)
+    for task_type, weight in (
+        item.split(":")
+        for item in os.getenv(
+            "TASK_TYPE_WEIGHTS", "REPORT:4,LOAD:2,BACKUP:1,RESTORE:1"
+        ).split(",")
+        if item.strip()
+    )
+}
+# Seconds each task type may run, e.g. TASK_TIMEOUTS=LOAD:900,REPORT:600
+TASK_TIMEOUTS: dict = {
+    task_type.strip().upper(): float(timeout)
+    for task_type, timeout in (
+        item.split(":")
+        for item in os.getenv(
+            "TASK_TIMEOUTS", "LOAD:900,BACKUP:3600,RESTORE:3600,REPORT:600"
+        ).split(",")
+        if item.strip()
+    )
+}
+TASK_TIMEOUT_GRACE: float = float(os.getenv("TASK_TIMEOUT_GRACE", 30))
+# A revoke waits for the running tasks of its partitions, for up to their hard
+# timeout; the consumer must not be evicted from the group meanwhile.
+KAFKA_MAX_POLL_INTERVAL_MS: int = int(
+    os.getenv(
+        "KAFKA_MAX_POLL_INTERVAL_MS",
+        (
+            max(
+                (TASK_TIMEOUTS.get(task_type, 0) for task_type in WORKER_TASK_TYPES),
+                default=0,
+            )
+            + TASK_TIMEOUT_GRACE
+            + 60
+        )
+        * 1000,
+    )
+)
+WORKER_MAX_TASKS_PER_CHILD: int = int(os.getenv("WORKER_MAX_TASKS_PER_CHILD", 100))
+WORKER_MAX_CHILD_RSS_MB: float = float(os.getenv("WORKER_MAX_CHILD_RSS_MB", 1024))
+WORKER_MAX_TASK_RETRIES: int = int(os.getenv("WORKER_MAX_TASK_RETRIES", 1))
+WARMUP_MODULES: tuple = (
+    "pandas",
+    "pyarrow",
+    "pyarrow.parquet",
+    "jinja2",
+    "tasks.manager",
+)
+METRICS_PORT: int = int(os.getenv("METRICS_PORT", 9100))
+METRICS_PREFIX: str = "worker_"
+KAFKA_CONTENT_TYPE_HEADER: str = "content-type"
+KAFKA_SCHEMA_VERSION_HEADER: str = "schema-version"
+
+
+class MessageFormatEnum(str, Enum):
+    JSON = "json"
+    AVRO = "avro"
+
+
+UNSUPPORTED_MESSAGE_FORMAT: Callable[[str, str], str] = (
+    lambda message_format, version: f"Unsupported message format {message_format} (schema version {version})"
+)
+
 DATABASE_CONNECTION_ERROR: str = "Error connecting to database"
 
 CONSUMER_START_MESSAGE: str = "Starting consumer..."
+CONSUMER_SUBSCRIBED_MESSAGE: Callable[[list], str] = (
+    lambda topics: f"Subscribed to {topics}"
+)
 CONSUMER_CLOSE_MESSAGE: str = "Closing consumer..."
+PARTITIONS_ASSIGNED: Callable[[list], str] = (
+    lambda partitions: f"Partitions assigned: {[f'{p.topic}[{p.partition}]' for p in partitions]}"
+)
+PARTITIONS_REVOKED: Callable[[list, int], str] = (
+    lambda partitions, queued: f"Partitions revoked: {[f'{p.topic}[{p.partition}]' for p in partitions]}, dropped {queued} queued tasks"
+)
+CONSUMER_PAUSED_MESSAGE: Callable[[int], str] = (
+    lambda queued: f"Pausing consumption: {queued} tasks queued"
+)
+CONSUMER_RESUMED_MESSAGE: Callable[[int], str] = (
+    lambda queued: f"Resuming consumption: {queued} tasks queued"
+)
 
 PROCESS_TASK_INIT_MESSAGE: Callable[[int | str], str] = (
     lambda task_id: f"Processing task {task_id}..."
@@ -39,6 +142,26 @@ PROCESS_TASK_SUCCESS: Callable[[int | str], str] = (
 PROCESS_TASK_FAILED: Callable[[int | str], str] = (
     lambda task_id: f"Task {task_id} has failed."
 )
+PROCESS_TASK_NOT_FOUND: Callable[[int | str], str] = (
+    lambda task_id: f"Task {task_id} does not exist, skipping it."
+)
+MESSAGE_DECODE_FAILED: Callable[[str, int, int, Exception], str] = (
+    lambda topic, partition, offset, error: f"Skipping undecodable message {topic}[{partition}]@{offset}: {error!r}"
+)
+WARMUP_FAILED: str = "Worker warm-up failed"
+TASK_TIMED_OUT: str = "Task exceeded its timeout"
+TASK_KILLED: Callable[[int | str], str] = (
+    lambda task_id: f"Task {task_id} exceeded its timeout, killing the pool processes."
+)
+POOL_BROKEN: Callable[[int], str] = (
+    lambda lost: f"Process pool broken, restarting it ({lost} tasks lost)."
+)
+POOL_RECYCLING: Callable[[float], str] = (
+    lambda max_rss_mb: f"A child process exceeded {max_rss_mb} MB, recycling the process pool."
+)
+PROCESS_POOL_METRICS: Callable[[dict], str] = (
+    lambda metrics: f"Database pool metrics: {metrics}"
+)
 
 
 class TaskTypeIdEnum(int, Enum):
@@ -68,8 +191,40 @@ BASE_CHALLENGE_1_CONFIG_MAP = {
     },
 }
 
+COPY_NULL: str = "\\N"
+COPY_CHUNK_SIZE: int = int(os.getenv("COPY_CHUNK_SIZE", 50000))
+
+
+STAGING_TABLE_PREFIX: str = "staging_"
+
+
+class LoaderEnum(str, Enum):
+    TO_SQL = "to_sql"
+    COPY = "copy"
+    MERGE = "merge"
+
+
+class ConflictActionEnum(str, Enum):
+    NOTHING = "nothing"
+    UPDATE = "update"
+
+
+class RestoreModeEnum(str, Enum):
+    APPEND = "append"
+    MERGE = "merge"
+    REPLACE = "replace"
+
+
+class BackupTypeEnum(str, Enum):
+    FULL = "full"
+    INCREMENTAL = "incremental"
+
+
+LOAD_LOADER: str = os.getenv("LOAD_LOADER", LoaderEnum.MERGE.value)
+
 LOAD_CHALLENGE_1_CONFIG_MAP = {
-    f"{k}s": v for k, v in BASE_CHALLENGE_1_CONFIG_MAP.items()
+    f"{k}s": {**v, "loader": os.getenv(f"LOAD_LOADER_{k.upper()}", LOAD_LOADER)}
+    for k, v in BASE_CHALLENGE_1_CONFIG_MAP.items()
 }
 
 LOAD_DUPLICATE_KEY_VALUE_ERROR: str = "duplicate key value violates unique constraint"
@@ -81,6 +236,18 @@ LOAD_INVALID_ROWS_FOUND: Callable[[str], str] = (
     lambda model_name: f"Invalid rows found in {model_name}"
 )
 LOAD_DATA_SUCCESS: str = "Data loaded successfully"
+LOAD_FILE_CHUNK_SIZE: int = int(os.getenv("LOAD_FILE_CHUNK_SIZE", 100000))
+LOAD_FILE_COLUMNS = {
+    "department": ("id", "department"),
+    "job": ("id", "job"),
+    "employee": ("id", "name", "datetime", "department_id", "job_id"),
+}
+LOAD_FILE_MISSING_COLUMNS: Callable[[list], str] = (
+    lambda columns: f"The file is missing the columns {columns}"
+)
+LOAD_FILE_PARTIAL: str = (
+    "The file was loaded partially: the counts cover the chunks committed before the failure"
+)
 
 BACKUP_SUCCESS: Callable[[str], str] = (
     lambda table_name: f"Backup for {table_name} successful"
@@ -88,14 +255,86 @@ BACKUP_SUCCESS: Callable[[str], str] = (
 BACKUP_FAILED: Callable[[str], str] = (
     lambda table_name: f"Backup for {table_name} failed"
 )
+UNKNOWN_TABLES: Callable[[list], str] = (
+    lambda tables: f"Unknown tables: {', '.join(tables)}"
+)
+RESTORE_REPLACE_WITHOUT_REFERENCING: Callable[[list], str] = (
+    lambda tables: f"Restore failed: the replace mode also needs the tables referencing the restored ones: {', '.join(tables)}"
+)
+BACKUP_INCREMENTAL_WITHOUT_BASE: Callable[[str], str] = (
+    lambda table_name: f"No backup of {table_name} to build on, taking a full backup"
+)
 
 RESTORE_NOT_FOUND_IN_S3: str = "Restore failed: data not found in S3"
+RESTORE_BACKUP_NOT_FOUND: Callable[[str], str] = (
+    lambda table_name: f"Restore failed: no backup of {table_name} matches the request"
+)
+RESTORE_FILTER_WITH_REPLACE: str = (
+    "Restore failed: the replace mode cannot be combined with a filter"
+)
+RESTORE_UNKNOWN_FILTER: Callable[[list], str] = (
+    lambda keys: f"Restore failed: unknown filter keys: {', '.join(keys)}"
+)
+RESTORE_INVALID_PARTITION_FILTER: Callable[[str, object], str] = (
+    lambda key, value: f"Restore failed: the {key} filter must be an integer, got {value!r}"
+)
+# Hash every backup file on restore, on top of the footer checks
+RESTORE_VERIFY_CHECKSUM: bool = (
+    os.getenv("RESTORE_VERIFY_CHECKSUM", "false").lower() == "true"
+)
+RESTORE_INTEGRITY_ERROR: Callable[[str], str] = (
+    lambda key: f"Restore failed: backup file {key} does not match its manifest"
+)
 RESTORE_SUCCESS: Callable[[str], str] = (
     lambda table_name: f"Restore for {table_name} successful"
 )
 
 S3_BUCKET_NAME: str = os.getenv("S3_BUCKET_NAME", "sgg-globant-challenge")
 S3_BACKUP_PATH: str = "backups"
+BACKUP_BATCH_SIZE: int = int(os.getenv("BACKUP_BATCH_SIZE", 50000))
+# Tables backed up or restored at the same time by a single task
+MAINTENANCE_PARALLEL_TABLES: int = int(os.getenv("MAINTENANCE_PARALLEL_TABLES", 3))
+ALL_TABLES: str = "all"
+# Tables backed up as a Hive-partitioned dataset, by year and quarter of the column
+BACKUP_PARTITION_COLUMNS: dict = {"employee": "datetime"}
+# Columns worth dictionary encoding in backups; the others are mostly unique
+BACKUP_DICTIONARY_COLUMNS: dict = {
+    "department": ["department"],
+    "job": ["job"],
+    "employee": ["name"],
+}
+S3_BACKUP_CATALOG: str = "catalog.json"
+# Advisory lock key prefix serializing the backups of a table and their catalog updates
+BACKUP_LOCK_PREFIX: str = "backup-catalog:"
+# Points the client at an S3-compatible server such as MinIO or moto, e.g. http://localhost:5000
+S3_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL", "")
+S3_MULTIPART_THRESHOLD: int = int(os.getenv("S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024))
+S3_MULTIPART_CHUNK_SIZE: int = int(
+    os.getenv("S3_MULTIPART_CHUNK_SIZE", 16 * 1024 * 1024)
+)
+S3_MAX_CONCURRENCY: int = int(os.getenv("S3_MAX_CONCURRENCY", 8))
+
+
+class ObjectStorageEnum(str, Enum):
+    LOCAL = "local"
+    S3 = "s3"
+
+
+class FileFormatEnum(str, Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+OBJECT_STORE_ROOT: str = os.getenv("OBJECT_STORE_ROOT", "/data/object-store")
+OBJECT_NOT_FOUND: Callable[[str], str] = (
+    lambda key: f"Object {key} not found in the object store"
+)
+CLAIM_CHECK_CHECKSUM_MISMATCH: Callable[[str], str] = (
+    lambda key: f"Claim check {key} does not match its checksum"
+)
+CLAIM_CHECK_DELETE_FAILED: Callable[[str, Exception], str] = (
+    lambda key, error: f"Could not delete claim check {key}: {error}"
+)
 
 
 REPORT_TYPE1_TEMPLATE: str = "type1.md"
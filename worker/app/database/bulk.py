@@ -0,0 +1,333 @@
+from io import StringIO
+from functools import partial
+
+from sqlalchemy import text
+
+import constants
+
+
+def quote_identifier(connection, name):
+    """
+    Quote a table or column name for the dialect of the given connection.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        name (str): The identifier to quote.
+
+    Returns:
+        str: The quoted identifier.
+    """
+    return connection.dialect.identifier_preparer.quote(name)
+
+
+def copy_csv(connection, table_name, columns, buffer):
+    """
+    Stream a CSV buffer into a table with `COPY FROM STDIN`.
+
+    The copy runs inside the current transaction of the connection.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        table_name (str): The name of the destination table.
+        columns (list): The columns of the CSV, in order.
+        buffer: A file-like object with CSV rows and no header. `\\N` marks NULL values.
+    """
+    column_list = ", ".join(quote_identifier(connection, column) for column in columns)
+    statement = (
+        f"COPY {quote_identifier(connection, table_name)} ({column_list}) "
+        f"FROM STDIN WITH (FORMAT csv, NULL '{constants.COPY_NULL}')"
+    )
+
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(statement, buffer)
+
+
+def copy_dataframe(connection, table_name, df, chunk_size=constants.COPY_CHUNK_SIZE):
+    """
+    Stream a DataFrame into a table with `COPY FROM STDIN`, one chunk at a time.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        table_name (str): The name of the destination table.
+        df (pandas.DataFrame): The rows to copy. Its columns must exist in the table.
+        chunk_size (int): Number of rows serialized to CSV per COPY statement.
+
+    Returns:
+        int: The number of rows copied.
+    """
+    columns = list(df.columns)
+
+    for start in range(0, len(df), chunk_size):
+        buffer = StringIO()
+        df.iloc[start : start + chunk_size].to_csv(
+            buffer, index=False, header=False, na_rep=constants.COPY_NULL
+        )
+        buffer.seek(0)
+        copy_csv(connection, table_name, columns, buffer)
+
+    return len(df)
+
+
+def copy_batches(connection, table_name, batches):
+    """
+    Stream record batches into a table with `COPY FROM STDIN`, one batch at a time.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        table_name (str): The name of the destination table.
+        batches: An iterable of pyarrow record batches. Their columns must exist in the table.
+
+    Returns:
+        int: The number of rows copied.
+    """
+    total = 0
+
+    for batch in batches:
+        total += copy_dataframe(connection, table_name, batch.to_pandas())
+
+    return total
+
+
+def get_staging_table(table_name):
+    """
+    Return the name of the staging table of a table.
+    """
+    return f"{constants.STAGING_TABLE_PREFIX}{table_name}"
+
+
+def create_staging_table(connection, table_name):
+    """
+    Create a temporary table shaped like the given table, dropped on commit.
+
+    Temporary tables are not WAL-logged, so loading them is cheaper than
+    loading the target table directly.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        table_name (str): The name of the table to mirror.
+
+    Returns:
+        str: The name of the staging table.
+    """
+    staging_table = get_staging_table(table_name)
+    connection.execute(
+        text(
+            f"CREATE TEMP TABLE {quote_identifier(connection, staging_table)} "
+            f"(LIKE {quote_identifier(connection, table_name)} INCLUDING DEFAULTS) "
+            "ON COMMIT DROP"
+        )
+    )
+    return staging_table
+
+
+def create_key_table(connection, table_name, key_columns=("id",)):
+    """
+    Create a temporary table holding only the key columns of the given table, dropped on commit.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        table_name (str): The name of the table whose keys are staged.
+        key_columns (tuple): The columns that identify a row.
+
+    Returns:
+        str: The name of the key table.
+    """
+    quote = partial(quote_identifier, connection)
+    key_table = f"{constants.STAGING_TABLE_PREFIX}keys_{table_name}"
+    key_list = ", ".join(quote(column) for column in key_columns)
+    connection.execute(
+        text(
+            f"CREATE TEMP TABLE {quote(key_table)} ON COMMIT DROP AS "
+            f"SELECT {key_list} FROM {quote(table_name)} WITH NO DATA"
+        )
+    )
+    return key_table
+
+
+def merge_staging_table(
+    connection,
+    staging_table,
+    table_name,
+    columns,
+    on_conflict=constants.ConflictActionEnum.NOTHING.value,
+    key_columns=("id",),
+):
+    """
+    Insert the rows of a staging table into the target table with `INSERT ... ON CONFLICT`.
+
+    When a key appears more than once in the staging table, the last copied row wins.
+    With `update`, conflicting rows are only rewritten when a value changed, and
+    `created_by_task_id` keeps the task that created the row. Written rows get
+    the current `updated_at`, so incremental backups see them as changed.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        staging_table (str): The name of the staging table.
+        table_name (str): The name of the target table.
+        columns (list): The columns to insert.
+        on_conflict (str): `nothing` to skip conflicting rows, `update` to overwrite them.
+        key_columns (tuple): The columns of the conflict target.
+
+    Returns:
+        dict: The number of rows `inserted` and `updated`.
+    """
+    quote = partial(quote_identifier, connection)
+
+    column_list = ", ".join(quote(column) for column in columns)
+    select_list = ", ".join(
+        "CURRENT_TIMESTAMP" if column == "updated_at" else quote(column)
+        for column in columns
+    )
+    key_list = ", ".join(quote(column) for column in key_columns)
+
+    update_columns = [
+        column
+        for column in columns
+        if column not in key_columns
+        and column not in ("created_by_task_id", "updated_at")
+    ]
+
+    if on_conflict == constants.ConflictActionEnum.UPDATE.value and update_columns:
+        assignments = ", ".join(
+            f"{quote(column)} = EXCLUDED.{quote(column)}" for column in update_columns
+        )
+        target_values = ", ".join(
+            f"{quote(table_name)}.{quote(column)}" for column in update_columns
+        )
+        excluded_values = ", ".join(
+            f"EXCLUDED.{quote(column)}" for column in update_columns
+        )
+        conflict_action = (
+            f"DO UPDATE SET {assignments}, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE ({target_values}) IS DISTINCT FROM ({excluded_values})"
+        )
+    else:
+        conflict_action = "DO NOTHING"
+
+    result = connection.execute(
+        text(
+            f"""
+            WITH merged AS (
+                INSERT INTO {quote(table_name)} ({column_list})
+                SELECT DISTINCT ON ({key_list}) {select_list}
+                FROM {quote(staging_table)}
+                ORDER BY {key_list}, ctid DESC
+                ON CONFLICT ({key_list}) {conflict_action}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                count(*) FILTER (WHERE inserted) AS inserted,
+                count(*) FILTER (WHERE NOT inserted) AS updated
+            FROM merged
+            """
+        )
+    ).one()
+
+    return {"inserted": result.inserted, "updated": result.updated}
+
+
+def merge_dataframe(
+    connection, table_name, df, on_conflict=constants.ConflictActionEnum.NOTHING.value
+):
+    """
+    Load a DataFrame into a table through a staging table and `INSERT ... ON CONFLICT`.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        table_name (str): The name of the target table.
+        df (pandas.DataFrame): The rows to load. Its columns must exist in the table.
+        on_conflict (str): `nothing` to skip conflicting rows, `update` to overwrite them.
+
+    Returns:
+        dict: The number of rows `inserted`, `updated` and `skipped`.
+    """
+    staging_table = create_staging_table(connection, table_name)
+    staged = copy_dataframe(connection, staging_table, df)
+    counts = merge_staging_table(
+        connection, staging_table, table_name, list(df.columns), on_conflict
+    )
+    return {
+        **counts,
+        "skipped": staged - counts["inserted"] - counts["updated"],
+    }
+
+
+def delete_missing_rows(connection, staging_table, table_name, key_columns=("id",)):
+    """
+    Delete the rows of the target table whose key is not in the staging table.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        staging_table (str): The name of the staging table.
+        table_name (str): The name of the target table.
+        key_columns (tuple): The columns that identify a row.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    quote = partial(quote_identifier, connection)
+
+    join_condition = " AND ".join(
+        f"staging.{quote(column)} = target.{quote(column)}" for column in key_columns
+    )
+    result = connection.execute(
+        text(
+            f"""
+            DELETE FROM {quote(table_name)} AS target
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {quote(staging_table)} AS staging
+                WHERE {join_condition}
+            )
+            """
+        )
+    )
+    return result.rowcount
+
+
+def reset_sequence(connection, table_name, column="id"):
+    """
+    Move the serial sequence of a column past its highest value.
+
+    Rows copied with explicit IDs do not advance the sequence, so the next
+    generated ID would collide with them.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        table_name (str): The name of the table.
+        column (str): The serial column.
+    """
+    quote = partial(quote_identifier, connection)
+
+    connection.execute(
+        text(
+            f"SELECT setval(pg_get_serial_sequence(:table_name, :column), "
+            f"COALESCE(MAX({quote(column)}), 0) + 1, false) "
+            f"FROM {quote(table_name)}"
+        ),
+        {"table_name": quote(table_name), "column": column},
+    )
+
+
+def count_keys_in_range(connection, table_name, low, high, column="id"):
+    """
+    Count the rows of a table whose key is between two values, inclusive.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        table_name (str): The name of the table.
+        low (int): The lowest key.
+        high (int): The highest key.
+        column (str): The key column.
+
+    Returns:
+        int: The number of rows in the range.
+    """
+    quote = partial(quote_identifier, connection)
+
+    return connection.execute(
+        text(
+            f"SELECT count(*) FROM {quote(table_name)} "
+            f"WHERE {quote(column)} BETWEEN :low AND :high"
+        ),
+        {"low": low, "high": high},
+    ).scalar_one()
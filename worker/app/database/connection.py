@@ -1,27 +1,178 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 import constants
 
 
+class MeteredQueuePool(QueuePool):
+    """
+    QueuePool that records how long callers wait to check out a connection.
+
+    Attributes:
+        wait_count (int): Number of checkouts performed.
+        wait_total (float): Accumulated checkout wait time in seconds.
+        wait_max (float): Longest checkout wait time in seconds.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._wait_lock:
+                self.wait_count += 1
+                self.wait_total += elapsed
+                self.wait_max = max(self.wait_max, elapsed)
+
+
+_engine = None
+_engine_pid = None
+_Session = sessionmaker()
+
+
+def _build_engine():
+    """
+    Build the engine used by the current process with the configured pool settings.
+
+    Returns:
+        sqlalchemy.engine.Engine: The new engine.
+    """
+    return create_engine(
+        f"postgresql://{constants.DB_USER}:{constants.DB_PASS}@{constants.DB_HOST}:{constants.DB_PORT}/{constants.DB_NAME}",
+        poolclass=MeteredQueuePool,
+        pool_size=constants.DB_POOL_SIZE,
+        max_overflow=constants.DB_MAX_OVERFLOW,
+        pool_timeout=constants.DB_POOL_TIMEOUT,
+        pool_recycle=constants.DB_POOL_RECYCLE,
+        pool_pre_ping=constants.DB_POOL_PRE_PING,
+    )
+
+
+def init_engine():
+    """
+    Create the engine for the current process.
+
+    Meant to be used as the `ProcessPoolExecutor` initializer. If the process
+    inherited an engine from its parent through `fork`, the inherited pool is
+    discarded without closing the parent's connections.
+
+    Returns:
+        sqlalchemy.engine.Engine: The engine of the current process.
+    """
+    global _engine, _engine_pid
+
+    if _engine is not None:
+        _engine.dispose(close=_engine_pid == os.getpid())
+
+    _engine = _build_engine()
+    _engine_pid = os.getpid()
+    _Session.configure(bind=_engine)
+    return _engine
+
+
+def get_engine():
+    """
+    Return the engine of the current process, creating it on first use or after a fork.
+
+    Returns:
+        sqlalchemy.engine.Engine: The engine of the current process.
+    """
+    if _engine is None or _engine_pid != os.getpid():
+        return init_engine()
+    return _engine
+
+
+@contextmanager
+def session_scope():
+    """
+    Provide a session bound to the process engine.
+
+    The session is rolled back if the block raises and always closed, returning
+    its connection to the pool.
+
+    Yields:
+        sqlalchemy.orm.session.Session: The database session.
+    """
+    get_engine()
+    session = _Session()
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
 def create_session():
     """
-    Create a connection to the database and return the engine and session objects.
+    Create a session bound to the process engine and return the engine and session objects.
+
+    Callers are responsible for closing the session; prefer `session_scope`.
 
     Returns:
-        - engine: sqlalchemy.engine.base.Connection
+        - engine: sqlalchemy.engine.Engine
         - session: sqlalchemy.orm.session.Session
     """
 
-    DB_HOST = constants.DB_HOST
-    DB_NAME = constants.DB_NAME
-    DB_USER = constants.DB_USER
-    DB_PASS = constants.DB_PASS
-
     try:
-        engine = create_engine(f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}")
-        Session = sessionmaker(bind=engine)
-        return engine, Session()
+        engine = get_engine()
+        return engine, _Session()
     except Exception as e:
         print(f"{constants.DATABASE_CONNECTION_ERROR}: {e}")
         return None, None
+
+
+def get_free_connections():
+    """
+    Return the number of connections the pool of the current process can still hand out.
+
+    Tasks that open one connection per thread size their thread pool with it,
+    so they never wait on `DB_POOL_TIMEOUT` for a connection held by a sibling.
+
+    Returns:
+        int: The idle and not yet opened connections, overflow included.
+    """
+    pool = get_engine().pool
+    return max(pool.size() + constants.DB_MAX_OVERFLOW - pool.checkedout(), 0)
+
+
+def get_pool_metrics():
+    """
+    Return the connection pool metrics of the current process.
+
+    Returns:
+        dict: Pool size, checked-in/checked-out connections, overflow and checkout wait times.
+    """
+    if _engine is None or _engine_pid != os.getpid():
+        return {}
+
+    pool = _engine.pool
+    return {
+        "pid": _engine_pid,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "wait_count": pool.wait_count,
+        "wait_avg_ms": (
+            round(pool.wait_total / pool.wait_count * 1000, 3)
+            if pool.wait_count
+            else 0.0
+        ),
+        "wait_max_ms": round(pool.wait_max * 1000, 3),
+    }
@@ -90,6 +90,31 @@ class Employee(Base):
     )
 
 
+class EmployeeHiringSummary(Base):
+    """
+    Represents the number of employees hired per department, job and quarter.
+
+    The table is maintained by statement-level triggers on the employee table,
+    so it is never written by the application.
+
+    Attributes:
+        year (int): The year of hiring.
+        quarter (int): The quarter of hiring, from 1 to 4.
+        department_id (int): The ID of the department the employees belong to.
+        job_id (int): The ID of the job position the employees hold.
+        hire_count (int): The number of employees hired.
+        updated_at (datetime): The date and time when the record was last updated.
+    """
+
+    __tablename__ = "employee_hiring_summary"
+    year = Column(Integer, primary_key=True)
+    department_id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, primary_key=True)
+    quarter = Column(Integer, primary_key=True)
+    hire_count = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
 class TaskType(Base):
     """
     Represents a task type.
@@ -1,14 +1,28 @@
 import os
 import json
+import logging
+import hashlib
 
 from confluent_kafka import Consumer, KafkaException, KafkaError
 import constants
+from storage.object_store import delete_object, open_object
+from kafka.serialization import decode_message
 
 
-def create_consumer():
+def create_consumer(on_assign=None, on_revoke=None, on_lost=None):
     """
     Creates a Kafka consumer with the specified configuration.
 
+    The consumer subscribes to the topics of `WORKER_TASK_TYPES`. Offsets are
+    not committed automatically; they are committed with an `OffsetTracker`
+    once the tasks of the messages have finished. The poll interval allows a
+    rebalance to wait for the longest task of the worker.
+
+    Args:
+        on_assign (callable, optional): Called with the consumer and the partitions assigned in a rebalance.
+        on_revoke (callable, optional): Called with the consumer and the partitions revoked in a rebalance.
+        on_lost (callable, optional): Called with the consumer and the partitions lost without a clean revoke.
+
     Returns:
         Consumer: A Kafka consumer object.
 
@@ -19,50 +33,129 @@ def create_consumer():
             "bootstrap.servers": constants.KAFKA_HOST + ":" + constants.KAFKA_PORT,
             "group.id": constants.KAFKA_GROUP_ID,
             "auto.offset.reset": "earliest",
+            "enable.auto.commit": False,
+            "max.poll.interval.ms": constants.KAFKA_MAX_POLL_INTERVAL_MS,
         }
     )
 
-    consumer.subscribe([constants.KAFKA_TOPIC])
+    callbacks = {"on_assign": on_assign, "on_revoke": on_revoke, "on_lost": on_lost}
+    consumer.subscribe(
+        list(constants.KAFKA_TASK_TOPICS.values()),
+        **{name: callback for name, callback in callbacks.items() if callback},
+    )
 
     return consumer
 
 
+def read_claim_check(claim_check: dict) -> dict:
+    """
+    Reads the task data offloaded to the object store by the API.
+
+    Args:
+        claim_check (dict): The `object` reference, `sha256` and `size` of the payload.
+
+    Returns:
+        dict: The task data.
+
+    Raises:
+        ValueError: If the stored payload does not match the checksum.
+    """
+    with open_object(claim_check["object"]) as fileobj:
+        payload = fileobj.read()
+
+    if (
+        len(payload) != claim_check["size"]
+        or hashlib.sha256(payload).hexdigest() != claim_check["sha256"]
+    ):
+        raise ValueError(
+            constants.CLAIM_CHECK_CHECKSUM_MISMATCH(claim_check["object"]["key"])
+        )
+
+    return json.loads(payload)
+
+
+def release_claim_check(claim_check: dict = None):
+    """
+    Deletes the task data offloaded to the object store once its task has finished.
+
+    A failed deletion is only logged: the task has already finished either way.
+
+    Args:
+        claim_check (dict, optional): The claim check of the task message, if any.
+    """
+    if not claim_check:
+        return
+
+    key = claim_check["object"]["key"]
+
+    try:
+        delete_object(claim_check["object"])
+    except Exception as e:
+        logging.warning(constants.CLAIM_CHECK_DELETE_FAILED(key, e))
+
+
 def fix_message(message: bytes) -> dict:
     """
     Converts a byte message to a dictionary.
 
+    The value is decoded as JSON or Avro depending on the message headers. A
+    claim check is left in the message: the data it points to is read by the
+    pool process that runs the task, not in the poll loop.
+
     Args:
         message (bytes): The byte message to be converted.
 
     Returns:
         dict: The converted dictionary.
     """
-    return json.loads(message.value().decode("utf-8"))
+    return decode_message(message.value(), message.headers())
 
 
-def consume(consumer: Consumer):
+def consume(
+    consumer: Consumer,
+    num_messages: int = constants.KAFKA_CONSUME_BATCH_SIZE,
+    timeout: float = constants.KAFKA_CONSUME_TIMEOUT,
+):
     """
-    Consume messages from a Kafka consumer.
+    Consume batches of messages from a Kafka consumer.
+
+    An empty batch is yielded when no message arrives within the timeout, so the
+    caller keeps control of the loop while its partitions are paused. A message
+    that cannot be decoded is logged and yielded with None instead of its task,
+    so the caller commits past it instead of receiving it again forever.
 
     Args:
         consumer (Consumer): The Kafka consumer to consume messages from.
+        num_messages (int): The maximum number of messages per batch.
+        timeout (float): Seconds to wait for the batch to fill.
 
     Yields:
-        The fixed message from the Kafka consumer.
+        list: The `(message, fixed message)` pairs of the batch. The fixed message is
+        None if the message could not be decoded.
 
     Raises:
         KafkaException: If there is an error while consuming messages from the Kafka consumer.
     """
     while True:
-        message = consumer.poll(1.0)
-
-        if message is None:
-            continue
-
-        if message.error():
-            if message.error().code() == KafkaError._PARTITION_EOF:
-                continue
-            else:
-                raise KafkaException(message.error())
-
-        yield fix_message(message)
+        batch = []
+
+        for message in consumer.consume(num_messages=num_messages, timeout=timeout):
+            if message.error():
+                if message.error().code() == KafkaError._PARTITION_EOF:
+                    continue
+                else:
+                    raise KafkaException(message.error())
+
+            try:
+                task = fix_message(message)
+            except Exception as e:
+                logging.error(
+                    constants.MESSAGE_DECODE_FAILED(
+                        message.topic(), message.partition(), message.offset(), e
+                    )
+                )
+                task = None
+
+            batch.append((message, task))
+
+        yield batch
@@ -0,0 +1,83 @@
+from collections import deque
+
+from confluent_kafka import Consumer, Message, TopicPartition
+
+
+class OffsetTracker:
+    """
+    Tracks the offsets of in-flight messages per partition and commits only
+    the contiguous prefix of completed ones.
+
+    Tasks finish out of order, so a partition's committed offset only moves
+    past a message once every earlier message of the partition has completed.
+    After a crash, the uncommitted messages are delivered again and the
+    COMPLETED/FAILED checks of `process_task` skip the ones already done.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._completed = {}
+        self._committable = {}
+
+    def track(self, message: Message):
+        """
+        Register a message that is about to be processed.
+
+        Args:
+            message (Message): The Kafka message.
+        """
+        partition = (message.topic(), message.partition())
+        self._pending.setdefault(partition, deque()).append(message.offset())
+        self._completed.setdefault(partition, set())
+
+    def complete(self, message: Message):
+        """
+        Mark a message as processed and advance its partition's committable offset.
+
+        Args:
+            message (Message): The Kafka message.
+        """
+        partition = (message.topic(), message.partition())
+        pending = self._pending.get(partition)
+
+        if pending is None:
+            return
+
+        completed = self._completed[partition]
+        completed.add(message.offset())
+
+        while pending and pending[0] in completed:
+            offset = pending.popleft()
+            completed.discard(offset)
+            self._committable[partition] = offset + 1
+
+    def commit(self, consumer: Consumer, asynchronous: bool = True):
+        """
+        Commit the offsets that advanced since the last commit.
+
+        Args:
+            consumer (Consumer): The Kafka consumer.
+            asynchronous (bool): Whether to return without waiting for the broker.
+        """
+        if not self._committable:
+            return
+
+        offsets = [
+            TopicPartition(topic, partition, offset)
+            for (topic, partition), offset in self._committable.items()
+        ]
+        consumer.commit(offsets=offsets, asynchronous=asynchronous)
+        self._committable = {}
+
+    def forget(self, partitions: list):
+        """
+        Drop the state of partitions that are no longer assigned to this consumer.
+
+        Args:
+            partitions (list): The revoked `TopicPartition` objects.
+        """
+        for partition in partitions:
+            key = (partition.topic, partition.partition)
+            self._pending.pop(key, None)
+            self._completed.pop(key, None)
+            self._committable.pop(key, None)
@@ -0,0 +1,71 @@
+import io
+import json
+from pathlib import Path
+from functools import lru_cache
+
+from fastavro import parse_schema, schemaless_reader
+
+import constants
+
+
+SCHEMAS_PATH = Path(__file__).parent / "schemas"
+
+
+@lru_cache(maxsize=None)
+def get_schema(version: str):
+    """
+    Load and parse the Avro schema of a task message version.
+
+    Args:
+        version (str): The schema version sent in the message headers.
+
+    Returns:
+        dict: The parsed schema.
+
+    Raises:
+        ValueError: If the schema version is unknown.
+    """
+    path = SCHEMAS_PATH / f"task_message.v{version}.avsc"
+
+    if not path.is_file():
+        raise ValueError(
+            constants.UNSUPPORTED_MESSAGE_FORMAT(
+                constants.MessageFormatEnum.AVRO.value, version
+            )
+        )
+
+    return parse_schema(json.loads(path.read_text()))
+
+
+def decode_message(value: bytes, headers: list = None) -> dict:
+    """
+    Decode a task message according to its `content-type` and `schema-version` headers.
+
+    Messages without headers are JSON, as produced before the header was introduced.
+
+    Args:
+        value (bytes): The message value.
+        headers (list, optional): The message headers as `(name, value)` pairs. Defaults to None.
+
+    Returns:
+        dict: The decoded message.
+
+    Raises:
+        ValueError: If the message format or schema version is not supported.
+    """
+    headers = {
+        name: header.decode("utf-8") if isinstance(header, bytes) else header
+        for name, header in headers or []
+    }
+    message_format = headers.get(
+        constants.KAFKA_CONTENT_TYPE_HEADER, constants.MessageFormatEnum.JSON.value
+    )
+    version = headers.get(constants.KAFKA_SCHEMA_VERSION_HEADER)
+
+    if message_format == constants.MessageFormatEnum.JSON:
+        return json.loads(value.decode("utf-8"))
+
+    if message_format == constants.MessageFormatEnum.AVRO and version:
+        return schemaless_reader(io.BytesIO(value), get_schema(version))
+
+    raise ValueError(constants.UNSUPPORTED_MESSAGE_FORMAT(message_format, version))
@@ -1,13 +1,24 @@
 import json
 import logging
 from datetime import datetime
-from concurrent.futures import ProcessPoolExecutor
+
+from confluent_kafka import KafkaException
 
 import constants
 from database.models import Task
 from tasks.manager import TaskManager
-from database.connection import create_session
-from kafka.consumer import create_consumer, consume
+from database.connection import get_pool_metrics, session_scope
+from pool import SupervisedPool
+from warmup import init_worker
+from scheduler import TaskScheduler
+from metrics import start_metrics_server
+from kafka.offsets import OffsetTracker
+from kafka.consumer import (
+    create_consumer,
+    consume,
+    read_claim_check,
+    release_claim_check,
+)
 
 
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
@@ -15,79 +26,276 @@ logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
 def process_task(message: dict):
     logging.info(constants.PROCESS_TASK_INIT_MESSAGE(message["task_id"]))
-    _, session = create_session()
 
-    task = session.query(Task).filter_by(id=message["task_id"]).first()
+    with session_scope() as session:
+        task = session.query(Task).filter_by(id=message["task_id"]).first()
 
-    if task.status_id == constants.TaskStatusIdEnum.COMPLETED:
-        logging.info(constants.PROCESS_ALREADY_COMPLETED(message["task_id"]))
-        return
+        if task is None:
+            logging.info(constants.PROCESS_TASK_NOT_FOUND(message["task_id"]))
+            release_claim_check(message.get("claim_check"))
+            return
 
-    if task.status_id == constants.TaskStatusIdEnum.FAILED:
-        logging.info(constants.PROCESS_ALREADY_FAILED(message["task_id"]))
-        return
+        if task.status_id == constants.TaskStatusIdEnum.COMPLETED:
+            logging.info(constants.PROCESS_ALREADY_COMPLETED(message["task_id"]))
+            release_claim_check(message.get("claim_check"))
+            return
+
+        if task.status_id == constants.TaskStatusIdEnum.FAILED:
+            logging.info(constants.PROCESS_ALREADY_FAILED(message["task_id"]))
+            release_claim_check(message.get("claim_check"))
+            return
+
+        task.status_id = constants.TaskStatusIdEnum.IN_PROGRESS.value
+        task.start_at = datetime.now()
+
+        session.commit()
+
+        result = None
+
+        try:
+            if message.get("error"):
+                raise Exception(message["error"])
+
+            if message.get("claim_check"):
+                message["data"] = read_claim_check(message["claim_check"])
+
+            task_manager = TaskManager(message, session)
+            result, error = task_manager.run()
+
+            if error:
+                raise Exception(error)
+
+            task.status_id = constants.TaskStatusIdEnum.COMPLETED.value
+            task.config = {**json.loads(task.config), "result": result}
+        except Exception as e:
+            logging.error(
+                constants.PROCESS_TASK_FAILED(message["task_id"]) + f" Error: {e}"
+            )
+
+            session.rollback()
+            task.status_id = constants.TaskStatusIdEnum.FAILED.value
+            task.config = {**json.loads(task.config), "error": str(e)}
+            if result:
+                task.config["result"] = result
+        finally:
+            task.end_at = datetime.now()
 
-    task.status_id = constants.TaskStatusIdEnum.IN_PROGRESS.value
-    task.start_at = datetime.now()
+        session.commit()
 
-    session.commit()
+    release_claim_check(message.get("claim_check"))
 
+    logging.info(constants.PROCESS_TASK_SUCCESS(message["task_id"]))
+    logging.info(constants.PROCESS_POOL_METRICS(get_pool_metrics()))
+
+
+def fail_task(task_id: int, error: str, claim_check: dict = None) -> bool:
+    """
+    Mark a task as failed from the supervising process.
+
+    Used when a task could not report its own failure, e.g. its child process
+    was killed or crashed.
+
+    Args:
+        task_id (int): The ID of the task.
+        error (str): The error stored in the task configuration.
+        claim_check (dict, optional): The claim check of the task message, deleted once the task is finished.
+
+    Returns:
+        bool: Whether the task was updated, or does not need to be (it is
+        already finished or no longer exists).
+    """
     try:
-        task_manager = TaskManager(message, session)
-        result, error = task_manager.run()
+        with session_scope() as session:
+            task = session.query(Task).filter_by(id=task_id).first()
+
+            if task is not None and task.status_id not in (
+                constants.TaskStatusIdEnum.COMPLETED,
+                constants.TaskStatusIdEnum.FAILED,
+            ):
+                task.status_id = constants.TaskStatusIdEnum.FAILED.value
+                task.config = {**json.loads(task.config), "error": error}
+                task.end_at = datetime.now()
+                session.commit()
 
-        if error:
-            raise Exception(error)
+        release_claim_check(claim_check)
 
-        task.status_id = constants.TaskStatusIdEnum.COMPLETED.value
-        task.config = {**json.loads(task.config), "result": result}
+        return True
     except Exception as e:
-        logging.error(
-            constants.PROCESS_TASK_FAILED(message["task_id"]) + f" Error: {e}"
-        )
+        logging.error(constants.PROCESS_TASK_FAILED(task_id) + f" Error: {e}")
+        return False
 
-        task.status_id = constants.TaskStatusIdEnum.FAILED.value
-        task.config = {**json.loads(task.config), "error": str(e)}
-    finally:
-        task.end_at = datetime.now()
 
-    session.commit()
+def complete_tasks(entries: list, tracker: OffsetTracker):
+    """
+    Mark the messages of finished tasks as completed.
+
+    A task that failed outside of its own error handling is marked as failed.
+    If that is not possible its message is left uncommitted, so it is
+    delivered again after a restart.
+
+    Args:
+        entries (list): The finished `InFlightTask` objects.
+        tracker (OffsetTracker): The offset tracker of the consumer.
+    """
+    for entry in entries:
+        if entry.error is not None:
+            logging.error(
+                constants.PROCESS_TASK_FAILED(entry.task["task_id"])
+                + f" Error: {entry.error!r}"
+            )
+            if not fail_task(
+                entry.task["task_id"],
+                repr(entry.error),
+                entry.task.get("claim_check"),
+            ):
+                continue
+
+        tracker.complete(entry.message)
 
-    logging.info(constants.PROCESS_TASK_SUCCESS(message["task_id"]))
+
+def reap_tasks(pool: SupervisedPool, tracker: OffsetTracker):
+    """
+    Collect the finished tasks of the pool and mark their messages as completed.
+
+    Args:
+        pool (SupervisedPool): The pool running the tasks.
+        tracker (OffsetTracker): The offset tracker of the consumer.
+    """
+    complete_tasks(pool.reap(), tracker)
+
+
+def drain_partitions(
+    consumer,
+    partitions: list,
+    pool: SupervisedPool,
+    scheduler: TaskScheduler,
+    tracker: OffsetTracker,
+):
+    """
+    Wait for the in-flight tasks of revoked partitions and commit their offsets.
+
+    Called before a rebalance hands the partitions to another worker, so the
+    new owner starts after the last finished task instead of running it again.
+    Tasks of the partitions that are still queued are dropped without running;
+    their offsets are not committed, so the new owner receives them.
+    A task stuck past its hard timeout is killed rather than waited for.
+
+    Args:
+        consumer (Consumer): The Kafka consumer.
+        partitions (list): The revoked `TopicPartition` objects.
+        pool (SupervisedPool): The pool running the tasks.
+        scheduler (TaskScheduler): The queue of tasks waiting for a process.
+        tracker (OffsetTracker): The offset tracker of the consumer.
+    """
+    revoked = {(partition.topic, partition.partition) for partition in partitions}
+
+    def is_revoked(message):
+        return (message.topic(), message.partition()) in revoked
+
+    discarded = scheduler.discard(is_revoked)
+    logging.info(constants.PARTITIONS_REVOKED(partitions, discarded))
+
+    if pool is not None:
+        complete_tasks(pool.wait(is_revoked), tracker)
+
+    try:
+        tracker.commit(consumer, asynchronous=False)
+    except KafkaException as e:
+        logging.error(e)
+
+    tracker.forget(partitions)
 
 
 def run():
     logging.info(constants.CONSUMER_START_MESSAGE)
-    consumer = create_consumer()
+    tracker = OffsetTracker()
+    scheduler = TaskScheduler()
+    pool = None
+    paused = False
+
+    def on_assign(consumer, partitions):
+        logging.info(constants.PARTITIONS_ASSIGNED(partitions))
+        if paused:
+            consumer.pause(partitions)
+
+    def on_revoke(consumer, partitions):
+        drain_partitions(consumer, partitions, pool, scheduler, tracker)
+
+    def on_lost(consumer, partitions):
+        tracker.forget(partitions)
+
+    consumer = create_consumer(
+        on_assign=on_assign, on_revoke=on_revoke, on_lost=on_lost
+    )
+    logging.info(
+        constants.CONSUMER_SUBSCRIBED_MESSAGE(
+            list(constants.KAFKA_TASK_TOPICS.values())
+        )
+    )
 
     if constants.USE_CONCURRENCE:
-        with ProcessPoolExecutor(max_workers=constants.WORKERS) as executor:
-            try:
-                for message in consume(consumer):
-                    executor.submit(process_task, message)
-            except KeyboardInterrupt:
-                pass
-            except Exception as e:
-                logging.error(
-                    constants.PROCESS_TASK_FAILED(message["task_id"]) + f" Error: {e}"
-                )
-            finally:
-                logging.info(constants.CONSUMER_CLOSE_MESSAGE)
-                consumer.close()
-            executor.shutdown(wait=True)
+        pool = SupervisedPool(process_task, initializer=init_worker)
+        start_metrics_server(
+            lambda: {**pool.metrics(), "queued": len(scheduler), "paused": int(paused)}
+        )
+
+        try:
+            for messages in consume(consumer):
+                for message, task in messages:
+                    tracker.track(message)
+                    if task is None:
+                        tracker.complete(message)
+                    else:
+                        scheduler.push(message, task)
+
+                reap_tasks(pool, tracker)
+                tracker.commit(consumer)
+
+                while scheduler and pool.available:
+                    pool.submit(*scheduler.pop())
+
+                if not paused and len(scheduler) >= constants.SCHEDULER_QUEUE_SIZE:
+                    consumer.pause(consumer.assignment())
+                    paused = True
+                    logging.info(constants.CONSUMER_PAUSED_MESSAGE(len(scheduler)))
+                elif paused and len(scheduler) < constants.SCHEDULER_QUEUE_SIZE:
+                    consumer.resume(consumer.assignment())
+                    paused = False
+                    logging.info(constants.CONSUMER_RESUMED_MESSAGE(len(scheduler)))
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            logging.error(e)
+        finally:
+            complete_tasks(pool.wait(), tracker)
+            tracker.commit(consumer, asynchronous=False)
+            logging.info(constants.CONSUMER_CLOSE_MESSAGE)
+            consumer.close()
+            pool.shutdown(wait=True)
 
         return
 
     try:
-        for message in consume(consumer):
-            process_task(message)
+        for messages in consume(consumer):
+            for message, task in messages:
+                tracker.track(message)
+                if task is None:
+                    tracker.complete(message)
+                else:
+                    scheduler.push(message, task)
+
+            while scheduler:
+                message, task = scheduler.pop()
+                process_task(task)
+                tracker.complete(message)
+
+            tracker.commit(consumer)
     except KeyboardInterrupt:
         pass
     except Exception as e:
-        logging.error(
-            constants.PROCESS_TASK_FAILED(message["task_id"]) + f" Error: {e}"
-        )
+        logging.error(e)
     finally:
+        tracker.commit(consumer, asynchronous=False)
         logging.info(constants.CONSUMER_CLOSE_MESSAGE)
         consumer.close()
 
@@ -0,0 +1,55 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import constants
+
+
+def format_metrics(metrics: dict) -> str:
+    """
+    Format a flat dictionary of metrics in the Prometheus text format.
+
+    Args:
+        metrics (dict): The metric names mapped to their numeric values.
+
+    Returns:
+        str: One `worker_<name> <value>` line per metric.
+    """
+    return "".join(
+        f"{constants.METRICS_PREFIX}{name} {float(value)}\n"
+        for name, value in metrics.items()
+    )
+
+
+def start_metrics_server(collect, port: int = constants.METRICS_PORT):
+    """
+    Serve the worker metrics on `/metrics` from a daemon thread.
+
+    Args:
+        collect (callable): Returns the current metrics as a flat dictionary.
+        port (int): The port to listen on. 0 disables the server.
+
+    Returns:
+        ThreadingHTTPServer: The running server, or None if disabled.
+    """
+    if not port:
+        return None
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+
+            body = format_metrics(collect()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
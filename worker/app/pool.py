@@ -0,0 +1,325 @@
+import math
+import time
+import signal
+import logging
+import resource
+from dataclasses import dataclass
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import constants
+
+
+class TaskTimeoutError(TimeoutError):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise TaskTimeoutError(constants.TASK_TIMED_OUT)
+
+
+def _current_rss_mb():
+    """
+    Return the resident set size of the current process in MB.
+    """
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def _run_task(fn, task: dict, timeout: float):
+    """
+    Run a task in a child process under a soft timeout.
+
+    When the timeout expires a `TaskTimeoutError` is raised inside the task,
+    so its own error handling marks it as failed.
+
+    Returns:
+        float: The RSS of the child process after the task, in MB.
+    """
+    if timeout:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(math.ceil(timeout))
+
+    try:
+        fn(task)
+    finally:
+        signal.alarm(0)
+
+    return _current_rss_mb()
+
+
+@dataclass
+class InFlightTask:
+    """
+    A task submitted to the pool.
+
+    Attributes:
+        message (Message): The Kafka message of the task.
+        task (dict): The fixed task message.
+        submitted_at (float): Monotonic time of the submission.
+        attempts (int): Number of previous submissions lost to a broken pool.
+        timed_out (bool): Whether the task was killed for exceeding its hard timeout.
+        error (Exception): The error the task finished with, if any.
+    """
+
+    message: object
+    task: dict
+    submitted_at: float
+    attempts: int = 0
+    timed_out: bool = False
+    error: Exception = None
+
+
+class SupervisedPool:
+    """
+    Process pool that supervises the tasks it runs.
+
+    - Every future is tracked and its outcome reported by `reap`.
+    - Each task type has a timeout: a soft one raised inside the task and a
+      hard one, `TASK_TIMEOUT_GRACE` seconds later, that kills the children.
+    - Children are replaced after `max_tasks_per_child` tasks, and the whole
+      pool is recycled once a child grows past `max_rss_mb`.
+    - A `BrokenProcessPool` (a child killed or crashed) restarts the pool and
+      resubmits the lost tasks up to `max_retries` times.
+
+    Args:
+        fn (callable): The function run for each task, called with the task message.
+        max_workers (int): The number of child processes.
+        initializer (callable, optional): Called in each child when it starts.
+        timeouts (dict): The timeout in seconds of each task type.
+        max_tasks_per_child (int): Tasks a child runs before it is replaced. 0 disables it.
+        max_rss_mb (float): RSS in MB past which the pool is recycled. 0 disables it.
+        max_retries (int): Times a task lost to a broken pool is resubmitted.
+    """
+
+    def __init__(
+        self,
+        fn,
+        max_workers: int = constants.WORKERS,
+        initializer=None,
+        timeouts: dict = constants.TASK_TIMEOUTS,
+        max_tasks_per_child: int = constants.WORKER_MAX_TASKS_PER_CHILD,
+        max_rss_mb: float = constants.WORKER_MAX_CHILD_RSS_MB,
+        max_retries: int = constants.WORKER_MAX_TASK_RETRIES,
+    ):
+        self.fn = fn
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.timeouts = timeouts
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_rss_mb = max_rss_mb
+        self.max_retries = max_retries
+        self.stats = {
+            "submitted": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "retried": 0,
+            "restarts": 0,
+            "recycles": 0,
+            "max_child_rss_mb": 0.0,
+        }
+        self._in_flight = {}
+        self._recycling = False
+        self._executor = self._create_executor()
+
+    def _create_executor(self):
+        # `max_tasks_per_child` is not supported with the `fork` start method.
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=get_context("spawn"),
+            initializer=self.initializer,
+            max_tasks_per_child=self.max_tasks_per_child or None,
+        )
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    @property
+    def available(self):
+        """
+        Whether the pool accepts a new task without queueing it behind a busy child.
+        """
+        return not self._recycling and len(self._in_flight) < self.max_workers
+
+    def submit(self, message, task: dict, attempts: int = 0):
+        """
+        Submit a task to the pool.
+
+        Args:
+            message (Message): The Kafka message of the task.
+            task (dict): The fixed task message.
+            attempts (int, optional): Previous submissions lost to a broken pool. Defaults to 0.
+        """
+        timeout = self.timeouts.get(task["task"])
+        future = self._executor.submit(_run_task, self.fn, task, timeout)
+        self._in_flight[future] = InFlightTask(
+            message, task, time.monotonic(), attempts
+        )
+        self.stats["submitted"] += 1
+
+    def wait(self, predicate=None, poll_interval: float = 1.0):
+        """
+        Wait for the in-flight tasks whose Kafka message matches the predicate.
+
+        The pool keeps being supervised while waiting: a task stuck past its
+        hard timeout gets its children killed, so the wait never outlasts the
+        timeout of the tasks plus `TASK_TIMEOUT_GRACE` (and their retries).
+
+        Args:
+            predicate (callable, optional): Receives a Kafka message. Defaults to every task.
+            poll_interval (float): Seconds between two supervision rounds.
+
+        Returns:
+            list: The `InFlightTask` objects that finished while waiting, as returned by `reap`.
+        """
+        finished = []
+
+        while True:
+            futures = [
+                future
+                for future, entry in self._in_flight.items()
+                if predicate is None or predicate(entry.message)
+            ]
+            if not futures:
+                return finished
+
+            wait(futures, timeout=poll_interval)
+            finished.extend(self.reap())
+
+    def reap(self):
+        """
+        Collect the finished tasks and supervise the running ones.
+
+        Tasks lost to a broken pool are resubmitted and are not reported
+        until they finish or run out of retries.
+
+        Returns:
+            list: The finished `InFlightTask` objects; `error` is set for the failed ones.
+        """
+        self._kill_expired_tasks()
+
+        done, _ = wait(list(self._in_flight), timeout=0)
+        finished = []
+        lost = []
+
+        for future in done:
+            entry = self._in_flight.pop(future)
+            try:
+                rss = future.result()
+                self.stats["succeeded"] += 1
+                self.stats["max_child_rss_mb"] = max(
+                    self.stats["max_child_rss_mb"], rss
+                )
+                if self.max_rss_mb and rss > self.max_rss_mb:
+                    self._recycling = True
+                finished.append(entry)
+            except BrokenProcessPool as e:
+                entry.error = e
+                lost.append(entry)
+            except Exception as e:
+                entry.error = e
+                self.stats["failed"] += 1
+                finished.append(entry)
+
+        if lost:
+            finished.extend(self._restart(lost))
+        elif self._recycling and not self._in_flight:
+            logging.info(constants.POOL_RECYCLING(self.max_rss_mb))
+            self.stats["recycles"] += 1
+            self._replace_executor()
+
+        return finished
+
+    def _kill_expired_tasks(self):
+        """
+        Kill the children when a task outlives its soft timeout plus the grace period.
+
+        A task stuck in native code never sees the soft timeout; killing the
+        children breaks the pool and `reap` restarts it.
+        """
+        now = time.monotonic()
+        expired = [
+            entry
+            for entry in self._in_flight.values()
+            if self.timeouts.get(entry.task["task"])
+            and now - entry.submitted_at
+            > self.timeouts[entry.task["task"]] + constants.TASK_TIMEOUT_GRACE
+        ]
+
+        if not expired:
+            return
+
+        for entry in expired:
+            entry.timed_out = True
+            logging.error(constants.TASK_KILLED(entry.task["task_id"]))
+
+        # The executor does not expose its children; `_processes` is the only handle.
+        for process in list(self._executor._processes.values()):
+            process.kill()
+
+    def _restart(self, lost: list):
+        """
+        Replace a broken executor and resubmit the tasks it lost.
+
+        Args:
+            lost (list): The `InFlightTask` objects whose futures failed with `BrokenProcessPool`.
+
+        Returns:
+            list: The lost tasks that are not resubmitted, with their error set.
+        """
+        logging.error(constants.POOL_BROKEN(len(lost)))
+        self.stats["restarts"] += 1
+
+        # Every other future of the broken executor fails as well.
+        for future, entry in list(self._in_flight.items()):
+            if not future.done() or future.exception() is not None:
+                self._in_flight.pop(future)
+                lost.append(entry)
+
+        self._replace_executor()
+        given_up = []
+
+        for entry in lost:
+            if entry.timed_out:
+                entry.error = TaskTimeoutError(constants.TASK_TIMED_OUT)
+                self.stats["timed_out"] += 1
+                given_up.append(entry)
+            elif entry.attempts >= self.max_retries:
+                self.stats["failed"] += 1
+                given_up.append(entry)
+            else:
+                self.stats["retried"] += 1
+                self.submit(entry.message, entry.task, entry.attempts + 1)
+
+        return given_up
+
+    def _replace_executor(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+        self._recycling = False
+
+    def metrics(self):
+        """
+        Return the health of the pool.
+
+        Returns:
+            dict: Children, running tasks, recycling state and the task counters.
+        """
+        return {
+            "workers": self.max_workers,
+            "in_flight": len(self._in_flight),
+            "recycling": int(self._recycling),
+            **self.stats,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Shut down the executor.
+
+        Args:
+            wait (bool): Whether to wait for the running tasks.
+        """
+        self._executor.shutdown(wait=wait)
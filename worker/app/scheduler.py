@@ -0,0 +1,119 @@
+import heapq
+import itertools
+import threading
+import time
+
+import constants
+
+
+class TaskScheduler:
+    """
+    Local queue between the Kafka consumer and the process pool.
+
+    Task types are served with weighted fair queuing: each type has a virtual
+    time that advances by `1 / weight` every time one of its tasks is
+    dispatched, and the backlogged type with the lowest virtual time goes next.
+    A type that was idle joins at the current virtual time, so it cannot bank
+    credit while empty.
+
+    Within a type, tasks are ordered by `priority` (higher first). Waiting
+    tasks age by one priority level every `aging_seconds`, so low priority
+    tasks are never starved by a steady stream of urgent ones.
+
+    The number of queued tasks is kept in a counter updated under a lock, so
+    `len()` is safe to call from the metrics server thread.
+
+    Args:
+        weights (dict): The weight of each task type. Unknown types get weight 1.
+        aging_seconds (float): Seconds a task waits to gain one priority level.
+    """
+
+    def __init__(
+        self,
+        weights: dict = constants.TASK_TYPE_WEIGHTS,
+        aging_seconds: float = constants.TASK_AGING_SECONDS,
+    ):
+        self.weights = weights
+        self.aging_seconds = aging_seconds
+        self._queues = {}
+        self._virtual_times = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._size
+
+    def push(self, message, task: dict):
+        """
+        Queue a task.
+
+        Args:
+            message (Message): The Kafka message of the task.
+            task (dict): The fixed task message.
+        """
+        task_type = task["task"]
+        priority = task.get("priority", constants.TASK_PRIORITY_DEFAULT)
+        # The effective priority is `priority + waited / aging_seconds`; without the
+        # `now / aging_seconds` term shared by every queued task, the rank is fixed.
+        rank = priority - time.monotonic() / self.aging_seconds
+
+        with self._lock:
+            queue = self._queues.setdefault(task_type, [])
+
+            if not queue:
+                self._virtual_times[task_type] = max(
+                    self._virtual_times.get(task_type, 0.0), self._virtual_time
+                )
+
+            heapq.heappush(queue, (-rank, next(self._sequence), message, task))
+            self._size += 1
+
+    def pop(self):
+        """
+        Dequeue the next task to run.
+
+        Returns:
+            tuple: The Kafka message and the fixed task message, or None if the scheduler is empty.
+        """
+        with self._lock:
+            backlogged = [
+                task_type for task_type, queue in self._queues.items() if queue
+            ]
+
+            if not backlogged:
+                return None
+
+            task_type = min(backlogged, key=lambda name: self._virtual_times[name])
+            _, _, message, task = heapq.heappop(self._queues[task_type])
+            self._size -= 1
+
+            self._virtual_time = self._virtual_times[task_type]
+            self._virtual_times[task_type] += 1 / self.weights.get(task_type, 1)
+
+        return message, task
+
+    def discard(self, predicate):
+        """
+        Remove the queued tasks whose Kafka message matches the predicate.
+
+        Args:
+            predicate (callable): Receives a Kafka message and returns whether to remove its task.
+
+        Returns:
+            int: The number of removed tasks.
+        """
+        removed = 0
+
+        with self._lock:
+            for task_type, queue in self._queues.items():
+                kept = [entry for entry in queue if not predicate(entry[2])]
+                removed += len(queue) - len(kept)
+                heapq.heapify(kept)
+                self._queues[task_type] = kept
+
+            self._size -= removed
+
+        return removed
@@ -0,0 +1,67 @@
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+
+import constants
+from aws.s3 import delete
+from aws.transfer import S3RangeReader, download_fileobj
+
+
+@contextmanager
+def open_object(reference: dict, ranged: bool = False):
+    """
+    Open an object referenced by a task message for binary reading.
+
+    Objects in the local store are read in place; S3 objects are first
+    downloaded to a temporary file that is removed afterwards, with parallel
+    ranged GETs, so the content is never held in memory. With `ranged`, S3
+    objects are not downloaded: each read fetches only the requested bytes,
+    for readers that only need parts of the object.
+
+    Args:
+        reference (dict): The `storage`, `bucket` and `key` of the object.
+        ranged (bool): Whether to read S3 objects with ranged GETs on demand.
+
+    Yields:
+        file: A seekable binary file object.
+
+    Raises:
+        FileNotFoundError: If the object does not exist.
+    """
+    if reference["storage"] == constants.ObjectStorageEnum.LOCAL:
+        path = Path(constants.OBJECT_STORE_ROOT) / reference["key"]
+        if not path.is_file():
+            raise FileNotFoundError(constants.OBJECT_NOT_FOUND(reference["key"]))
+        with open(path, "rb") as fileobj:
+            yield fileobj
+        return
+
+    if ranged:
+        with S3RangeReader(reference["bucket"], reference["key"]) as fileobj:
+            yield fileobj
+        return
+
+    with tempfile.TemporaryFile() as fileobj:
+        if not download_fileobj(reference["bucket"], reference["key"], fileobj):
+            raise FileNotFoundError(constants.OBJECT_NOT_FOUND(reference["key"]))
+        fileobj.seek(0)
+        yield fileobj
+
+
+def delete_object(reference: dict):
+    """
+    Delete an object referenced by a task message.
+
+    Deleting an object that does not exist is not an error.
+
+    Args:
+        reference (dict): The `storage`, `bucket` and `key` of the object.
+
+    Returns:
+        bool: True if the object no longer exists, False otherwise.
+    """
+    if reference["storage"] == constants.ObjectStorageEnum.LOCAL:
+        (Path(constants.OBJECT_STORE_ROOT) / reference["key"]).unlink(missing_ok=True)
+        return True
+
+    return delete(reference["bucket"], reference["key"])
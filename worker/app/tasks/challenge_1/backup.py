@@ -1,74 +1,713 @@
-import pandas as pd
-from io import BytesIO
+import json
+import hashlib
+import logging
+from itertools import groupby
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
-from aws.s3 import upload
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import select, extract, text, Integer, String, DateTime
+from sqlalchemy.orm import Session
+
+from aws.s3 import delete, object_exists
+from aws.transfer import S3MultipartWriter, copy_object
+from database.connection import get_engine, get_free_connections
+from tasks.challenge_1.catalog import (
+    get_manifest_key,
+    get_object_key,
+    get_table_path,
+    load_catalog,
+    new_backup_id,
+    save_catalog,
+    save_json,
+)
+from tasks.challenge_1.tables import resolve_tables
 
 import constants
 
 
-def df_to_parquet(df):
+ARROW_TYPES = {
+    Integer: pa.int64(),
+    String: pa.string(),
+    DateTime: pa.timestamp("us"),
+}
+
+PARTITION_KEYS = ("year", "quarter")
+
+
+def get_arrow_schema(model):
+    """
+    Build the Parquet schema of a table from its model columns.
+
+    Args:
+        model: The SQLAlchemy model of the table.
+
+    Returns:
+        pyarrow.Schema: One field per column, in table order.
+    """
+    return pa.schema(
+        [
+            pa.field(column.name, ARROW_TYPES[type(column.type)], column.nullable)
+            for column in model.__table__.columns
+        ]
+    )
+
+
+def get_schema_hash(schema):
+    """
+    Return a stable hash of the column names, types and nullability of a schema.
+
+    Args:
+        schema (pyarrow.Schema): The schema.
+
+    Returns:
+        str: The hex SHA-256 of the schema.
+    """
+    fields = [[field.name, str(field.type), field.nullable] for field in schema]
+    return hashlib.sha256(json.dumps(fields).encode("utf-8")).hexdigest()
+
+
+def get_write_horizon(connection):
+    """
+    Return the start of the oldest transaction still running, or the current time.
+
+    `updated_at` is set to the start of the writing transaction, so a row
+    stamped before the horizon was written by a transaction that had already
+    finished. Read before a backup's snapshot is taken, every row stamped
+    before the horizon is in the snapshot.
+
+    Args:
+        connection: A connection outside of the backup's snapshot.
+
+    Returns:
+        datetime: The horizon, in the time zone of `updated_at`.
+    """
+    return connection.execute(
+        text(
+            "SELECT least(clock_timestamp(), min(xact_start))::timestamp "
+            "FROM pg_stat_activity "
+            "WHERE xact_start IS NOT NULL AND pid <> pg_backend_pid()"
+        )
+    ).scalar_one()
+
+
+def get_changed_rows_filter(model, since):
+    """
+    Build the filter of the rows changed since a watermark.
+
+    The watermark is the write horizon of the previous backup, so a row
+    written by a transaction that committed after that backup is always at
+    or past it. The filter can use the index on `updated_at`.
+
+    Args:
+        model: The SQLAlchemy model of the table.
+        since (dict): The `updated_at` watermark of the previous backup.
+
+    Returns:
+        The SQLAlchemy filter.
+    """
+    return model.updated_at >= datetime.fromisoformat(since["updated_at"])
+
+
+def stream_batches(
+    model,
+    session,
+    where=None,
+    order_by=None,
+    batch_size=constants.BACKUP_BATCH_SIZE,
+    columns=None,
+):
+    """
+    Stream the rows of a table in batches from a server-side cursor.
+
+    Only column tuples are fetched, no ORM objects are built, and at most
+    `batch_size` rows are held in memory at a time.
+
+    Args:
+        model: The SQLAlchemy model of the table.
+        session: The database session.
+        where (optional): A filter on the rows. Defaults to every row.
+        order_by (list, optional): Expressions the rows are sorted by before the primary key.
+        batch_size (int): The number of rows per batch.
+        columns (list, optional): The columns to read. Defaults to every column.
+
+    Yields:
+        list: The rows of the batch, as tuples in column order.
+    """
+    statement = select(*(columns or model.__table__.columns))
+    if where is not None:
+        statement = statement.where(where)
+
+    result = session.execute(
+        statement.order_by(
+            *(order_by or []), *model.__table__.primary_key.columns
+        ).execution_options(stream_results=True, yield_per=batch_size)
+    )
+    for rows in result.partitions():
+        yield rows
+
+
+def rows_to_record_batch(rows, schema):
+    """
+    Convert a batch of row tuples to an Arrow record batch.
+
+    Args:
+        rows (list): The rows, as tuples in schema order.
+        schema (pyarrow.Schema): The schema of the table.
+
+    Returns:
+        pyarrow.RecordBatch: The columnar batch.
+    """
+    columns = zip(*rows)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def get_partition_values(value):
+    """
+    Return the Hive partition of a hire date: its year and quarter.
+
+    Args:
+        value (datetime): The value of the partition column.
+
+    Returns:
+        tuple: The `(key, value)` pairs of the partition.
+    """
+    return tuple(zip(PARTITION_KEYS, (value.year, (value.month - 1) // 3 + 1)))
+
+
+def get_partition_path(partition):
+    """
+    Return the Hive path of a partition, e.g. `year=2021/quarter=3`.
+    """
+    return "/".join(f"{key}={value}" for key, value in partition)
+
+
+def get_partitioning(table_name, model):
+    """
+    Return how the backup files of a table are partitioned.
+
+    Tables listed in `BACKUP_PARTITION_COLUMNS` are written as one file per
+    year and quarter of that column; the rows are sorted by partition so each
+    file is written in one go.
+
+    Args:
+        table_name (str): The name of the table.
+        model: The SQLAlchemy model of the table.
+
+    Returns:
+        tuple: The expressions to sort the rows by and a function returning the
+        partition of a row, or `([], None)` for a single unpartitioned file.
+    """
+    column_name = constants.BACKUP_PARTITION_COLUMNS.get(table_name)
+    if column_name is None:
+        return [], None
+
+    column = model.__table__.columns[column_name]
+    index = list(model.__table__.columns).index(column)
+
+    def partition_of(row):
+        return get_partition_values(row[index])
+
+    return [extract("year", column), extract("quarter", column)], partition_of
+
+
+def split_partitions(batches, schema, partition_of=None):
+    """
+    Convert batches of rows to record batches, split where the partition changes.
+
+    Args:
+        batches: An iterable of row batches, sorted by partition.
+        schema (pyarrow.Schema): The schema of the table.
+        partition_of (callable, optional): Returns the partition of a row. Defaults to no partitioning.
+
+    Yields:
+        tuple: The partition and the record batch of its rows.
+    """
+    for rows in batches:
+        if partition_of is None:
+            yield (), rows_to_record_batch(rows, schema)
+            continue
+
+        for partition, group in groupby(rows, key=partition_of):
+            yield partition, rows_to_record_batch(list(group), schema)
+
+
+def to_json_value(value):
+    """
+    Convert a statistic to a JSON value; timestamps become ISO 8601 strings.
+    """
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def get_row_group_stats(batch):
     """
-    Converts a pandas DataFrame to a Parquet file format.
+    Compute the statistics of a row group recorded in the backup manifest.
 
     Args:
-        df (pandas.DataFrame): The DataFrame to be converted.
+        batch (pyarrow.RecordBatch): The rows of the row group.
 
     Returns:
-        bytes: The Parquet file content as bytes.
+        dict: The number of `rows` and the `min`, `max` and `null_count` of each column.
+    """
+    columns = {}
+
+    for field, column in zip(batch.schema, batch.columns):
+        min_max = pc.min_max(column).as_py()
+        columns[field.name] = {
+            "min": to_json_value(min_max["min"]),
+            "max": to_json_value(min_max["max"]),
+            "null_count": column.null_count,
+        }
+
+    return {"rows": batch.num_rows, "columns": columns}
+
+
+class BackupFileWriter:
     """
-    output = BytesIO()
-    df.to_parquet(output, index=False)
-    return output.getvalue()
+    Writes one file of a backup as Parquet row groups into a multipart upload.
 
+    Each record batch becomes one row group, whose statistics are kept for the
+    manifest. Dictionary encoding is only used for the columns listed in
+    `BACKUP_DICTIONARY_COLUMNS`; IDs and timestamps are mostly unique and
+    would only grow the file.
 
-def get_all_data(table_name, session):
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        table_name (str): The name of the table.
+        upload_name (str): The key the file is uploaded to before it is content-addressed.
+        schema (pyarrow.Schema): The schema of the table.
+        partition (tuple): The `(key, value)` pairs of the partition of the file.
+        use_dictionary (bool | list, optional): The columns to dictionary encode.
+            Defaults to the `BACKUP_DICTIONARY_COLUMNS` of the table.
     """
-    Retrieve all data from the specified table.
+
+    def __init__(
+        self,
+        bucket_name,
+        table_name,
+        upload_name,
+        schema,
+        partition=(),
+        use_dictionary=None,
+    ):
+        self.bucket_name = bucket_name
+        self.table_name = table_name
+        self.upload_name = upload_name
+        self.partition = partition
+        self.row_groups = []
+        self._stream = S3MultipartWriter(bucket_name, upload_name)
+        self._writer = pq.ParquetWriter(
+            self._stream,
+            schema,
+            compression="snappy",
+            use_dictionary=(
+                constants.BACKUP_DICTIONARY_COLUMNS.get(table_name, False)
+                if use_dictionary is None
+                else use_dictionary
+            ),
+        )
+
+    def write(self, batch):
+        self._writer.write_batch(batch, row_group_size=batch.num_rows)
+        self.row_groups.append(get_row_group_stats(batch))
+
+    def close(self):
+        """
+        Complete the upload and move the file to its content-addressed key.
+
+        Returns:
+            dict: The manifest entry of the file, or None if it could not be stored.
+        """
+        self._writer.close()
+        self._stream.close()
+
+        object_name = store_content_addressed(
+            self.bucket_name, self.upload_name, self.table_name, self._stream.sha256
+        )
+        if object_name is None:
+            return None
+
+        ids = [row_group["columns"]["id"] for row_group in self.row_groups]
+        return {
+            "path": get_partition_path(self.partition),
+            "partition": dict(self.partition),
+            "object": {
+                "key": object_name,
+                "sha256": self._stream.sha256,
+                "size": self._stream.tell(),
+            },
+            "rows": sum(row_group["rows"] for row_group in self.row_groups),
+            "min_id": min(stats["min"] for stats in ids),
+            "max_id": max(stats["max"] for stats in ids),
+            "row_groups": self.row_groups,
+        }
+
+    def abort(self):
+        self._stream.abort()
+
+
+def store_content_addressed(bucket_name, upload_name, table_name, sha256):
+    """
+    Move an uploaded backup file to its content-addressed key.
+
+    A file identical to one already stored is not copied again.
 
     Args:
+        bucket_name (str): The name of the S3 bucket.
+        upload_name (str): The key the file was uploaded to.
         table_name (str): The name of the table.
+        sha256 (str): The hex SHA-256 of the file.
+
+    Returns:
+        str: The content-addressed key, or None if the copy failed.
+    """
+    object_name = get_object_key(table_name, sha256)
+
+    if not object_exists(bucket_name, object_name):
+        if not copy_object(bucket_name, upload_name, object_name):
+            return None
+
+    delete(bucket_name, upload_name)
+    return object_name
+
+
+def write_key_files(model, session, bucket_name, table_name, backup_id):
+    """
+    Write the primary keys of every row of a table as a backup file.
+
+    Incremental backups do not see deleted rows; the keys of the live rows
+    let a restore drop the rows deleted since the earlier backups of its chain.
+
+    Args:
+        model: The SQLAlchemy model of the table.
         session: The database session.
+        bucket_name (str): The name of the S3 bucket.
+        table_name (str): The name of the table.
+        backup_id (str): The ID of the backup.
 
     Returns:
-        list: A list of all data retrieved from the table.
+        list: The manifest entries of the key files, empty for an empty table,
+        or None if they could not be stored.
     """
-    model = constants.BASE_CHALLENGE_1_CONFIG_MAP[table_name]["model"]
-    return session.query(model).all()
+    columns = list(model.__table__.primary_key.columns)
+    schema = pa.schema(
+        [(column.name, ARROW_TYPES[type(column.type)]) for column in columns]
+    )
+    writer = None
+
+    try:
+        for rows in stream_batches(model, session, columns=columns):
+            if writer is None:
+                writer = BackupFileWriter(
+                    bucket_name,
+                    table_name,
+                    f"{get_table_path(table_name)}/uploads/{backup_id}-keys.parquet",
+                    schema,
+                    use_dictionary=False,
+                )
+            writer.write(rows_to_record_batch(rows, schema))
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+
+    if writer is None:
+        return []
+    file = writer.close()
+    if file is None:
+        return None
+    return [{**file, "schema_hash": get_schema_hash(schema)}]
 
 
-def send_data_to_s3(data, table_name, bucket_name):
+def send_table_to_s3(
+    table_name,
+    session,
+    bucket_name,
+    backup_type=constants.BackupTypeEnum.FULL.value,
+    backup_id=None,
+    horizon=None,
+):
     """
-    Sends the given data to an S3 bucket.
+    Streams a table to an S3 bucket as a Parquet multipart upload and records it in the catalog.
+
+    A full backup writes every row. An incremental backup writes only the rows
+    changed since the watermark of the previous backup, plus the keys of every
+    live row so restores can drop deleted ones. It falls back to a full backup
+    when the table has no backup with a watermark to build on.
+
+    Partitioned tables are written as one file per Hive partition, the others
+    as a single file. Each file is stored under the SHA-256 of its content.
+    The manifest lists the files with their partition, checksum, row counts,
+    ID range and the statistics of each row group.
 
     Args:
-        data: The data to be sent.
-        table_name: The name of the table associated with the data.
+        table_name: The name of the table to back up.
+        session: The database session.
         bucket_name: The name of the S3 bucket.
+        backup_type (str): `full` or `incremental`. Defaults to `full`.
+        backup_id (str, optional): The ID of the backup. Defaults to a new one.
+        horizon (datetime, optional): The write horizon read before the snapshot,
+            the watermark of the next incremental backup. Without it the next
+            incremental backup is a full one.
 
     Returns:
-        The result of the upload operation.
+        dict: The manifest of the backup, or None if it could not be stored.
 
     """
-    return upload(data, bucket_name, f"{constants.S3_BACKUP_PATH}/{table_name}.parquet")
+    model = constants.BASE_CHALLENGE_1_CONFIG_MAP[table_name]["model"]
+    schema = get_arrow_schema(model)
+    catalog = load_catalog(bucket_name, table_name)
+    parent = catalog["backups"][-1] if catalog["backups"] else None
+
+    since = None
+    if backup_type == constants.BackupTypeEnum.INCREMENTAL:
+        # watermarks recorded before the write horizon existed cannot be trusted
+        if parent and (parent.get("watermark") or {}).get("horizon"):
+            since = parent["watermark"]
+        else:
+            logging.warning(constants.BACKUP_INCREMENTAL_WITHOUT_BASE(table_name))
+            backup_type = constants.BackupTypeEnum.FULL.value
+
+    backup_id = backup_id or new_backup_id()
+    watermark = None
+    if horizon is not None:
+        watermark = {
+            "updated_at": horizon.isoformat(timespec="microseconds"),
+            "horizon": True,
+        }
+    order_by, partition_of = get_partitioning(table_name, model)
+    batches = stream_batches(
+        model,
+        session,
+        get_changed_rows_filter(model, since) if since else None,
+        order_by,
+    )
+
+    files = []
+    writer = None
+    try:
+        for partition, batch in split_partitions(batches, schema, partition_of):
+            if writer is None or writer.partition != partition:
+                if writer is not None:
+                    files.append(writer.close())
+                upload_name = f"{get_table_path(table_name)}/uploads/{backup_id}"
+                writer = BackupFileWriter(
+                    bucket_name,
+                    table_name,
+                    f"{upload_name}-{len(files)}.parquet",
+                    schema,
+                    partition,
+                )
+            writer.write(batch)
+
+        if writer is not None:
+            files.append(writer.close())
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+
+    if None in files:
+        return None
+
+    keys = None
+    if since:
+        keys = write_key_files(model, session, bucket_name, table_name, backup_id)
+        if keys is None:
+            return None
+
+    manifest = {
+        "id": backup_id,
+        "table_name": table_name,
+        "type": backup_type,
+        "parent": parent["id"] if parent else None,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "schema_hash": get_schema_hash(schema),
+        "columns": schema.names,
+        "partitioning": list(PARTITION_KEYS) if partition_of else [],
+        "rows": sum(file["rows"] for file in files),
+        "min_id": min((file["min_id"] for file in files), default=None),
+        "max_id": max((file["max_id"] for file in files), default=None),
+        "since": since,
+        "watermark": watermark,
+        "files": files,
+        "keys": keys,
+    }
+    manifest_name = get_manifest_key(table_name, backup_id)
+    if not save_json(bucket_name, manifest_name, manifest):
+        return None
+
+    catalog["backups"].append(
+        {
+            "id": backup_id,
+            "type": backup_type,
+            "created_at": manifest["created_at"],
+            "manifest": manifest_name,
+            "watermark": watermark,
+        }
+    )
+    if not save_catalog(bucket_name, catalog):
+        return None
+    return manifest
+
+
+def open_snapshot_connection(snapshot_id=None):
+    """
+    Open a read-only `REPEATABLE READ` connection, optionally on an exported snapshot.
+
+    Args:
+        snapshot_id (str, optional): A snapshot exported by `pg_export_snapshot`.
+
+    Returns:
+        sqlalchemy.engine.Connection: The connection, with its transaction begun.
+    """
+    connection = (
+        get_engine()
+        .connect()
+        .execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+    )
+    connection.begin()
+    if snapshot_id is not None:
+        connection.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'"))
+    return connection
+
+
+def backup_in_snapshot(
+    table_name, snapshot_id, bucket_name, backup_type, backup_id, horizon
+):
+    """
+    Back up a table on its own connection, reading the given snapshot.
+
+    Returns:
+        dict: The manifest of the backup, or None if it could not be stored.
+    """
+    with open_snapshot_connection(snapshot_id) as connection:
+        with Session(bind=connection) as session:
+            return send_table_to_s3(
+                table_name, session, bucket_name, backup_type, backup_id, horizon
+            )
+
+
+@contextmanager
+def lock_catalogs(tables):
+    """
+    Hold a session-level advisory lock on the catalog of each table.
+
+    Backups of a table read its catalog, pick their parent and append
+    themselves to it, so two concurrent backups of the same table would drop
+    each other's entry. The locks are taken in name order, on their own
+    connection and before any snapshot, so a backup always sees the catalog
+    entries of the backups before it and never builds on a newer snapshot
+    than its own.
+
+    Args:
+        tables (list): The names of the tables.
+
+    Yields:
+        sqlalchemy.engine.Connection: The connection holding the locks.
+    """
+    with get_engine().connect() as connection:
+        try:
+            for table_name in sorted(tables):
+                connection.execute(
+                    text("SELECT pg_advisory_lock(hashtext(:key))"),
+                    {"key": f"{constants.BACKUP_LOCK_PREFIX}{table_name}"},
+                )
+            connection.commit()
+            yield connection
+        finally:
+            # session-level locks outlive the transaction and the pooled connection
+            connection.execute(text("SELECT pg_advisory_unlock_all()"))
+            connection.commit()
+
+
+def backup_tables(
+    tables,
+    bucket_name,
+    backup_type=constants.BackupTypeEnum.FULL.value,
+    max_workers=constants.MAINTENANCE_PARALLEL_TABLES,
+):
+    """
+    Back up several tables concurrently from one consistent snapshot.
+
+    A transaction exports its snapshot with `pg_export_snapshot` and stays open
+    while every table is streamed by its own thread and connection, importing
+    that snapshot. The backups see the database at the same instant, so the
+    foreign keys between them hold, and they share one backup ID. At most
+    `max_workers` tables are streamed at once, fewer if the connection pool
+    has not enough free connections left. The catalogs
+    of the tables are locked for the whole backup, and the write horizon that
+    becomes the watermark of the next incremental backups is read just before
+    the snapshot.
+
+    Args:
+        tables (list): The names of the tables.
+        bucket_name (str): The name of the S3 bucket.
+        backup_type (str): `full` or `incremental`. Defaults to `full`.
+        max_workers (int): The number of tables backed up at the same time.
+
+    Returns:
+        dict: The manifest of each table, or None for the tables that could not be stored.
+    """
+    with lock_catalogs(tables) as connection:
+        horizon = get_write_horizon(connection)
+        connection.commit()
+
+        with open_snapshot_connection() as exporter:
+            backup_id = new_backup_id()
+            snapshot_id = exporter.execute(
+                text("SELECT pg_export_snapshot()")
+            ).scalar_one()
+
+            workers = max(min(len(tables), max_workers, get_free_connections()), 1)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    table_name: pool.submit(
+                        backup_in_snapshot,
+                        table_name,
+                        snapshot_id,
+                        bucket_name,
+                        backup_type,
+                        backup_id,
+                        horizon,
+                    )
+                    for table_name in tables
+                }
+                return {
+                    table_name: future.result()
+                    for table_name, future in futures.items()
+                }
 
 
 def run(data, session, *args, **kwargs):
     """
-    Run the backup process for the specified table.
+    Run the backup process for the specified tables.
+
+    `table_name` is a table, a list of tables or `all`.
     """
     try:
-        table_name = data["table_name"]
+        tables = resolve_tables(data["table_name"])
+        backup_type = data.get("backup_type") or constants.BackupTypeEnum.FULL.value
         bucket_name = constants.S3_BUCKET_NAME
-        data = get_all_data(table_name, session)
-        data = [
-            {k: v for k, v in row.__dict__.items() if not k.startswith("_")}
-            for row in data
-        ]
-        df = pd.DataFrame(data)
-        parquet_data = df_to_parquet(df)
-        result = send_data_to_s3(parquet_data, table_name, bucket_name)
-        if not result:
-            return None, constants.BACKUP_FAILED(table_name)
-        return {"message": constants.BACKUP_SUCCESS(table_name)}, None
+        backups = backup_tables(tables, bucket_name, backup_type)
+
+        failed = [table_name for table_name, backup in backups.items() if not backup]
+        if failed:
+            return None, constants.BACKUP_FAILED(", ".join(failed))
+
+        return {
+            "message": constants.BACKUP_SUCCESS(", ".join(tables)),
+            "backup_id": next(iter(backups.values()))["id"],
+            "tables": {
+                table_name: {"backup_type": backup["type"], "rows": backup["rows"]}
+                for table_name, backup in backups.items()
+            },
+        }, None
     except Exception as e:
         return None, e
@@ -0,0 +1,175 @@
+import json
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+from aws.s3 import get_client, upload
+import constants
+
+
+def get_table_path(table_name):
+    """
+    Return the S3 prefix under which the backups of a table are stored.
+    """
+    return f"{constants.S3_BACKUP_PATH}/{table_name}"
+
+
+def get_catalog_key(table_name):
+    """
+    Return the S3 key of the backup catalog of a table.
+    """
+    return f"{get_table_path(table_name)}/{constants.S3_BACKUP_CATALOG}"
+
+
+def get_manifest_key(table_name, backup_id):
+    """
+    Return the S3 key of the manifest of a backup.
+    """
+    return f"{get_table_path(table_name)}/manifests/{backup_id}.json"
+
+
+def get_object_key(table_name, sha256):
+    """
+    Return the content-addressed S3 key of a backup file.
+    """
+    return f"{get_table_path(table_name)}/objects/{sha256}.parquet"
+
+
+def new_backup_id():
+    """
+    Return a sortable identifier for a new backup, based on the current UTC time.
+    """
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def load_json(bucket_name, object_name):
+    """
+    Load a JSON document from an S3 bucket.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        object_name (str): The key of the document.
+
+    Returns:
+        The parsed document, or None if it does not exist.
+
+    Raises:
+        ClientError: If the document exists but cannot be read.
+    """
+    try:
+        response = get_client().get_object(Bucket=bucket_name, Key=object_name)
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+        return None
+
+    return json.loads(response["Body"].read())
+
+
+def save_json(bucket_name, object_name, document):
+    """
+    Write a JSON document to an S3 bucket.
+
+    Returns:
+        bool: True if the upload is successful, False otherwise.
+    """
+    return upload(
+        json.dumps(document, indent=2).encode("utf-8"), bucket_name, object_name
+    )
+
+
+def load_catalog(bucket_name, table_name):
+    """
+    Load the backup catalog of a table.
+
+    The catalog lists every backup of the table in the order they were taken,
+    with the key of its manifest and its watermark.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        table_name (str): The name of the table.
+
+    Returns:
+        dict: The catalog, with an empty `backups` list if the table was never backed up.
+    """
+    catalog = load_json(bucket_name, get_catalog_key(table_name))
+    return catalog or {"table_name": table_name, "backups": []}
+
+
+def save_catalog(bucket_name, catalog):
+    """
+    Write the backup catalog of a table.
+
+    Returns:
+        bool: True if the upload is successful, False otherwise.
+    """
+    return save_json(bucket_name, get_catalog_key(catalog["table_name"]), catalog)
+
+
+def load_manifest(bucket_name, backup):
+    """
+    Load the manifest of a backup listed in the catalog.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        backup (dict): The catalog entry of the backup.
+
+    Returns:
+        dict: The manifest.
+
+    Raises:
+        FileNotFoundError: If the manifest does not exist.
+    """
+    manifest = load_json(bucket_name, backup["manifest"])
+    if manifest is None:
+        raise FileNotFoundError(constants.OBJECT_NOT_FOUND(backup["manifest"]))
+    return manifest
+
+
+def parse_timestamp(value):
+    """
+    Parse an ISO 8601 timestamp, assuming UTC when it has no offset.
+    """
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def get_restore_chain(catalog, backup_id=None, as_of=None):
+    """
+    Return the backups to replay to restore a table to a given backup.
+
+    The target is the backup with the given ID, the last backup taken at or
+    before `as_of`, or the latest backup.
+
+    Args:
+        catalog (dict): The catalog of the table.
+        backup_id (str, optional): The ID of the backup to restore.
+        as_of (str, optional): An ISO 8601 timestamp to restore the table to.
+
+    Returns:
+        list: The last full backup up to the target followed by the incremental
+        backups taken after it, oldest first. Empty if there is no such backup.
+    """
+    backups = catalog["backups"]
+
+    if backup_id is not None:
+        ids = [backup["id"] for backup in backups]
+        backups = backups[: ids.index(backup_id) + 1] if backup_id in ids else []
+    elif as_of is not None:
+        as_of = parse_timestamp(as_of)
+        backups = [
+            backup
+            for backup in backups
+            if parse_timestamp(backup["created_at"]) <= as_of
+        ]
+
+    chain = []
+
+    for backup in reversed(backups):
+        chain.append(backup)
+        if backup["type"] == constants.BackupTypeEnum.FULL:
+            return list(reversed(chain))
+
+    return []
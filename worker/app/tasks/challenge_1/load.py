@@ -1,9 +1,13 @@
 import logging
 import pandas as pd
+import pyarrow.parquet as pq
+from psycopg2 import IntegrityError as DriverIntegrityError
+from sqlalchemy import Integer
 from sqlalchemy.exc import IntegrityError
 
 import constants
-from database.models import Department, Employee, Job
+from database.bulk import copy_dataframe, merge_dataframe
+from storage.object_store import open_object
 
 
 def validate_data(df):
@@ -25,7 +29,91 @@ def validate_data(df):
     return valid_rows, invalid_rows
 
 
-def load_data(data, model, session, task_id, *args, **kwargs):
+def cast_to_model_types(df, model):
+    """
+    Casts the integer columns of the DataFrame to the integer type, since null
+    values in the raw data turn them into floats.
+
+    Args:
+        df (pandas.DataFrame): The validated DataFrame (without null values).
+        model (SQLAlchemy model): The SQLAlchemy model representing the table.
+
+    Returns:
+        pandas.DataFrame: The DataFrame with integer columns cast.
+    """
+    integer_columns = [
+        column.name
+        for column in model.__table__.columns
+        if isinstance(column.type, Integer) and column.name in df.columns
+    ]
+    return df.astype({column: "int64" for column in integer_columns})
+
+
+def insert_with_to_sql(df, model, session, *args, **kwargs):
+    """
+    Inserts the rows with `DataFrame.to_sql`.
+
+    Args:
+        df (pandas.DataFrame): The rows to insert.
+        model (SQLAlchemy model): The SQLAlchemy model representing the table.
+        session (SQLAlchemy session): The SQLAlchemy session object.
+
+    Returns:
+        dict: The number of rows inserted.
+    """
+    df.to_sql(model.__tablename__, session.get_bind(), if_exists="append", index=False)
+    return {"inserted": len(df)}
+
+
+def insert_with_copy(df, model, session, *args, **kwargs):
+    """
+    Inserts the rows with `COPY FROM STDIN` through the session connection.
+
+    Args:
+        df (pandas.DataFrame): The rows to insert.
+        model (SQLAlchemy model): The SQLAlchemy model representing the table.
+        session (SQLAlchemy session): The SQLAlchemy session object.
+
+    Returns:
+        dict: The number of rows inserted.
+    """
+    return {"inserted": copy_dataframe(session.connection(), model.__tablename__, df)}
+
+
+def insert_with_merge(df, model, session, on_conflict, *args, **kwargs):
+    """
+    Copies the rows into a staging table and merges them with `INSERT ... ON CONFLICT`,
+    so duplicated keys are skipped or updated instead of failing the batch.
+
+    Args:
+        df (pandas.DataFrame): The rows to insert.
+        model (SQLAlchemy model): The SQLAlchemy model representing the table.
+        session (SQLAlchemy session): The SQLAlchemy session object.
+        on_conflict (str): `nothing` to skip conflicting rows, `update` to overwrite them.
+
+    Returns:
+        dict: The number of rows inserted, updated and skipped.
+    """
+    return merge_dataframe(session.connection(), model.__tablename__, df, on_conflict)
+
+
+LOADERS = {
+    constants.LoaderEnum.TO_SQL.value: insert_with_to_sql,
+    constants.LoaderEnum.COPY.value: insert_with_copy,
+    constants.LoaderEnum.MERGE.value: insert_with_merge,
+}
+
+
+def load_data(
+    data,
+    model,
+    session,
+    task_id,
+    loader=constants.LOAD_LOADER,
+    on_conflict=constants.ConflictActionEnum.NOTHING.value,
+    *args,
+    **kwargs,
+):
     """
     Load data into a database table.
 
@@ -34,40 +122,138 @@ def load_data(data, model, session, task_id, *args, **kwargs):
         model (SQLAlchemy model): The SQLAlchemy model representing the table.
         session (SQLAlchemy session): The SQLAlchemy session object.
         task_id (int): The ID of the task associated with the data.
+        loader (str): The loader used to insert the rows (`to_sql`, `copy` or `merge`).
+        on_conflict (str): What the `merge` loader does with existing keys (`nothing` or `update`).
         *args: Additional positional arguments.
         **kwargs: Additional keyword arguments.
 
     Returns:
-        tuple: A tuple containing a boolean indicating whether the data was loaded successfully and any error message if applicable.
+        tuple: A tuple containing the row counts (`inserted`, `updated`, `skipped`, `invalid`) and any error if applicable.
     """
-    model_name = model.__tablename__
-
     try:
         df = pd.DataFrame(data)
 
         valid_data, invalid_data = validate_data(df)
 
+        valid_data = cast_to_model_types(valid_data, model)
         valid_data.loc[:, ("created_by_task_id",)] = task_id
 
+        counts = {"inserted": 0, "updated": 0, "skipped": 0}
+
         try:
-            valid_data.to_sql(
-                model_name, session.get_bind(), if_exists="append", index=False
-            )
-        except IntegrityError as e:
+            counts.update(LOADERS[loader](valid_data, model, session, on_conflict))
+        except (IntegrityError, DriverIntegrityError) as e:
             if not constants.LOAD_DUPLICATE_KEY_VALUE_ERROR in str(e):
                 raise e
+            session.rollback()
+            counts["skipped"] = len(valid_data)
             logging.warning(f"{constants.LOAD_CANNOT_INSERT_DUPLICATE}: {e}")
 
         session.commit()
 
+        counts["invalid"] = len(invalid_data)
+
         if not invalid_data.empty:
             for _, row in invalid_data.iterrows():
                 logging.warning(constants.LOAD_INVALID_ROW(row.to_dict()))
-            return True, constants.LOAD_INVALID_ROWS_FOUND(model_name)
 
-        return True, None
+        return counts, None
+    except Exception as e:
+        session.rollback()
+        return None, e
+
+
+def read_file_chunks(fileobj, file_format, columns):
+    """
+    Reads a CSV or Parquet file in chunks of `LOAD_FILE_CHUNK_SIZE` rows.
+
+    Args:
+        fileobj: The binary file object to read.
+        file_format (str): The format of the file (`csv` or `parquet`).
+        columns (list): The columns to read.
+
+    Yields:
+        pandas.DataFrame: The next chunk of rows.
+
+    Raises:
+        ValueError: If the file does not have all the columns.
+    """
+    if file_format == constants.FileFormatEnum.PARQUET:
+        parquet_file = pq.ParquetFile(fileobj)
+        missing = sorted(set(columns) - set(parquet_file.schema_arrow.names))
+        if missing:
+            raise ValueError(constants.LOAD_FILE_MISSING_COLUMNS(missing))
+
+        for batch in parquet_file.iter_batches(
+            batch_size=constants.LOAD_FILE_CHUNK_SIZE, columns=columns
+        ):
+            yield batch.to_pandas()
+        return
+
+    reader = pd.read_csv(fileobj, chunksize=constants.LOAD_FILE_CHUNK_SIZE)
+    for chunk in reader:
+        missing = sorted(set(columns) - set(chunk.columns))
+        if missing:
+            raise ValueError(constants.LOAD_FILE_MISSING_COLUMNS(missing))
+        yield chunk[columns]
+
+
+def run_file(data, session, task_id, *args, **kwargs):
+    """
+    Loads a CSV or Parquet file referenced in the object store, one chunk at a time,
+    so memory stays bounded regardless of the file size.
+
+    Each chunk is committed on its own. If a chunk fails, the chunks before it
+    stay loaded, so the error is returned with the counts committed so far.
+
+    Args:
+        data (dict): The `table_name`, `file_format`, `file` reference and `on_conflict` of the upload.
+        session: The session object for the database connection.
+        task_id: The ID of the task.
+
+    Returns:
+        tuple: A tuple containing the result and any error message. On failure the
+            result holds the counts of the chunks already committed.
+    """
+    key = f"{data['table_name']}s"
+    config = constants.LOAD_CHALLENGE_1_CONFIG_MAP[key]
+    model = config["model"]
+    on_conflict = data.get("on_conflict") or constants.ConflictActionEnum.NOTHING.value
+    columns = list(constants.LOAD_FILE_COLUMNS[data["table_name"]])
+
+    counts = {"inserted": 0, "updated": 0, "skipped": 0, "invalid": 0}
+
+    try:
+        with open_object(data["file"]) as fileobj:
+            for chunk in read_file_chunks(fileobj, data["file_format"], columns):
+                chunk_counts, error = load_data(
+                    chunk,
+                    model,
+                    session,
+                    task_id,
+                    loader=config["loader"],
+                    on_conflict=on_conflict,
+                )
+
+                if error:
+                    raise error
+
+                for name in counts:
+                    counts[name] += chunk_counts[name]
     except Exception as e:
-        return False, e
+        return {"message": constants.LOAD_FILE_PARTIAL, "counts": {key: counts}}, str(e)
+
+    warning = (
+        constants.LOAD_INVALID_ROWS_FOUND(model.__tablename__)
+        if counts["invalid"]
+        else None
+    )
+
+    return {
+        "message": constants.LOAD_DATA_SUCCESS,
+        "warning": warning,
+        "counts": {key: counts},
+    }, None
 
 
 def run(data, session, task_id, *args, **kwargs):
@@ -82,9 +268,16 @@ def run(data, session, task_id, *args, **kwargs):
         **kwargs: Additional keyword arguments.
 
     Returns:
-        tuple: A tuple containing the result and any error message. The result is a dictionary with a "message" key indicating the success of the data loading operation, and a "warning" key containing any warning message. The error message is None if the data loading was successful.
+        tuple: A tuple containing the result and any error message. The result is a dictionary with a "message" key indicating the success of the data loading operation, a "warning" key containing any warning message and a "counts" key with the inserted, updated, skipped and invalid rows per table. The error message is None if the data loading was successful.
 
     """
+    if data.get("file"):
+        return run_file(data, session, task_id)
+
+    on_conflict = data.get("on_conflict") or constants.ConflictActionEnum.NOTHING.value
+    counts = {}
+    warnings = []
+
     for key, config in constants.LOAD_CHALLENGE_1_CONFIG_MAP.items():
         model = config["model"]
         _data = data.get(key, [])
@@ -92,9 +285,25 @@ def run(data, session, task_id, *args, **kwargs):
         if not _data:
             continue
 
-        success, error = load_data(_data, model, session, task_id)
+        table_counts, error = load_data(
+            _data,
+            model,
+            session,
+            task_id,
+            loader=config["loader"],
+            on_conflict=on_conflict,
+        )
 
-        if not success:
+        if error:
             return None, error
 
-    return {"message": constants.LOAD_DATA_SUCCESS, "warning": error}, None
+        counts[key] = table_counts
+
+        if table_counts["invalid"]:
+            warnings.append(constants.LOAD_INVALID_ROWS_FOUND(model.__tablename__))
+
+    return {
+        "message": constants.LOAD_DATA_SUCCESS,
+        "warning": "; ".join(warnings) or None,
+        "counts": counts,
+    }, None
@@ -1,70 +1,577 @@
-import pandas as pd
-from io import BytesIO
+import io
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 import constants
-from aws.s3 import download
+from database.bulk import (
+    copy_batches,
+    count_keys_in_range,
+    create_key_table,
+    create_staging_table,
+    delete_missing_rows,
+    get_staging_table,
+    merge_staging_table,
+    reset_sequence,
+)
+from database.connection import get_free_connections, session_scope
+from storage.object_store import open_object
+from tasks.challenge_1.backup import get_schema_hash
+from tasks.challenge_1.catalog import get_restore_chain, load_catalog, load_manifest
+from tasks.challenge_1.tables import (
+    get_dependency_levels,
+    get_referencing_tables,
+    resolve_tables,
+)
+
+
+RESTORE_CONFLICT_ACTIONS = {
+    constants.RestoreModeEnum.APPEND.value: constants.ConflictActionEnum.NOTHING.value,
+    constants.RestoreModeEnum.MERGE.value: constants.ConflictActionEnum.UPDATE.value,
+    constants.RestoreModeEnum.REPLACE.value: constants.ConflictActionEnum.UPDATE.value,
+}
 
 
-def parquet_to_df(parquet_data):
+def get_backup_files(manifest):
+    """
+    Return the file entries of a backup manifest.
+
+    Manifests written before backups were partitioned describe a single file
+    at their top level, and files backed up before manifests existed only have
+    an `object` key; both are returned as a one-file list.
     """
-    Converts parquet data to a pandas DataFrame.
+    return manifest.get("files", [manifest])
+
+
+def split_filters(manifest, filters):
+    """
+    Split a restore filter into partition values and column values.
+
+    Partition values are integers in the manifest, so values sent as strings
+    (e.g. `{"year": "2021"}`) are converted.
 
     Args:
-        parquet_data (bytes): The parquet data to be converted.
+        manifest (dict): The manifest of the backup.
+        filters (dict): Column or partition names mapped to the value to restore.
 
     Returns:
-        pandas.DataFrame: The converted DataFrame.
+        tuple: The partition filters and the column filters.
+
+    Raises:
+        ValueError: If a filter is neither a partition key nor a column, or a
+            partition value is not an integer.
     """
-    return pd.read_parquet(BytesIO(parquet_data))
+    partitioning = manifest.get("partitioning", [])
+    columns = manifest.get("columns", [])
+    unknown = [key for key in filters if key not in partitioning and key not in columns]
+    if unknown:
+        raise ValueError(constants.RESTORE_UNKNOWN_FILTER(unknown))
+
+    partition_filters = {}
+    for key, value in filters.items():
+        if key in partitioning:
+            try:
+                partition_filters[key] = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(constants.RESTORE_INVALID_PARTITION_FILTER(key, value))
 
+    return (
+        partition_filters,
+        {key: value for key, value in filters.items() if key in columns},
+    )
 
-def insert_data_to_db(df, table_name, session):
+
+def may_contain(stats, column_filters):
     """
-    Insert data from a DataFrame into a database table.
+    Whether the rows described by column statistics may match the column filters.
+
+    Values are only compared with statistics of the same type; otherwise the
+    rows may match.
 
     Args:
-        df (pandas.DataFrame): The DataFrame containing the data to be inserted.
-        table_name (str): The name of the database table to insert the data into.
-        session: The database session object.
+        stats (dict): The `min` and `max` of each column.
+        column_filters (dict): Column names mapped to the value to restore.
 
     Returns:
-        None
+        bool: False if the statistics rule out every row.
     """
-    model = constants.BASE_CHALLENGE_1_CONFIG_MAP[table_name]["model"]
-    session.bulk_insert_mappings(model, df.to_dict(orient="records"))
+    for key, value in column_filters.items():
+        low, high = stats[key]["min"], stats[key]["max"]
+        if type(low) is type(value) and not low <= value <= high:
+            return False
+    return True
+
+
+def get_filter_expression(schema, column_filters):
+    """
+    Build the pyarrow dataset expression of the column filters.
+
+    Args:
+        schema (pyarrow.Schema): The schema of the backup file.
+        column_filters (dict): Column names mapped to the value to restore.
+
+    Returns:
+        pyarrow.dataset.Expression: The expression, or None when there is no filter.
+    """
+    expression = None
+
+    for key, value in column_filters.items():
+        condition = ds.field(key) == pa.scalar(value).cast(schema.field(key).type)
+        expression = condition if expression is None else expression & condition
+
+    return expression
+
+
+def verify_backup_file(fileobj, parquet_file, file, schema_hash):
+    """
+    Check a backup file against its manifest.
+
+    The size of the file must match, and its Parquet footer must have the
+    schema and row groups the manifest describes. Only the footer is read, so
+    a ranged S3 object is not downloaded. With `RESTORE_VERIFY_CHECKSUM` the
+    whole file is also hashed and its SHA-256 must match.
+
+    Args:
+        fileobj: The seekable binary file object of the backup file.
+        parquet_file (pyarrow.parquet.ParquetFile): The opened backup file.
+        file (dict): The manifest entry of the file.
+        schema_hash (str): The schema hash of the backup.
+
+    Raises:
+        ValueError: If the file does not match the manifest.
+    """
+    size = fileobj.seek(0, io.SEEK_END)
+    metadata = parquet_file.metadata
+
+    if constants.RESTORE_VERIFY_CHECKSUM:
+        if hasattr(fileobj, "sha256"):
+            sha256 = fileobj.sha256()
+        else:
+            fileobj.seek(0)
+            sha256 = hashlib.file_digest(fileobj, "sha256").hexdigest()
+        if sha256 != file["object"]["sha256"]:
+            raise ValueError(constants.RESTORE_INTEGRITY_ERROR(file["object"]["key"]))
+
+    if (
+        size != file["object"]["size"]
+        or get_schema_hash(parquet_file.schema_arrow) != schema_hash
+        or metadata.num_rows != file["rows"]
+        or [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        != [row_group["rows"] for row_group in file["row_groups"]]
+    ):
+        raise ValueError(constants.RESTORE_INTEGRITY_ERROR(file["object"]["key"]))
+
+
+def select_row_groups(connection, table_name, file, mode, column_filters):
+    """
+    Select the row groups of a backup file that need to be copied.
+
+    A row group is skipped when its statistics rule out the column filters.
+    In `append` mode existing rows are never modified, so a row group is also
+    skipped when the table already holds every ID in its range.
+
+    Args:
+        connection: The SQLAlchemy connection.
+        table_name (str): The name of the table.
+        file (dict): The manifest entry of the file.
+        mode (str): `append`, `merge` or `replace`.
+        column_filters (dict): Column names mapped to the value to restore.
+
+    Returns:
+        list: The indexes of the row groups to copy.
+    """
+    selected = []
+
+    for index, row_group in enumerate(file["row_groups"]):
+        if not may_contain(row_group["columns"], column_filters):
+            continue
+
+        if mode == constants.RestoreModeEnum.APPEND:
+            ids = row_group["columns"]["id"]
+            existing = count_keys_in_range(
+                connection, table_name, ids["min"], ids["max"]
+            )
+            if existing >= ids["max"] - ids["min"] + 1:
+                continue
+
+        selected.append(index)
+
+    return selected
+
+
+def select_files(manifest, partition_filters, column_filters):
+    """
+    Select the files of a backup that may hold rows matching the filters.
+
+    Files are pruned on their Hive partition and on the statistics of their
+    row groups, before anything is downloaded.
+
+    Args:
+        manifest (dict): The manifest of the backup.
+        partition_filters (dict): Partition keys mapped to the value to restore.
+        column_filters (dict): Column names mapped to the value to restore.
+
+    Returns:
+        list: The manifest entries of the selected files.
+    """
+    return [
+        file
+        for file in get_backup_files(manifest)
+        if all(
+            file.get("partition", {}).get(key) == value
+            for key, value in partition_filters.items()
+        )
+        and (
+            not column_filters
+            or any(
+                may_contain(row_group["columns"], column_filters)
+                for row_group in file["row_groups"]
+            )
+        )
+    ]
+
+
+def restore_table(
+    manifests,
+    table_name,
+    session,
+    mode=constants.RestoreModeEnum.APPEND.value,
+    filters=None,
+):
+    """
+    Restore a table from backup files through a staging table.
+
+    The files are pruned with the filters on their partition and statistics.
+    Each remaining file is verified against its manifest, then the row groups
+    it needs are read with the filters pushed down and copied, in order, into a
+    temporary staging table with `COPY`. When a row appears in several files
+    the last copy wins, so a full backup followed by its incremental backups
+    yields the newest version of each row. When the last backup lists the keys
+    of the live rows, the staged rows deleted since the earlier backups are
+    dropped. The rows are then written into the table according to the mode:
+
+    - `append`: rows whose ID already exists are skipped.
+    - `merge`: rows whose ID already exists are overwritten.
+    - `replace`: like `merge`; the rows missing from the backup are deleted by
+      `finish_restore`, so the table matches the backup once it commits.
+
+    Nothing is committed: the staging table lives until `finish_restore`
+    completes the transaction.
+
+    Args:
+        manifests (list): The manifests of the backups, oldest first. Files backed up
+            before manifests existed are given as a manifest with only an `object` key.
+        table_name (str): The name of the table to restore.
+        session: The session object for the database connection.
+        mode (str): `append`, `merge` or `replace`. Defaults to `append`.
+        filters (dict, optional): Partition keys or columns mapped to the value to
+            restore, e.g. `{"year": 2021}`. Defaults to every row.
+
+    Returns:
+        dict: The number of rows `inserted`, `updated`, `skipped` and `dropped`
+        as deleted, and the number of `skipped_files` and `skipped_row_groups`.
+
+    Raises:
+        FileNotFoundError: If one of the files does not exist.
+        ValueError: If one of the files does not match its manifest, or a filter is unknown.
+    """
+    connection = session.connection()
+    staging_table = create_staging_table(connection, table_name)
+    columns = None
+    staged = 0
+    skipped_files = 0
+    skipped_row_groups = 0
+
+    for manifest in manifests:
+        partition_filters, column_filters = split_filters(manifest, filters or {})
+        files = select_files(manifest, partition_filters, column_filters)
+        skipped_files += len(get_backup_files(manifest)) - len(files)
+
+        for file in files:
+            reference = {
+                "storage": constants.ObjectStorageEnum.S3,
+                "bucket": constants.S3_BUCKET_NAME,
+                "key": file["object"]["key"],
+            }
+            with open_object(reference, ranged=True) as fileobj:
+                parquet_file = pq.ParquetFile(fileobj)
+                columns = parquet_file.schema_arrow.names
+                fragment = ds.ParquetFileFormat().make_fragment(fileobj)
+
+                if "sha256" in file["object"]:
+                    verify_backup_file(
+                        fileobj, parquet_file, file, manifest["schema_hash"]
+                    )
+                    row_groups = select_row_groups(
+                        connection, table_name, file, mode, column_filters
+                    )
+                    skipped_row_groups += len(file["row_groups"]) - len(row_groups)
+                    fragment = fragment.subset(row_group_ids=row_groups)
+
+                staged += copy_batches(
+                    connection,
+                    staging_table,
+                    fragment.to_batches(
+                        filter=get_filter_expression(
+                            parquet_file.schema_arrow, column_filters
+                        )
+                    ),
+                )
+
+    dropped = 0
+    keys = manifests[-1].get("keys")
+    if keys is not None:
+        key_table = create_key_table(connection, table_name)
+        for file in keys:
+            reference = {
+                "storage": constants.ObjectStorageEnum.S3,
+                "bucket": constants.S3_BUCKET_NAME,
+                "key": file["object"]["key"],
+            }
+            with open_object(reference, ranged=True) as fileobj:
+                parquet_file = pq.ParquetFile(fileobj)
+                verify_backup_file(fileobj, parquet_file, file, file["schema_hash"])
+                copy_batches(connection, key_table, parquet_file.iter_batches())
+        dropped = delete_missing_rows(connection, key_table, staging_table)
+
+    counts = {"inserted": 0, "updated": 0}
+    if columns is not None:
+        counts = merge_staging_table(
+            connection,
+            staging_table,
+            table_name,
+            columns,
+            RESTORE_CONFLICT_ACTIONS[mode],
+        )
+    counts["skipped"] = staged - dropped - counts["inserted"] - counts["updated"]
+    counts["dropped"] = dropped
+    counts["skipped_files"] = skipped_files
+    counts["skipped_row_groups"] = skipped_row_groups
+
+    return counts
+
+
+def finish_restore(session, tables, mode=constants.RestoreModeEnum.APPEND.value):
+    """
+    Complete the restore of tables staged in the transaction of a session, and commit it.
+
+    In `replace` mode the rows missing from the backups are deleted in reverse
+    foreign key order, so a row is deleted after the rows referencing it. The
+    serial sequences are then reset past the restored IDs.
+
+    Args:
+        session: The session the tables were restored in.
+        tables (list): The names of the tables, in foreign key order.
+        mode (str): `append`, `merge` or `replace`. Defaults to `append`.
+
+    Returns:
+        dict: The number of rows deleted from each table.
+    """
+    connection = session.connection()
+    models = {
+        name: constants.BASE_CHALLENGE_1_CONFIG_MAP[name]["model"] for name in tables
+    }
+    deleted = {}
+
+    for name in reversed(tables):
+        table_name = models[name].__tablename__
+        deleted[name] = (
+            delete_missing_rows(connection, get_staging_table(table_name), table_name)
+            if mode == constants.RestoreModeEnum.REPLACE
+            else 0
+        )
+
+    for name in tables:
+        reset_sequence(connection, models[name].__tablename__)
+
     session.commit()
 
+    return deleted
+
+
+def restore_from_catalog(
+    table_name,
+    session,
+    mode=constants.RestoreModeEnum.APPEND.value,
+    backup_id=None,
+    as_of=None,
+    filters=None,
+):
+    """
+    Restores a table from its backups stored in an S3 bucket.
+
+    The target backup is the one given by `backup_id`, the last one taken at or
+    before `as_of`, or the latest one. Its chain, the last full backup up to the
+    target and the incremental backups after it, is replayed. Tables backed up
+    before the catalog existed are restored from their single
+    `backups/{table}.parquet` file. The transaction is left open for
+    `finish_restore`, and rolled back on error.
+
+    Args:
+        table_name (str): The name of the table to restore.
+        session: The session object for the database connection.
+        mode (str): `append`, `merge` or `replace`. Defaults to `append`.
+        backup_id (str, optional): The ID of the backup to restore.
+        as_of (str, optional): An ISO 8601 timestamp to restore the table to.
+        filters (dict, optional): Partition keys or columns mapped to the value to restore.
+
+    Returns:
+        tuple: The restore result, with the row counts, and an error message (if any).
+    """
+    if filters and mode == constants.RestoreModeEnum.REPLACE:
+        return None, constants.RESTORE_FILTER_WITH_REPLACE
+
+    try:
+        model = constants.BASE_CHALLENGE_1_CONFIG_MAP[table_name]["model"]
+        bucket_name = constants.S3_BUCKET_NAME
+        catalog = load_catalog(bucket_name, table_name)
+        chain = get_restore_chain(catalog, backup_id, as_of)
+
+        if chain:
+            manifests = [load_manifest(bucket_name, backup) for backup in chain]
+        elif catalog["backups"] or backup_id or as_of:
+            return None, constants.RESTORE_BACKUP_NOT_FOUND(table_name)
+        else:
+            manifests = [
+                {"object": {"key": f"{constants.S3_BACKUP_PATH}/{table_name}.parquet"}}
+            ]
+
+        try:
+            counts = restore_table(
+                manifests, model.__tablename__, session, mode, filters
+            )
+        except FileNotFoundError:
+            return None, constants.RESTORE_NOT_FOUND_IN_S3
+
+        return {"backup_id": manifests[-1].get("id"), **counts}, None
+    except Exception as e:
+        session.rollback()
+        return None, str(e)
+
+
+def restore_in_session(table_name, **kwargs):
+    """
+    Restore a table on its own session, so tables can be restored from several threads.
+    """
+    with session_scope() as session:
+        result, error = restore_from_catalog(table_name, session, **kwargs)
+        if error:
+            return None, error
+
+        deleted = finish_restore(session, [table_name], kwargs.get("mode"))
+        return {**result, "deleted": deleted[table_name]}, None
+
+
+def restore_in_transaction(tables, **kwargs):
+    """
+    Restore tables one after the other in a single transaction.
+
+    Used by the `replace` mode: every table is merged in foreign key order
+    before any row is deleted, and the deletes run children first, so a
+    parent row is only deleted once no restored row references it. A failure
+    rolls back every table.
+
+    Args:
+        tables (list): The names of the tables, in foreign key order.
+        **kwargs: The options of `restore_from_catalog`.
+
+    Returns:
+        tuple: The restore result of each table and an error message (if any).
+    """
+    with session_scope() as session:
+        results = {}
+
+        for table_name in tables:
+            result, error = restore_from_catalog(table_name, session, **kwargs)
+            if error:
+                return None, error
+            results[table_name] = result
+
+        deleted = finish_restore(session, tables, kwargs.get("mode"))
+        return {
+            table_name: {**result, "deleted": deleted[table_name]}
+            for table_name, result in results.items()
+        }, None
+
 
 def run(data, session, *args, **kwargs):
     """
-    Restores a table from a Parquet file stored in an S3 bucket.
+    Restores tables from their backups stored in an S3 bucket.
+
+    `table_name` is a table, a list of tables or `all`. Tables are restored in
+    foreign key order: the tables a table references are restored first, and
+    tables that do not depend on each other are restored concurrently, each in
+    its own transaction. A table whose references failed is not restored.
+
+    In `replace` mode the tables are restored in a single transaction, and
+    every table referencing a restored table must be restored as well, since
+    deleting a parent row would otherwise fail on the rows still referencing it.
 
     Args:
-        data (dict): A dictionary containing the table_name key specifying the name of the table to restore.
+        data (dict): A dictionary containing the table_name key specifying the tables to restore,
+        and optionally the restore `mode`, the `backup_id` or `as_of` timestamp to restore and
+        a `filter` restricting the rows to restore, e.g. `{"year": 2021, "quarter": 3}`.
         session: The session object for the database connection.
         *args: Variable length argument list.
         **kwargs: Arbitrary keyword arguments.
 
     Returns:
         tuple: A tuple containing the restore result and an error message (if any). The restore result is a dictionary
-        with a "message" key indicating the status of the restore operation. The error message is None if the restore
-        operation is successful, otherwise it contains a string describing the error.
+        with a "message" key indicating the status of the restore operation and the row counts of each table. The
+        error message is None if the restore operation is successful, otherwise it contains a string describing the
+        error.
 
     Raises:
         Exception: If an error occurs during the restore operation.
     """
 
     try:
-        table_name = data["table_name"]
-        bucket_name = constants.S3_BUCKET_NAME
-        parquet_data = download(
-            bucket_name, f"{constants.S3_BACKUP_PATH}/{table_name}.parquet"
-        )
-        if parquet_data is None:
-            return None, constants.RESTORE_NOT_FOUND_IN_S3
+        tables = resolve_tables(data["table_name"])
+        options = {
+            "mode": data.get("mode") or constants.RestoreModeEnum.APPEND.value,
+            "backup_id": data.get("backup_id"),
+            "as_of": data.get("as_of"),
+            "filters": data.get("filter"),
+        }
+        results = {}
+
+        if options["mode"] == constants.RestoreModeEnum.REPLACE:
+            referencing = get_referencing_tables(tables)
+            if referencing:
+                return None, constants.RESTORE_REPLACE_WITHOUT_REFERENCING(referencing)
+
+            results, error = restore_in_transaction(tables, **options)
+            if error:
+                return None, error
+        else:
+            for level in get_dependency_levels(tables):
+                workers = max(
+                    min(
+                        len(level),
+                        constants.MAINTENANCE_PARALLEL_TABLES,
+                        get_free_connections(),
+                    ),
+                    1,
+                )
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = {
+                        table_name: pool.submit(
+                            restore_in_session, table_name, **options
+                        )
+                        for table_name in level
+                    }
+                    for table_name, future in futures.items():
+                        result, error = future.result()
+                        if error:
+                            return None, error
+                        results[table_name] = result
 
-        df = parquet_to_df(parquet_data)
-        insert_data_to_db(df, table_name, session)
-        return {"message": constants.RESTORE_SUCCESS(table_name)}, None
+        return {
+            "message": constants.RESTORE_SUCCESS(", ".join(tables)),
+            "tables": results,
+        }, None
     except Exception as e:
         return None, str(e)
@@ -0,0 +1,97 @@
+from database.models import Base
+import constants
+
+
+def resolve_tables(table_name):
+    """
+    Resolve the `table_name` of a backup or restore request to a list of tables.
+
+    Args:
+        table_name (str | list): A table, a list of tables or `all`.
+
+    Returns:
+        list: The table names, without duplicates, in foreign key order: a
+        table always comes after the tables it references.
+
+    Raises:
+        ValueError: If a table is unknown.
+    """
+    if table_name == constants.ALL_TABLES:
+        requested = set(constants.BASE_CHALLENGE_1_CONFIG_MAP)
+    elif isinstance(table_name, str):
+        requested = {table_name}
+    else:
+        requested = set(table_name)
+
+    unknown = requested - set(constants.BASE_CHALLENGE_1_CONFIG_MAP)
+    if unknown:
+        raise ValueError(constants.UNKNOWN_TABLES(sorted(unknown)))
+
+    names = {
+        config["model"].__tablename__: name
+        for name, config in constants.BASE_CHALLENGE_1_CONFIG_MAP.items()
+    }
+    return [
+        names[table.name]
+        for table in Base.metadata.sorted_tables
+        if names.get(table.name) in requested
+    ]
+
+
+def get_referencing_tables(tables):
+    """
+    Return the tables that reference the given tables but are not among them.
+
+    Args:
+        tables (list): The table names.
+
+    Returns:
+        list: The names of the referencing tables, sorted.
+    """
+    names = {
+        config["model"].__tablename__
+        for name, config in constants.BASE_CHALLENGE_1_CONFIG_MAP.items()
+        if name in tables
+    }
+    return sorted(
+        name
+        for name, config in constants.BASE_CHALLENGE_1_CONFIG_MAP.items()
+        if name not in tables
+        and any(
+            key.column.table.name in names
+            for key in config["model"].__table__.foreign_keys
+        )
+    )
+
+
+def get_dependency_levels(tables):
+    """
+    Group tables so that each group only references tables of earlier groups.
+
+    The tables of a group can be restored concurrently once the previous
+    groups are done.
+
+    Args:
+        tables (list): The table names, in foreign key order.
+
+    Returns:
+        list: The groups of table names.
+    """
+    models = {
+        name: constants.BASE_CHALLENGE_1_CONFIG_MAP[name]["model"] for name in tables
+    }
+    names = {model.__tablename__: name for name, model in models.items()}
+    levels = {}
+
+    for name in tables:
+        references = {
+            names[key.column.table.name]
+            for key in models[name].__table__.foreign_keys
+            if key.column.table.name in names
+        }
+        levels[name] = max((levels[ref] + 1 for ref in references), default=0)
+
+    groups = [[] for _ in range(max(levels.values(), default=-1) + 1)]
+    for name in tables:
+        groups[levels[name]].append(name)
+    return groups
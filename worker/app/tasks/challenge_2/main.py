@@ -3,11 +3,11 @@ from pathlib import Path
 from datetime import datetime
 
 import pandas as pd
-from sqlalchemy import extract, func
+from sqlalchemy import Integer, func
 from jinja2 import Environment, FileSystemLoader
 
 from aws.s3 import create_presigned_url, upload
-from database.models import Department, Employee, Job
+from database.models import Department, EmployeeHiringSummary, Job
 import constants
 
 
@@ -29,10 +29,21 @@ def load_template(template_file: str):
     return template
 
 
+def warm_templates():
+    """
+    Compile every report template into the environment cache.
+    """
+    for report_config in CONFIG_MAP.values():
+        load_template(report_config["template"])
+
+
 def get_employee_counts_by_quarter(session):
     """
     Retrieves the employee counts by quarter for each department and job.
 
+    The counts are read from the hiring summary, so the query does not depend
+    on the size of the employee table.
+
     Args:
         session: The database session object.
 
@@ -44,13 +55,16 @@ def get_employee_counts_by_quarter(session):
         session.query(
             Department.department,
             Job.job,
-            extract("quarter", Employee.datetime).label("quarter"),
-            func.count(Employee.id).label("count"),
+            EmployeeHiringSummary.quarter,
+            func.sum(EmployeeHiringSummary.hire_count).cast(Integer).label("count"),
         )
-        .join(Employee, Employee.department_id == Department.id)
-        .join(Job, Employee.job_id == Job.id)
-        .filter(func.date_part("year", Employee.datetime) == 2021)
-        .group_by(Department.department, Job.job, "quarter")
+        .join(
+            EmployeeHiringSummary,
+            EmployeeHiringSummary.department_id == Department.id,
+        )
+        .join(Job, EmployeeHiringSummary.job_id == Job.id)
+        .filter(EmployeeHiringSummary.year == 2021)
+        .group_by(Department.department, Job.job, EmployeeHiringSummary.quarter)
         .order_by(Department.department, Job.job)
         .all()
     )
@@ -87,6 +101,9 @@ def get_departments_hiring_above_mean(session):
     """
     Retrieves the departments that have hired above the mean number of employees in the given session.
 
+    Hires are summed from the per-quarter rows of the hiring summary rather
+    than counted on the employee table.
+
     Args:
         session: The session object used for querying the database.
 
@@ -100,10 +117,15 @@ def get_departments_hiring_above_mean(session):
 
     dept_hiring_counts = (
         session.query(
-            Department.id, Department.department, func.count(Employee.id).label("hired")
+            Department.id,
+            Department.department,
+            func.sum(EmployeeHiringSummary.hire_count).cast(Integer).label("hired"),
+        )
+        .join(
+            EmployeeHiringSummary,
+            EmployeeHiringSummary.department_id == Department.id,
         )
-        .join(Employee, Employee.department_id == Department.id)
-        .filter(func.date_part("year", Employee.datetime) == 2021)
+        .filter(EmployeeHiringSummary.year == 2021)
         .group_by(Department.id, Department.department)
         .all()
     )
@@ -0,0 +1,37 @@
+import logging
+import importlib
+
+from sqlalchemy import text
+
+import constants
+from aws.s3 import get_client
+from database.connection import init_engine
+from tasks.challenge_2.main import warm_templates
+
+
+def init_worker():
+    """
+    Initializer of the pool child processes.
+
+    Pays every one-off cost before the first task arrives, so the first task
+    of a child runs as fast as the following ones:
+        - Imports the heavy modules used by the tasks.
+        - Creates the engine of the child and opens its first pooled connection.
+        - Creates the S3 client of the child.
+        - Compiles the report templates.
+
+    A failed warm-up step is logged and retried lazily by the first task.
+    """
+    engine = init_engine()
+
+    for module in constants.WARMUP_MODULES:
+        importlib.import_module(module)
+
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        logging.warning(f"{constants.WARMUP_FAILED}: {e}")
+
+    get_client()
+    warm_templates()
@@ -0,0 +1,88 @@
+"""
+Compare the latency of the first task of a pool child with and without the warm-up initializer.
+
+Each mode starts a fresh single-process pool, waits for the child to be
+running and times a report-shaped task: a database round trip, an S3
+client, a template render and a DataFrame conversion. The second task of
+the child is the steady-state reference. It uses the same DB_* environment
+variables as the worker:
+
+    DB_HOST=localhost python benchmarks/child_warmup_benchmark.py 5
+"""
+
+import sys
+import time
+import statistics
+from pathlib import Path
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+DEFAULT_ROUNDS = 5
+
+
+def noop():
+    return None
+
+
+def sample_task():
+    """
+    Run the steps of a report task that do not depend on the report data.
+    """
+    start = time.perf_counter()
+
+    import pandas as pd
+    from sqlalchemy import text
+
+    from aws.s3 import get_client
+    from database.connection import get_engine
+    from tasks.challenge_2.main import CONFIG_MAP, load_template, render_template_to_md
+
+    with get_engine().connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    get_client()
+    report_config = CONFIG_MAP["type2"]
+    df = pd.DataFrame([{"id": 1, "department": "Staff", "hired": 10}])
+    render_template_to_md(
+        df.to_dict(orient="records"),
+        report_config["name"],
+        load_template(report_config["template"]),
+    )
+
+    return time.perf_counter() - start
+
+
+def measure(initializer):
+    """
+    Return the latency of the first and second task of a new child, in milliseconds.
+    """
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=get_context("spawn"), initializer=initializer
+    ) as executor:
+        executor.submit(noop).result()
+        first = executor.submit(sample_task).result()
+        second = executor.submit(sample_task).result()
+
+    return first * 1000, second * 1000
+
+
+def main(rounds):
+    # Imported here: spawned children re-import this module, and a top-level
+    # import of the tasks would warm up the cold children as well.
+    from warmup import init_worker
+    from database.connection import init_engine
+
+    modes = {"cold": init_engine, "warm": init_worker}
+
+    print(f"{'mode':>6} {'first task ms':>14} {'second task ms':>15}")
+    for name, initializer in modes.items():
+        results = [measure(initializer) for _ in range(rounds)]
+        first = statistics.median(result[0] for result in results)
+        second = statistics.median(result[1] for result in results)
+        print(f"{name:>6} {first:>14,.1f} {second:>15,.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROUNDS)
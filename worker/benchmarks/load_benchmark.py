@@ -0,0 +1,85 @@
+"""
+Compare LOAD throughput (rows/sec) of `DataFrame.to_sql` against `COPY FROM STDIN`.
+
+Rows are loaded into a scratch copy of the `employee` table that is created
+and rolled back inside a transaction, so the benchmark leaves the database
+untouched. It uses the same DB_* environment variables as the worker:
+
+    DB_HOST=localhost python benchmarks/load_benchmark.py 10000 100000 1000000
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import pandas as pd
+from sqlalchemy import text
+
+from database.bulk import copy_dataframe
+from database.connection import get_engine
+
+BENCHMARK_TABLE = "benchmark_employee"
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def make_employees(rows):
+    """
+    Build a DataFrame of synthetic employees shaped like a validated LOAD batch.
+    """
+    ids = pd.RangeIndex(1, rows + 1)
+    return pd.DataFrame(
+        {
+            "id": ids,
+            "name": [f"Employee {i}" for i in ids],
+            "datetime": "2021-07-27T16:02:08Z",
+            "department_id": ids % 12 + 1,
+            "job_id": ids % 183 + 1,
+            "created_by_task_id": 1,
+        }
+    )
+
+
+def load_with_to_sql(connection, df):
+    df.to_sql(BENCHMARK_TABLE, connection, if_exists="append", index=False)
+
+
+def load_with_copy(connection, df):
+    copy_dataframe(connection, BENCHMARK_TABLE, df)
+
+
+def measure(engine, df, loader):
+    """
+    Load the DataFrame with the given loader and return the rows/sec achieved.
+    """
+    with engine.connect() as connection:
+        connection.execute(
+            text(
+                f"CREATE TABLE {BENCHMARK_TABLE} (LIKE employee INCLUDING DEFAULTS)"
+            )
+        )
+        start = time.perf_counter()
+        loader(connection, df)
+        elapsed = time.perf_counter() - start
+        connection.rollback()
+
+    return len(df) / elapsed
+
+
+def main(sizes):
+    engine = get_engine()
+
+    print(f"{'rows':>10} {'to_sql rows/s':>15} {'copy rows/s':>15} {'speedup':>8}")
+    for rows in sizes:
+        df = make_employees(rows)
+        to_sql_rate = measure(engine, df, load_with_to_sql)
+        copy_rate = measure(engine, df, load_with_copy)
+        print(
+            f"{rows:>10} {to_sql_rate:>15,.0f} {copy_rate:>15,.0f} "
+            f"{copy_rate / to_sql_rate:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
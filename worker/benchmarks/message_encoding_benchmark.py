@@ -0,0 +1,111 @@
+"""
+Compare the encode/decode cost and size of LOAD task messages in JSON and Avro.
+
+Messages hold `rows` synthetic employees, like a LOAD request at the API
+row limit. Decoding goes through the worker's `decode_message`, so the
+numbers include the header negotiation the consumer performs:
+
+    python benchmarks/message_encoding_benchmark.py 1000
+"""
+
+import io
+import sys
+import json
+import zlib
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from fastavro import schemaless_writer
+
+import constants
+from kafka.serialization import decode_message, get_schema
+
+SCHEMA_VERSION = "7"
+DEFAULT_ROWS = 1000
+REPEAT = 200
+
+
+def make_message(rows):
+    """
+    Build a LOAD task message holding synthetic employees.
+    """
+    return {
+        "task_id": 1,
+        "task": "LOAD",
+        "priority": 8,
+        "data": {
+            "departments": [],
+            "jobs": [],
+            "employees": [
+                {
+                    "id": i,
+                    "datetime": "2021-07-27T16:02:08Z",
+                    "name": f"Employee {i}",
+                    "department_id": i % 12 + 1,
+                    "job_id": i % 183 + 1,
+                }
+                for i in range(1, rows + 1)
+            ],
+            "on_conflict": "nothing",
+        },
+        "claim_check": None,
+    }
+
+
+def encode_json(message):
+    return json.dumps(message).encode("utf-8")
+
+
+def encode_avro(message):
+    record = {**message, "data": ("globant_challenge.UploadData", message["data"])}
+    buffer = io.BytesIO()
+    schemaless_writer(buffer, get_schema(SCHEMA_VERSION), record)
+    return buffer.getvalue()
+
+
+def measure(message, encode, headers):
+    """
+    Return the size, gzip size and average encode/decode time in microseconds.
+    """
+    value = encode(message)
+    assert decode_message(value, headers) == message
+
+    encode_time = timeit.timeit(lambda: encode(message), number=REPEAT) / REPEAT
+    decode_time = (
+        timeit.timeit(lambda: decode_message(value, headers), number=REPEAT) / REPEAT
+    )
+
+    return len(value), len(zlib.compress(value)), encode_time * 1e6, decode_time * 1e6
+
+
+def main(rows):
+    message = make_message(rows)
+    formats = {
+        constants.MessageFormatEnum.JSON.value: (
+            encode_json,
+            [(constants.KAFKA_CONTENT_TYPE_HEADER, "json")],
+        ),
+        constants.MessageFormatEnum.AVRO.value: (
+            encode_avro,
+            [
+                (constants.KAFKA_CONTENT_TYPE_HEADER, "avro"),
+                (constants.KAFKA_SCHEMA_VERSION_HEADER, SCHEMA_VERSION),
+            ],
+        ),
+    }
+
+    print(f"{rows} rows, {REPEAT} iterations")
+    print(
+        f"{'format':>8} {'bytes':>10} {'gzip bytes':>11} {'encode us':>10} {'decode us':>10}"
+    )
+    for name, (encode, headers) in formats.items():
+        size, compressed, encode_us, decode_us = measure(message, encode, headers)
+        print(
+            f"{name:>8} {size:>10,} {compressed:>11,} {encode_us:>10,.0f} {decode_us:>10,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
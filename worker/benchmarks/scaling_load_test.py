@@ -0,0 +1,125 @@
+"""
+Measure task throughput (tasks/sec) as the number of worker replicas increases.
+
+For each replica count, the LOAD worker service is scaled with Docker Compose,
+a burst of small LOAD tasks is submitted through the API and the task
+endpoint is polled until every task has finished. Run it from the
+repository root once `up.sh` has created the stack; the topic needs at
+least as many partitions as the largest replica count:
+
+    KAFKA_PARTITIONS=8 ./up.sh
+    API_URL=http://localhost:8888 python worker/benchmarks/scaling_load_test.py 1 2 4 8
+
+The tasks upsert departments with IDs from LOAD_TEST_FIRST_ID onwards.
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+API_URL = os.getenv("API_URL", "http://localhost:8888")
+TASKS = int(os.getenv("LOAD_TEST_TASKS", 200))
+ROWS_PER_TASK = int(os.getenv("LOAD_TEST_ROWS_PER_TASK", 100))
+LOAD_TEST_FIRST_ID = int(os.getenv("LOAD_TEST_FIRST_ID", 1_000_000))
+REBALANCE_WAIT = float(os.getenv("LOAD_TEST_REBALANCE_WAIT", 20))
+POLL_INTERVAL = 0.5
+DEFAULT_REPLICAS = (1, 2, 4)
+FINISHED_STATUSES = ("COMPLETED", "FAILED")
+
+
+def request(method, path, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(
+        f"{API_URL}{path}",
+        data=data,
+        method=method,
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read())
+
+
+def scale_workers(replicas):
+    """
+    Scale the worker service and wait for the consumer group to rebalance.
+    """
+    subprocess.run(
+        [
+            "docker",
+            "compose",
+            "up",
+            "-d",
+            "--no-build",
+            "--no-recreate",
+            "--scale",
+            f"worker-load={replicas}",
+            "worker-load",
+        ],
+        check=True,
+    )
+    time.sleep(REBALANCE_WAIT)
+
+
+def submit_task(index):
+    first_id = LOAD_TEST_FIRST_ID + index * ROWS_PER_TASK
+    body = {
+        "departments": [
+            {"id": first_id + row, "department": f"Load test {first_id + row}"}
+            for row in range(ROWS_PER_TASK)
+        ],
+        "on_conflict": "update",
+    }
+    return request("POST", "/challenge-1", body)["task_id"]
+
+
+def wait_for_tasks(task_ids):
+    """
+    Poll the task endpoint until every task is finished and return the failed count.
+    """
+    pending = set(task_ids)
+    failed = 0
+
+    while pending:
+        for task_id in list(pending):
+            status = request("GET", f"/task/{task_id}")["status"]
+            if status in FINISHED_STATUSES:
+                pending.discard(task_id)
+                failed += status == "FAILED"
+        if pending:
+            time.sleep(POLL_INTERVAL)
+
+    return failed
+
+
+def measure(replicas):
+    """
+    Submit a burst of tasks with the given number of replicas and return tasks/sec.
+    """
+    scale_workers(replicas)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        task_ids = list(executor.map(submit_task, range(TASKS)))
+    failed = wait_for_tasks(task_ids)
+    elapsed = time.perf_counter() - start
+
+    return TASKS / elapsed, failed
+
+
+def main(replica_counts):
+    print(f"{TASKS} tasks of {ROWS_PER_TASK} rows")
+    print(f"{'replicas':>8} {'tasks/s':>10} {'failed':>8} {'scaling':>8}")
+
+    baseline = None
+    for replicas in replica_counts:
+        rate, failed = measure(replicas)
+        baseline = baseline or rate
+        print(f"{replicas:>8} {rate:>10,.1f} {failed:>8} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main([int(replicas) for replicas in sys.argv[1:]] or DEFAULT_REPLICAS)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The worker modules import each other from `worker/app`, as in the container
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "app"))
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
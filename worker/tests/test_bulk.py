@@ -0,0 +1,106 @@
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from database.bulk import (
+    create_staging_table,
+    merge_dataframe,
+    merge_staging_table,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set"
+)
+
+COLUMNS = ["id", "name", "created_by_task_id"]
+
+
+@pytest.fixture
+def connection():
+    engine = create_engine(TEST_DATABASE_URL)
+
+    with engine.connect() as connection:
+        connection.execute(
+            text(
+                "CREATE TEMP TABLE merge_target ("
+                "id integer PRIMARY KEY, name text, created_by_task_id integer, "
+                "updated_at timestamp DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO merge_target (id, name, created_by_task_id) "
+                "VALUES (1, 'a', 1), (2, 'b', 1)"
+            )
+        )
+        yield connection
+        connection.rollback()
+
+    engine.dispose()
+
+
+def stage(connection, rows):
+    staging_table = create_staging_table(connection, "merge_target")
+    for row in rows:
+        connection.execute(
+            text(
+                f'INSERT INTO "{staging_table}" (id, name, created_by_task_id) '
+                "VALUES (:id, :name, :task)"
+            ),
+            row,
+        )
+    return staging_table
+
+
+ROWS = [
+    {"id": 1, "name": "a", "task": 2},
+    {"id": 2, "name": "B", "task": 2},
+    {"id": 3, "name": "c", "task": 2},
+    {"id": 3, "name": "c2", "task": 2},
+]
+
+
+def test_merge_with_update_rewrites_only_changed_rows(connection):
+    staging_table = stage(connection, ROWS)
+
+    counts = merge_staging_table(
+        connection, staging_table, "merge_target", COLUMNS, "update"
+    )
+
+    assert counts == {"inserted": 1, "updated": 1}
+    rows = connection.execute(
+        text("SELECT id, name, created_by_task_id FROM merge_target ORDER BY id")
+    ).all()
+    assert [tuple(row) for row in rows] == [(1, "a", 1), (2, "B", 1), (3, "c2", 2)]
+
+
+def test_merge_with_nothing_keeps_existing_rows(connection):
+    staging_table = stage(connection, ROWS)
+
+    counts = merge_staging_table(
+        connection, staging_table, "merge_target", COLUMNS, "nothing"
+    )
+
+    assert counts == {"inserted": 1, "updated": 0}
+    name = connection.execute(
+        text("SELECT name FROM merge_target WHERE id = 2")
+    ).scalar_one()
+    assert name == "b"
+
+
+def test_merge_dataframe_counts_skipped_rows(connection):
+    df = pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "name": ["a", "B", "c"],
+            "created_by_task_id": [2, 2, 2],
+        }
+    )
+
+    counts = merge_dataframe(connection, "merge_target", df, "update")
+
+    assert counts == {"inserted": 1, "updated": 1, "skipped": 1}
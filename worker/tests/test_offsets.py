@@ -0,0 +1,77 @@
+from kafka.offsets import OffsetTracker
+
+
+class FakeMessage:
+    def __init__(self, offset, topic="tasks-load", partition=0):
+        self._offset = offset
+        self._topic = topic
+        self._partition = partition
+
+    def topic(self):
+        return self._topic
+
+    def partition(self):
+        return self._partition
+
+    def offset(self):
+        return self._offset
+
+
+class FakeConsumer:
+    def __init__(self):
+        self.commits = []
+
+    def commit(self, offsets, asynchronous):
+        self.commits.append([(tp.topic, tp.partition, tp.offset) for tp in offsets])
+
+
+def test_commits_only_the_contiguous_prefix():
+    tracker = OffsetTracker()
+    consumer = FakeConsumer()
+    messages = [FakeMessage(offset) for offset in range(3)]
+    for message in messages:
+        tracker.track(message)
+
+    tracker.complete(messages[1])
+    tracker.commit(consumer)
+    assert consumer.commits == []
+
+    tracker.complete(messages[0])
+    tracker.commit(consumer)
+    assert consumer.commits == [[("tasks-load", 0, 2)]]
+
+    tracker.complete(messages[2])
+    tracker.commit(consumer)
+    assert consumer.commits[-1] == [("tasks-load", 0, 3)]
+
+
+def test_partitions_advance_independently():
+    tracker = OffsetTracker()
+    consumer = FakeConsumer()
+    first = FakeMessage(10, partition=0)
+    second = FakeMessage(20, partition=1)
+    tracker.track(first)
+    tracker.track(second)
+
+    tracker.complete(second)
+    tracker.commit(consumer)
+
+    assert consumer.commits == [[("tasks-load", 1, 21)]]
+
+
+def test_forgotten_partitions_are_not_committed():
+    tracker = OffsetTracker()
+    consumer = FakeConsumer()
+    message = FakeMessage(5)
+    tracker.track(message)
+    tracker.complete(message)
+
+    class Revoked:
+        topic = "tasks-load"
+        partition = 0
+
+    tracker.forget([Revoked()])
+    tracker.complete(FakeMessage(6))
+    tracker.commit(consumer)
+
+    assert consumer.commits == []
@@ -0,0 +1,89 @@
+import pytest
+
+from tasks.challenge_1 import restore
+from tasks.challenge_1.catalog import get_restore_chain
+
+CATALOG = {
+    "backups": [
+        {"id": "full-1", "type": "full", "created_at": "2024-01-01T00:00:00"},
+        {"id": "incr-1", "type": "incremental", "created_at": "2024-01-02T00:00:00"},
+        {"id": "full-2", "type": "full", "created_at": "2024-01-03T00:00:00"},
+        {"id": "incr-2", "type": "incremental", "created_at": "2024-01-04T00:00:00"},
+    ]
+}
+
+MANIFEST = {"partitioning": ["year"], "columns": ["id", "name", "department_id"]}
+
+
+def ids(chain):
+    return [backup["id"] for backup in chain]
+
+
+def test_restore_chain_defaults_to_the_latest_backup():
+    assert ids(get_restore_chain(CATALOG)) == ["full-2", "incr-2"]
+
+
+def test_restore_chain_to_a_backup_id_starts_at_its_full_backup():
+    assert ids(get_restore_chain(CATALOG, backup_id="incr-1")) == ["full-1", "incr-1"]
+    assert ids(get_restore_chain(CATALOG, backup_id="full-2")) == ["full-2"]
+
+
+def test_restore_chain_as_of_a_timestamp():
+    chain = get_restore_chain(CATALOG, as_of="2024-01-02T12:00:00+00:00")
+
+    assert ids(chain) == ["full-1", "incr-1"]
+
+
+def test_restore_chain_is_empty_without_a_full_backup():
+    assert get_restore_chain(CATALOG, backup_id="unknown") == []
+    assert get_restore_chain(CATALOG, as_of="2023-12-31T00:00:00") == []
+    assert get_restore_chain({"backups": CATALOG["backups"][1:2]}) == []
+
+
+def test_split_filters_separates_partitions_from_columns():
+    partition_filters, column_filters = restore.split_filters(
+        MANIFEST, {"year": "2021", "department_id": 3}
+    )
+
+    assert partition_filters == {"year": 2021}
+    assert column_filters == {"department_id": 3}
+
+
+@pytest.mark.parametrize("filters", [{"month": 1}, {"year": "last"}, {"year": None}])
+def test_split_filters_rejects_invalid_filters(filters):
+    with pytest.raises(ValueError):
+        restore.split_filters(MANIFEST, filters)
+
+
+def row_group(low, high, department_id):
+    return {
+        "rows": high - low + 1,
+        "columns": {
+            "id": {"min": low, "max": high},
+            "department_id": {"min": department_id, "max": department_id},
+        },
+    }
+
+
+FILE = {"row_groups": [row_group(1, 10, 1), row_group(11, 20, 2), row_group(21, 30, 1)]}
+
+
+def test_select_row_groups_skips_groups_ruled_out_by_statistics():
+    selected = restore.select_row_groups(
+        None, "employee", FILE, "merge", {"department_id": 1}
+    )
+
+    assert selected == [0, 2]
+
+
+def test_select_row_groups_skips_groups_already_present_in_append_mode(monkeypatch):
+    existing = {(1, 10): 10, (11, 20): 4, (21, 30): 0}
+    monkeypatch.setattr(
+        restore,
+        "count_keys_in_range",
+        lambda connection, table_name, low, high: existing[(low, high)],
+    )
+
+    selected = restore.select_row_groups(None, "employee", FILE, "append", {})
+
+    assert selected == [1, 2]
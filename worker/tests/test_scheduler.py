@@ -0,0 +1,89 @@
+import collections
+
+import pytest
+
+import scheduler as scheduler_module
+from scheduler import TaskScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_module, "time", clock)
+    return clock
+
+
+def push(scheduler, task_type, name, priority=5):
+    scheduler.push(name, {"task": task_type, "priority": priority})
+
+
+def pop_types(scheduler, count):
+    return [scheduler.pop()[1]["task"] for _ in range(count)]
+
+
+def test_types_are_served_by_weight(clock):
+    scheduler = TaskScheduler(weights={"REPORT": 2, "BACKUP": 1}, aging_seconds=30)
+    for index in range(6):
+        push(scheduler, "REPORT", f"report-{index}")
+        push(scheduler, "BACKUP", f"backup-{index}")
+
+    served = collections.Counter(pop_types(scheduler, 6))
+
+    assert served == {"REPORT": 4, "BACKUP": 2}
+
+
+def test_idle_type_does_not_bank_credit(clock):
+    scheduler = TaskScheduler(weights={"LOAD": 1, "BACKUP": 1}, aging_seconds=30)
+    for index in range(10):
+        push(scheduler, "LOAD", f"load-{index}")
+    pop_types(scheduler, 5)
+
+    for index in range(5):
+        push(scheduler, "BACKUP", f"backup-{index}")
+
+    served = collections.Counter(pop_types(scheduler, 4))
+
+    assert served == {"LOAD": 2, "BACKUP": 2}
+
+
+def test_higher_priority_runs_first_within_a_type(clock):
+    scheduler = TaskScheduler(weights={}, aging_seconds=30)
+    push(scheduler, "LOAD", "low", priority=1)
+    push(scheduler, "LOAD", "high", priority=9)
+
+    assert scheduler.pop()[0] == "high"
+    assert scheduler.pop()[0] == "low"
+
+
+def test_waiting_tasks_age_past_newer_urgent_ones(clock):
+    scheduler = TaskScheduler(weights={}, aging_seconds=10)
+    push(scheduler, "LOAD", "old", priority=1)
+    clock.now = 5
+    push(scheduler, "LOAD", "recent", priority=3)
+    clock.now = 30
+    push(scheduler, "LOAD", "new", priority=3)
+
+    assert [scheduler.pop()[0] for _ in range(3)] == ["recent", "old", "new"]
+
+
+def test_length_follows_push_pop_and_discard(clock):
+    scheduler = TaskScheduler(weights={}, aging_seconds=30)
+    for name in ("a", "b", "c"):
+        push(scheduler, "LOAD", name)
+
+    scheduler.pop()
+    removed = scheduler.discard(lambda message: message == "c")
+
+    assert removed == 1
+    assert len(scheduler) == 1
+    assert scheduler.pop() is not None
+    assert len(scheduler) == 0
+    assert scheduler.pop() is None
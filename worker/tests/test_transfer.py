@@ -0,0 +1,75 @@
+import hashlib
+
+import boto3
+import pytest
+from moto import mock_aws
+
+import constants
+from aws import s3
+from aws.transfer import S3MultipartWriter, S3RangeReader
+
+BUCKET = "backups-test"
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(constants, "S3_ENDPOINT_URL", "")
+    monkeypatch.setattr(s3, "_client", None)
+
+    with mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def test_writer_splits_the_content_into_parts(client):
+    content = bytes(range(256)) * (PART_SIZE * 2 // 256) + b"tail"
+
+    with S3MultipartWriter(BUCKET, "large.parquet", part_size=PART_SIZE) as writer:
+        for start in range(0, len(content), 1024 * 1024):
+            writer.write(content[start : start + 1024 * 1024])
+
+    response = client.get_object(Bucket=BUCKET, Key="large.parquet")
+    assert response["Body"].read() == content
+    assert response["ETag"].strip('"').endswith("-3")
+    assert writer.tell() == len(content)
+    assert writer.sha256 == hashlib.sha256(content).hexdigest()
+
+
+def test_writer_aborts_the_upload_on_error(client):
+    with pytest.raises(RuntimeError):
+        with S3MultipartWriter(BUCKET, "broken.parquet", part_size=PART_SIZE) as writer:
+            writer.write(b"x" * (PART_SIZE + 1))
+            raise RuntimeError("export failed")
+
+    assert "Uploads" not in client.list_multipart_uploads(Bucket=BUCKET)
+    assert "Contents" not in client.list_objects_v2(Bucket=BUCKET)
+
+
+def test_writer_creates_empty_objects(client):
+    with S3MultipartWriter(BUCKET, "empty.parquet", part_size=PART_SIZE) as writer:
+        pass
+
+    response = client.get_object(Bucket=BUCKET, Key="empty.parquet")
+    assert response["Body"].read() == b""
+    assert writer.sha256 == hashlib.sha256(b"").hexdigest()
+
+
+def test_range_reader_reads_only_the_requested_bytes(client):
+    content = b"0123456789" * 100
+    client.put_object(Bucket=BUCKET, Key="object.bin", Body=content)
+
+    with S3RangeReader(BUCKET, "object.bin") as reader:
+        assert reader.size == len(content)
+        reader.seek(-10, 2)
+        assert reader.read() == content[-10:]
+        reader.seek(25)
+        assert reader.read(5) == content[25:30]
+        assert reader.tell() == 30
+        assert reader.sha256() == hashlib.sha256(content).hexdigest()
+
+
+def test_range_reader_raises_for_missing_objects(client):
+    with pytest.raises(FileNotFoundError):
+        S3RangeReader(BUCKET, "missing.bin")